@@ -0,0 +1,73 @@
+"""
+    Compare looking up every attribute of every resource in a network by
+    scanning each resource's attribute list (HydraResource.get_attribute)
+    and through the index built by GAMSnetwork.
+
+    python benchmarks/attribute_lookup.py --resources 10000 --attributes 20
+"""
+import time
+import argparse
+
+from hydra_client.resources import HydraResource, HydraAttribute
+
+from hydra_gams.lib import GAMSnetwork
+
+
+class Record(object):
+    """
+        Stands in for the attribute, resource attribute and resource
+        scenario records HydraAttribute is created from.
+    """
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def make_network(resource_count, attribute_count):
+    network = GAMSnetwork()
+    network.name = 'benchmark'
+    network.attributes = []
+    network.nodes = []
+    network.links = []
+    network.groups = []
+
+    attrs = [Record(id=a, name='Attribute %s'%a) for a in range(attribute_count)]
+
+    for n in range(resource_count):
+        node = HydraResource()
+        node.name = 'node_%s'%n
+        for attr in attrs:
+            res_attr = Record(id=n * attribute_count + attr.id, attr_is_var='N')
+            node.attributes.append(HydraAttribute(attr, res_attr, None))
+        network.nodes.append(node)
+
+    return network, [attr.name for attr in attrs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--resources', type=int, default=10000)
+    parser.add_argument('--attributes', type=int, default=20)
+    args = parser.parse_args()
+
+    network, attr_names = make_network(args.resources, args.attributes)
+
+    start = time.time()
+    network.index_attributes()
+    print("%-10s %8.2fs"%('index', time.time() - start))
+
+    start = time.time()
+    scanned = [node.get_attribute(attr_name=name)
+               for name in attr_names for node in network.nodes]
+    print("%-10s %8.2fs"%('scan', time.time() - start))
+
+    start = time.time()
+    indexed = [network.get_resource_attribute(node, name)
+               for name in attr_names for node in network.nodes]
+    print("%-10s %8.2fs"%('lookup', time.time() - start))
+
+    if scanned != indexed:
+        raise Exception("The scan and the index found different attributes.")
+
+
+if __name__ == '__main__':
+    main()
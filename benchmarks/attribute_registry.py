@@ -0,0 +1,78 @@
+"""
+    Compare collecting the unique attributes of a set of resources with
+    lists, the way each export pass used to, and with the AttributeRegistry
+    the exporter now shares between passes.
+
+    Every resource has all the attributes of a template with the given
+    number of attributes, spread over the dataset types, and each type is
+    collected as many times as the exporter does in an export.
+
+    python benchmarks/attribute_registry.py --resources 200 --attributes 100 250 500
+"""
+import time
+import argparse
+from types import SimpleNamespace
+
+from hydra_gams.lib import translate_attr_name
+from hydra_gams.exporter.registry import AttributeRegistry
+
+DATASET_TYPES = ('scalar', 'descriptor', 'timeseries', 'array', 'dataframe')
+
+#The dataset types the exporter collects attributes of, in a network export
+PASSES = ('scalar', 'descriptor', 'timeseries', 'timeseries', 'array')
+
+
+def make_resources(resources, attributes):
+    return [SimpleNamespace(name='node %s'%r,
+                            attributes=[SimpleNamespace(name='attr %s'%a,
+                                                        dataset_type=DATASET_TYPES[a % len(DATASET_TYPES)],
+                                                        is_var=False)
+                                        for a in range(attributes)])
+            for r in range(resources)]
+
+
+def with_lists(resources):
+    collected = []
+    for dataset_type in PASSES:
+        attributes = []
+        attr_names = []
+        for resource in resources:
+            for attr in resource.attributes:
+                if attr.dataset_type == dataset_type and attr.is_var is False:
+                    attr.name = translate_attr_name(attr.name)
+                    if attr.name not in attr_names:
+                        attributes.append(attr)
+                        attr_names.append(attr.name)
+        collected.append(attributes)
+    return collected
+
+
+def with_registry(resources):
+    registry = AttributeRegistry()
+    return [registry.get_attributes(resources, dataset_type) for dataset_type in PASSES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--resources', type=int, default=200)
+    parser.add_argument('--attributes', type=int, nargs='+', default=[100, 250, 500])
+    args = parser.parse_args()
+
+    print("%-10s %10s %10s"%('attributes', 'lists', 'registry'))
+    for attributes in args.attributes:
+        timings = []
+        results = []
+        for function in (with_lists, with_registry):
+            resources = make_resources(args.resources, attributes)
+            start = time.time()
+            results.append(function(resources))
+            timings.append(time.time() - start)
+        print("%-10s %9.3fs %9.3fs"%(attributes, timings[0], timings[1]))
+
+        lists, registry = [[[a.name for a in collected] for collected in result] for result in results]
+        if lists != registry:
+            raise Exception("The attributes were collected differently.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+    Compare formatting the cells of a dataframe as GAMS table text one cell
+    at a time, the way export_dataframe used to, and column by column with
+    get_cells and pad_cells.
+
+    python benchmarks/dataframe_tables.py --rows 2000 --columns 10
+"""
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from hydra_gams.exporter.exporter import get_cells, pad_cells
+
+
+def cell_by_cell(df, width):
+    ff = '{0:<' + str(width) + '}'
+    lines = []
+    for index in df.index:
+        for column in df.columns:
+            lines.append(ff.format(str(df[column][index])))
+    return ''.join(lines)
+
+
+def column_by_column(df, width):
+    cells = pad_cells(get_cells(df), width)
+    return ''.join(''.join(row) for row in cells)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--width', type=int, default=20)
+    args = parser.parse_args()
+
+    rnd = np.random.RandomState(0)
+    df = pd.DataFrame(rnd.random_sample((args.rows, args.columns)) * 1000,
+                      index=['r%s'%r for r in range(args.rows)],
+                      columns=['c%s'%c for c in range(args.columns)])
+    #An integer column, which str() formats without a decimal point
+    df['c0'] = np.arange(args.rows)
+
+    results = {}
+    for label, function in (('cell by cell', cell_by_cell),
+                            ('column by column', column_by_column)):
+        start = time.time()
+        results[label] = function(df, args.width)
+        print("%-18s %8.3fs"%(label, time.time() - start))
+
+    if results['cell by cell'] != results['column by column']:
+        raise Exception("The tables are different.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+    Time an export of a synthetic network with GAMSExporter.export, and the
+    importer's parsing of the exported file, and optionally measure the
+    peak memory each uses. No Hydra server or GAMS installation is needed: the network
+    is served by a StubConnection.
+
+    The results are printed, or written to --output, as JSON, so that they
+    can be compared between versions.
+
+    python benchmarks/export_import.py --nodes 500 --links 800 --timeseries-length 3650 --memory --output results.json
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+from hydra_gams.exporter.exporter import GAMSExporter
+from hydra_gams.importer.importer import GAMSImporter
+
+from synthetic_network import make_network, StubConnection
+
+#The network parameters, and their defaults
+NETWORK_PARAMETERS = (('nodes', 100),
+                      ('links', 150),
+                      ('groups', 5),
+                      ('scalars', 5),
+                      ('descriptors', 2),
+                      ('timeseries', 3),
+                      ('dataframes', 2),
+                      ('variables', 2),
+                      ('timeseries_length', 365),
+                      ('dataframe_rows', 12),
+                      ('dataframe_columns', 3),
+                      ('seed', 0))
+
+#A model which includes the exported data and declares the variables the
+#importer looks for
+MODEL_TEMPLATE = """$include %(data_file)s
+
+Variables
+%(variables)s
+;
+"""
+
+
+def export(network_parameters, output, workers=None):
+    network, attributes, template, time_axis = make_network(**network_parameters)
+    exporter = GAMSExporter(StubConnection(network, attributes, template),
+                            scenario_id=1,
+                            template_id=1,
+                            output=output,
+                            node_node=False,
+                            link_name=False,
+                            start_date=None,
+                            end_date=None,
+                            time_step=None,
+                            time_axis=None,
+                            use_cache=False,
+                            workers=workers)
+    exporter.time_axis = time_axis
+    exporter.export()
+    return exporter
+
+
+def parse(model_file):
+    """
+        Do the parts of an import which read the .gms files. Reading the GDX
+        file needs GAMS, so the importer isn't initialised.
+    """
+    importer = GAMSImporter.__new__(GAMSImporter)
+    importer.gms_file = model_file
+    importer.network_id = 1
+    importer.scenario_id = 1
+    importer.time_axis = dict()
+    importer.gams_units = dict()
+    importer.gdx_ts_vars = dict()
+
+    importer.load_gams_file()
+    importer.parse_time_index()
+    for variable in ('variables', 'positive variables', 'positive variable',
+                     'binary variables', 'parameters'):
+        importer.parse_variables(variable)
+    return importer
+
+
+def measure(function, *args, memory=False, **kwargs):
+    """
+        Time a function and, if memory is True, measure the peak memory it
+        allocates. Tracing the memory slows the function down, so timings
+        are only comparable between runs which both trace it or both don't.
+    """
+    if memory is True:
+        tracemalloc.start()
+
+    start = time.time()
+    result = function(*args, **kwargs)
+    measurements = {'seconds': round(time.time() - start, 4)}
+
+    if memory is True:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        measurements['peak_mb'] = round(peak / 1024.0 / 1024.0, 2)
+
+    return result, measurements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    for name, default in NETWORK_PARAMETERS:
+        parser.add_argument('--' + name.replace('_', '-'), type=int, default=default)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--memory', action='store_true',
+                        help="Measure the peak memory of each step too.")
+    parser.add_argument('--output', help="The file to write the results to. "
+                                         "They are printed if it isn't given.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    network_parameters = dict((name, getattr(args, name)) for name, _ in NETWORK_PARAMETERS)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, 'data.txt')
+        exporter, results['export'] = measure(export, network_parameters, data_file,
+                                              workers=args.workers, memory=args.memory)
+        results['export']['bytes'] = os.path.getsize(data_file)
+
+        variables = ['%s(i,t) result [-]'%attr.name.replace(' ', '_')
+                     for attr in exporter.attrs if 'output' in attr.name]
+        model_file = os.path.join(directory, 'model.gms')
+        with open(model_file, 'w') as f:
+            f.write(MODEL_TEMPLATE%{'data_file': data_file,
+                                    'variables': '\n'.join(variables)})
+
+        importer, results['import_parse'] = measure(parse, model_file, memory=args.memory)
+        if len(importer.time_axis) != network_parameters['timeseries_length']:
+            raise Exception("The importer read %s timestamps from the export, not %s."%
+                            (len(importer.time_axis), network_parameters['timeseries_length']))
+        results['import_parse']['timeseries_variables'] = len(importer.gdx_ts_vars)
+
+    report = {'network': network_parameters,
+              'workers': args.workers,
+              'memory': args.memory,
+              'python': platform.python_version(),
+              'pandas': pd.__version__,
+              'platform': platform.platform(),
+              'results': results}
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+    Compare the memory and time used to build the node array results of one
+    GDX symbol, the way the importer used to (copying the whole symbol for
+    each node and building the array from all of its records) and from the
+    records of each node only.
+
+    No GAMS installation is needed: the symbol is generated.
+
+    python benchmarks/importer_arrays.py --nodes 500 --years 20 --categories 5
+"""
+import copy
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from hydra_gams.importer.importer import GAMSImporter, GDXvariable
+
+
+def make_symbol(node_count, year_count, category_count):
+    """
+        Make a 3-dimensional symbol, indexed (year, category, node), like a
+        node result exported as an array.
+    """
+    nodes = ['node_%s'%n for n in range(node_count)]
+    years = ['y%s'%y for y in range(year_count)]
+    categories = ['c%s'%c for c in range(category_count)]
+
+    uels = np.array([''] + years + categories + nodes, dtype=object)
+
+    year_numbers = np.arange(1, year_count + 1)
+    category_numbers = np.arange(year_count + 1, year_count + category_count + 1)
+    node_numbers = np.arange(year_count + category_count + 1, len(uels))
+
+    keys = np.array(np.meshgrid(year_numbers, category_numbers, node_numbers, indexing='ij'),
+                    dtype=np.int32).reshape(3, -1).T
+    values = np.zeros((len(keys), 5))
+    values[:, 0] = np.random.RandomState(0).random_sample(len(keys))
+
+    gdxvar = GDXvariable()
+    gdxvar.name = 'benchmark'
+    gdxvar.dim = 3
+    gdxvar.records = len(keys)
+    gdxvar.set_records(keys, values, uels)
+
+    return gdxvar, nodes
+
+
+def copy_per_node(importer, gdxvar, nodes):
+    arrays = []
+    for node in nodes:
+        index = []
+        data = []
+        inx = copy.deepcopy(gdxvar.index)
+        dat = copy.deepcopy(gdxvar.data)
+        for i, idx in enumerate(inx):
+            if node in idx:
+                idx.pop(idx.index(node))
+                index.append(idx)
+                data.append(dat[i])
+        arrays.append(importer.create_array(gdxvar.index, gdxvar.data, node))
+    return arrays
+
+
+def slice_per_node(importer, gdxvar, nodes):
+    arrays = []
+    for node in nodes:
+        index, data = gdxvar.get_resource_records(node)
+        arrays.append(importer.create_array(index, data, node))
+    return arrays
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.time()
+    result = function(*args)
+    elapsed = time.time() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--nodes', type=int, default=200)
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--categories', type=int, default=5)
+    args = parser.parse_args()
+
+    #create_array doesn't use the importer's state, so it isn't initialised
+    importer = GAMSImporter.__new__(GAMSImporter)
+
+    results = {}
+    for label, function in (('copy per node', copy_per_node),
+                            ('slice per node', slice_per_node)):
+        gdxvar, nodes = make_symbol(args.nodes, args.years, args.categories)
+        arrays, elapsed, peak = measure(function, importer, gdxvar, nodes)
+        results[label] = arrays
+        print("%-15s %8.2fs %10.1f MB peak"%(label, elapsed, peak / 1024.0 / 1024.0))
+
+    if results['copy per node'] != results['slice per node']:
+        raise Exception("The arrays built by each method are different.")
+
+
+if __name__ == '__main__':
+    main()
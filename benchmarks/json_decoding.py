@@ -0,0 +1,65 @@
+"""
+    Compare reading Hydra dataset values as dataframes with each of the JSON
+    backends in hydra_gams.decoder which are installed, and with pd.read_json.
+
+    The datasets are generated in the shapes Hydra stores for a
+    hydro-economic model: a daily inflow timeseries, a monthly seasonal
+    demand (9999 year), and a multi-column dataframe of costs by year.
+
+    python benchmarks/json_decoding.py --years 30 --repeat 20
+"""
+import time
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from hydra_gams import decoder
+
+
+def make_datasets(years):
+    rnd = np.random.RandomState(0)
+
+    days = pd.date_range('2000-01-01', periods=years * 365, freq='D')
+    inflow = {"0": {t.strftime('%Y-%m-%dT%H:%M:%S.000Z'): v
+                    for t, v in zip(days, (rnd.random_sample(len(days)) * 100).tolist())}}
+
+    months = pd.date_range('2000-01-01', periods=12, freq='MS')
+    demand = {"0": {t.strftime('9999-%m-%dT%H:%M:%S.000Z'): v
+                    for t, v in zip(months, (rnd.random_sample(12) * 10).tolist())}}
+
+    year_labels = [str(2000 + y) for y in range(years)]
+    costs = dict((column, dict(zip(year_labels, (rnd.random_sample(years) * 1000).tolist())))
+                 for column in ('capital', 'operating', 'maintenance', 'pumping'))
+
+    return {'daily timeseries': json.dumps(inflow),
+            'seasonal timeseries': json.dumps(demand),
+            'dataframe': json.dumps(costs)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    datasets = make_datasets(args.years)
+
+    print("%-20s %-10s %10s"%('dataset', 'backend', 'ms/read'))
+    for name, text in datasets.items():
+        expected = pd.read_json(text, precise_float=True)
+        for backend in decoder.get_available_backends():
+            decoder.set_backend(backend)
+            start = time.time()
+            for _ in range(args.repeat):
+                frame = decoder.read_frame(text)
+            elapsed = (time.time() - start) / args.repeat
+            print("%-20s %-10s %10.2f"%(name, backend, elapsed * 1000))
+
+            if backend != 'pandas':
+                pd.testing.assert_frame_equal(frame, expected, check_freq=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+    Synthetic Hydra networks, and a connection which serves them from
+    memory, so that the exporter and importer can be run without a Hydra
+    server.
+
+    make_network builds a network, its scenario, attributes and template in
+    the shapes the Hydra client returns them, with attribute access on
+    dictionaries. StubConnection implements the calls the exporter and
+    importer make with them.
+"""
+import json
+import random
+
+import pandas as pd
+
+#The format Hydra stores timeseries timestamps in
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.000Z'
+
+
+class HydraObject(dict):
+    """
+        A dictionary whose items are also attributes, like the objects the
+        Hydra client returns.
+    """
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+class NetworkBuilder(object):
+    """
+        Keeps the ids of the attributes, resource attributes and datasets of
+        a network which is being built.
+    """
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.attributes = []
+        self.resourcescenarios = []
+        self.resource_attr_id = 0
+        self.dataset_id = 0
+
+    def add_attribute(self, name):
+        attribute = HydraObject(id=len(self.attributes) + 1, name=name)
+        self.attributes.append(attribute)
+        return attribute
+
+    def add_resource_attribute(self, attribute, dataset_type=None, value=None, metadata=None):
+        """
+            Add a resource attribute, with a dataset in the scenario if it has
+            a value, or as a variable (a result of the model) if it doesn't.
+        """
+        self.resource_attr_id += 1
+        is_var = 'Y' if value is None else 'N'
+        resource_attribute = HydraObject(id=self.resource_attr_id,
+                                         attr_id=attribute.id,
+                                         attr_is_var=is_var)
+        if value is not None:
+            self.dataset_id += 1
+            dataset = HydraObject(id=self.dataset_id,
+                                  type=dataset_type,
+                                  value=value,
+                                  metadata=metadata or {})
+            self.resourcescenarios.append(HydraObject(resource_attr_id=self.resource_attr_id,
+                                                      dataset=dataset))
+        return resource_attribute
+
+
+def make_network(nodes=100,
+                 links=150,
+                 groups=5,
+                 scalars=5,
+                 descriptors=2,
+                 timeseries=3,
+                 dataframes=2,
+                 variables=2,
+                 timeseries_length=365,
+                 dataframe_rows=12,
+                 dataframe_columns=3,
+                 seed=0):
+    """
+        Make a network with the given number of nodes, links and groups.
+
+        Each node and link has the given number of scalar, descriptor,
+        timeseries and dataframe attributes, and of variables. The
+        timeseries are daily, starting on 2000-01-01.
+
+        :returns (network, attributes, template, time axis), where the time
+                 axis is the list of the datetimes of the timeseries.
+    """
+    builder = NetworkBuilder(seed)
+    rnd = builder.random
+
+    times = pd.date_range('2000-01-01', periods=timeseries_length, freq='D')
+    timestamps = [t.strftime(TIMESTAMP_FORMAT) for t in times]
+
+    def scalar():
+        return str(round(rnd.random() * 1000, 6))
+
+    def a_timeseries():
+        return json.dumps({"0": dict(zip(timestamps, [round(rnd.random() * 100, 6) for _ in timestamps]))})
+
+    def a_dataframe():
+        rows = [str(r + 1) for r in range(dataframe_rows)]
+        return json.dumps(dict(('c%s'%c, dict((r, round(rnd.random() * 10, 6)) for r in rows))
+                               for c in range(dataframe_columns)))
+
+    def make_resource_attributes(prefix):
+        """
+            Make the attributes of a resource type, and a function which
+            makes the resource attributes of one resource of it.
+        """
+        by_type = []
+        for dataset_type, count, make_value in (('scalar', scalars, scalar),
+                                                ('descriptor', descriptors, None),
+                                                ('timeseries', timeseries, a_timeseries),
+                                                ('dataframe', dataframes, a_dataframe)):
+            for i in range(count):
+                by_type.append((builder.add_attribute('%s %s %s'%(prefix, dataset_type, i)),
+                                dataset_type, make_value))
+        outputs = [builder.add_attribute('%s output %s'%(prefix, i)) for i in range(variables)]
+
+        def make():
+            resource_attributes = []
+            for attribute, dataset_type, make_value in by_type:
+                if make_value is None:
+                    value = rnd.choice(('low', 'medium', 'high'))
+                else:
+                    value = make_value()
+                resource_attributes.append(builder.add_resource_attribute(attribute, dataset_type, value))
+            for attribute in outputs:
+                resource_attributes.append(builder.add_resource_attribute(attribute))
+            return resource_attributes
+
+        return make
+
+    node_type = HydraObject(id=1, name='node', resource_type='NODE', typeattrs=[], layout={}, template_id=1)
+    link_type = HydraObject(id=2, name='link', resource_type='LINK', typeattrs=[], layout={}, template_id=1)
+    group_type = HydraObject(id=3, name='group', resource_type='GROUP', typeattrs=[], layout={}, template_id=1)
+    network_type = HydraObject(id=4, name='network', resource_type='NETWORK', typeattrs=[], layout={}, template_id=1)
+    template = HydraObject(id=1, name='synthetic', templatetypes=[node_type, link_type, group_type, network_type])
+
+    node_attributes = make_resource_attributes('node')
+    network_nodes = [HydraObject(id=n + 1,
+                                 name='node_%s'%n,
+                                 x=float(n),
+                                 y=float(n),
+                                 attributes=node_attributes(),
+                                 types=[node_type])
+                     for n in range(nodes)]
+
+    link_attributes = make_resource_attributes('link')
+    network_links = []
+    for l in range(links):
+        node_1 = rnd.randrange(nodes)
+        #Links join two different nodes
+        node_2 = (node_1 + 1 + rnd.randrange(nodes - 1)) % nodes if nodes > 1 else node_1
+        network_links.append(HydraObject(id=nodes + l + 1,
+                                         name='link_%s'%l,
+                                         node_1_id=node_1 + 1,
+                                         node_2_id=node_2 + 1,
+                                         attributes=link_attributes(),
+                                         types=[link_type]))
+
+    network_groups = [HydraObject(id=nodes + links + g + 1,
+                                  name='group_%s'%g,
+                                  attributes=[],
+                                  types=[group_type])
+                      for g in range(groups)]
+    group_items = []
+    if groups > 0:
+        for node in network_nodes:
+            group_items.append(HydraObject(ref_key='NODE',
+                                           node_id=node.id,
+                                           group_id=network_groups[node.id % groups].id))
+
+    network_attribute = builder.add_attribute('discount rate')
+    network_attributes = [builder.add_resource_attribute(network_attribute, 'scalar', '0.05')]
+
+    scenario = HydraObject(id=1,
+                           network_id=1,
+                           resourcescenarios=builder.resourcescenarios,
+                           resourcegroupitems=group_items,
+                           start_time=None,
+                           end_time=None,
+                           time_step=None)
+
+    network = HydraObject(id=1,
+                          project_id=1,
+                          name='synthetic',
+                          description='A synthetic network',
+                          types=[HydraObject(template_id=1, id=network_type.id)],
+                          attributes=network_attributes,
+                          scenarios=[scenario],
+                          nodes=network_nodes,
+                          links=network_links,
+                          resourcegroups=network_groups)
+
+    return network, builder.attributes, template, list(times.to_pydatetime())
+
+
+class StubConnection(object):
+    """
+        Serves a network made by make_network, in place of a connection to
+        a Hydra server. Data saved with bulk_update_resourcedata is kept in
+        uploads.
+    """
+    def __init__(self, network, attributes, template):
+        self.network = network
+        self.attributes = attributes
+        self.template = template
+        self.uploads = []
+
+    def get_scenario(self, scenario_id, include_data=False, **kwargs):
+        return HydraObject(id=scenario_id, network_id=self.network.id)
+
+    def get_network(self, **kwargs):
+        return self.network
+
+    def get_attributes(self, **kwargs):
+        return self.attributes
+
+    def get_template(self, template_id, **kwargs):
+        return self.template
+
+    def bulk_update_resourcedata(self, scenario_ids, resource_scenarios, **kwargs):
+        self.uploads.append(resource_scenarios)
@@ -0,0 +1,43 @@
+"""
+    Compare converting a list of timestamps one at a time with get_datetime
+    (as reindex_timeseries used to) and all at once with get_datetimes, the
+    first time and once the list has been cached.
+
+    python benchmarks/timestamp_parsing.py --timestamps 100000
+"""
+import time
+import argparse
+
+import pandas as pd
+
+from hydra_gams.util import get_datetime, get_datetimes, _get_datetimes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--timestamps', type=int, default=100000)
+    parser.add_argument('--format', default='%Y-%m-%dT%H:%M:%S.000Z')
+    args = parser.parse_args()
+
+    timestamps = [t.strftime(args.format)
+                  for t in pd.date_range('2000-01-01', periods=args.timestamps, freq='H')]
+
+    start = time.time()
+    one_at_a_time = [get_datetime(t) for t in timestamps]
+    print("%-15s %8.2fs"%('get_datetime', time.time() - start))
+
+    _get_datetimes.cache_clear()
+    start = time.time()
+    together = get_datetimes(timestamps)
+    print("%-15s %8.2fs"%('get_datetimes', time.time() - start))
+
+    start = time.time()
+    cached = get_datetimes(timestamps)
+    print("%-15s %8.2fs"%('cached', time.time() - start))
+
+    if one_at_a_time != together or together != cached:
+        raise Exception("The timestamps were converted differently.")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,7 @@ from dateutil import parser
 
 from hydra_client.output import write_progress, write_output
 
-from hydra_gams.lib import GamsModel
+from hydra_gams.lib import GamsModel, ModelSummary
 from hydra_gams import GAMSExporter, GAMSImporter
 
 LOG = logging.getLogger(__name__)
@@ -36,33 +36,9 @@ def get_input_file_name(gams_model):
         raise Exception(f'Gams file {gams_model} not found.')
 
     inputfilename = None
-    gamsfile = open(gams_model, "r")
-    for line in gamsfile:
-        if "include" not in line.lower():
-            continue
-        sline = line.strip()
-        if len(sline) > 0 and sline[0].startswith('$'):
-            lineparts = sline.split()
-            if lineparts[1] == 'include':
-                name = sline
-                name = name.replace('$', '')
-                name = name.replace('"', '')
-                name = name.replace(';', '')
-                name = name.replace('include', '')
-                name = name.strip()
-                inputfilename = os.path.join(os.path.dirname(gams_model),name)
-                break
-            elif lineparts[0] == '$include':
-                name = sline
-                name = name.replace('$', '')
-                name = name.replace('"', '')
-                name = name.replace(';', '')
-                name = name.replace('include', '')
-                name = name.strip()
-                inputfilename=os.path.join(os.path.dirname(gams_model),name)
-                break
-
-    gamsfile.close()
+    summary = ModelSummary.from_file(gams_model)
+    if len(summary.includes) > 0:
+        inputfilename = os.path.join(os.path.dirname(gams_model), summary.includes[0])
 
     if inputfilename is None:
         raise Exception('Unable to identify the name of the input '
@@ -77,9 +53,11 @@ def get_input_file_name(gams_model):
 
     return inputfilename
 
-def run_gams_model(gms_file, debug=False, data_dir='/tmp'):
+def run_gams_model(gms_file, debug=False, data_dir='/tmp', reuse_checkpoint=False):
     """
-        Run a gams model using the supplied GMS file.
+        Run a gams model using the supplied GMS file. If reuse_checkpoint
+        is True, the model is restarted from the checkpoint saved the first
+        time it was run, with only its data read again. (See GamsModel)
     """
     LOG.info("Running GAMS model.")
     cur_time = datetime.now().replace(microsecond=0)
@@ -87,22 +65,31 @@ def run_gams_model(gms_file, debug=False, data_dir='/tmp'):
     if working_directory == '':
         working_directory = '.'
 
-    model = GamsModel(working_directory, debug, data_dir=data_dir)
+    model = GamsModel(working_directory, debug, data_dir=data_dir, reuse_checkpoint=reuse_checkpoint)
     model_job = model.add_job(gms_file)
     write_output("Running GAMS model, please note that this may take time")
     model.run()
     LOG.info("Running GAMS model finsihed")
+
+    return get_results_file(working_directory, cur_time)
+
+def get_results_file(working_directory, since):
+    """
+        Find the GDX file(s) a model run wrote to its working directory
+        since it started.
+    """
     # if result file is not provided, it looks for it automatically at GAMS WD
     sol_pool = 'solnpool.gdx'
     res = 'results_MGA.gdx'
+    gdx_file = None
 
     LOG.info("Extracting results from %s.", working_directory)
     files_list = get_files_list(working_directory, '.gdx')
     if sol_pool in files_list:
         parsed_dt = parser.parse(files_list[sol_pool])
         parsed_dt_2 = parser.parse(files_list[res])
-        delta = (parsed_dt - cur_time).total_seconds()
-        delta_2 = (parsed_dt_2 - cur_time).total_seconds()
+        delta = (parsed_dt - since).total_seconds()
+        delta_2 = (parsed_dt_2 - since).total_seconds()
         # todo chaeck if dgx files exist
         if delta >= 0 and delta_2 >= 0:
             gdx_list = [os.path.join(working_directory, sol_pool),
@@ -116,7 +103,7 @@ def run_gams_model(gms_file, debug=False, data_dir='/tmp'):
     else:
         for file_ in files_list:
             parsed_dt = parser.parse(files_list[file_])
-            delta = (parsed_dt-cur_time).total_seconds()
+            delta = (parsed_dt-since).total_seconds()
             if delta >= 0:
                 gdx_file = os.path.join(working_directory, file_)
         if gdx_file is None:
@@ -142,6 +129,11 @@ def export_run_import(client,
                       debug=False,
                       default_dict = {},
                       settings_text='',
+                      output_format='txt',
+                      use_cache=True,
+                      incremental=False,
+                      workers=None,
+                      reuse_checkpoint=False,
                       data_dir='/tmp'):
     """
         1. Export a hydra network to a GAMS input text file
@@ -168,12 +160,19 @@ def export_run_import(client,
                                 export_by_type=export_by_type,
                                 gams_date_time_index=gams_date_time_index,
                                 default_dict = default_dict,
-                                settings_text=settings_text
+                                settings_text=settings_text,
+                                output_format=output_format,
+                                use_cache=use_cache,
+                                incremental=incremental,
+                                workers=workers
                                 )
 
         exporter.export()
 
-        model_gdx_file = run_gams_model(gms_file, debug=debug, data_dir=data_dir)
+        model_gdx_file = run_gams_model(gms_file,
+                                        debug=debug,
+                                        data_dir=data_dir,
+                                        reuse_checkpoint=reuse_checkpoint)
 
         importer = GAMSImporter(scenario_id,
                                 gms_file,
@@ -1 +1,2 @@
 from hydra_gams.auto.GAMSAutoRun import export_run_import
+from hydra_gams.auto.batch import run_batch, parse_scenario_ids, format_summary
@@ -0,0 +1,304 @@
+#(c) Copyright 2013, 2014, 2015 University of Manchester\
+import os
+import json
+import glob
+import time
+import shutil
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from hydra_client.output import write_progress, write_output
+
+from hydra_gams.lib import GamsModel, ModelSummary
+from hydra_gams.lib.HydraGAMSlib import CHECKPOINT_PREFIX
+from hydra_gams import GAMSExporter, GAMSImporter
+from hydra_gams.auto.GAMSAutoRun import get_results_file
+
+LOG = logging.getLogger(__name__)
+
+def parse_scenario_ids(text):
+    """
+        Read a list of scenario ids, such as '1,2,5-9', where a-b is the
+        range from a to b inclusive. Each id is only kept once, in the order
+        it is first given.
+    """
+    scenario_ids = []
+    for part in text.split(','):
+        part = part.strip()
+        if part == '':
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            ids = range(int(first), int(last) + 1)
+        else:
+            ids = [int(part)]
+        for scenario_id in ids:
+            if scenario_id not in scenario_ids:
+                scenario_ids.append(scenario_id)
+
+    if len(scenario_ids) == 0:
+        raise Exception(f"No scenario ids in '{text}'.")
+    return scenario_ids
+
+
+def shallow_copy(obj):
+    """
+        Copy one of the dictionaries the client returns, whose items are also
+        its attributes, sharing its items. copy.copy can't be used, as it
+        looks for __setstate__ on the copy, which such an object may answer
+        with one of its items.
+    """
+    copied = dict.__new__(type(obj))
+    dict.update(copied, obj)
+    vars(copied).update(vars(obj))
+    return copied
+
+
+class BatchConnection(object):
+    """
+        A connection for exporting and importing the scenarios of a batch,
+        which are all of one network. The network is fetched once, with the
+        data of all the scenarios, as are its template and the attributes.
+        Everything else is passed on to the client.
+
+        The exporter reads the data of the network's first scenario, so each
+        time the network is asked for with the id of a scenario, it gets a
+        copy of the network with that scenario at the start of its scenarios.
+    """
+    def __init__(self, client, scenario_ids):
+        self.client = client
+        self.scenario_ids = list(scenario_ids)
+        #The results of the calls made, by name and arguments. The exports
+        #and the imports fetch from different threads.
+        self.fetched = {}
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def fetch(self, name, **kwargs):
+        key = (name, json.dumps(kwargs, sort_keys=True, default=str))
+        with self.lock:
+            if key not in self.fetched:
+                self.fetched[key] = getattr(self.client, name)(**kwargs)
+            return self.fetched[key]
+
+    def get_network(self, scenario_ids=None, **kwargs):
+        if scenario_ids is None:
+            return self.fetch('get_network', **kwargs)
+
+        network = self.fetch('get_network', scenario_ids=self.scenario_ids, **kwargs)
+
+        scenarios = network.scenarios or []
+        first = [s for s in scenarios if s.id in scenario_ids]
+        if len(first) < len(scenario_ids):
+            raise Exception(f"Scenarios {scenario_ids} are not all in network {network.id}. "
+                            "The scenarios of a batch must be of one network.")
+        #The fetched network is shared by the exports, which can still be
+        #reading its scenarios
+        network = shallow_copy(network)
+        network.scenarios = first + [s for s in scenarios if s.id not in scenario_ids]
+        return network
+
+    def get_template(self, **kwargs):
+        return self.fetch('get_template', **kwargs)
+
+    def get_attributes(self, **kwargs):
+        return self.fetch('get_attributes', **kwargs)
+
+
+class ScenarioRun(object):
+    """
+        The export, run and import of one scenario of a batch, in its own
+        working directory, and how long each took.
+    """
+    def __init__(self, scenario_id, directory):
+        self.scenario_id = scenario_id
+        self.directory = directory
+        self.status = 'waiting'
+        self.error = None
+        self.seconds = {'export': None, 'run': None, 'import': None}
+
+        self.model_file = None
+        self.exporter = None
+        self.model = None
+        self.gdx_file = None
+
+    def fail(self, step, error):
+        LOG.exception(error)
+        self.status = f'{step} failed'
+        self.error = str(error)
+
+    @property
+    def total_seconds(self):
+        return sum(s for s in self.seconds.values() if s is not None)
+
+
+def run_model(run):
+    """
+        Run a scenario's model, in a worker thread, and find its results.
+    """
+    start = time.time()
+    started_at = datetime.now().replace(microsecond=0)
+    run.status = 'running'
+    try:
+        run.model.run()
+        run.gdx_file = get_results_file(run.directory, started_at)
+    finally:
+        run.seconds['run'] = round(time.time() - start, 2)
+
+def run_batch(client,
+              scenario_ids,
+              gms_file,
+              template_id=None,
+              directory=None,
+              jobs=1,
+              node_node=None,
+              link_name=None,
+              start_date=None,
+              end_date=None,
+              time_step=None,
+              time_axis=None,
+              gams_date_time_index=None,
+              output_format='txt',
+              use_cache=True,
+              workers=None,
+              reuse_checkpoint=False,
+              debug=False):
+    """
+        Export, run and import many scenarios of a network. Each scenario is
+        exported to its own directory in 'directory' (by default, the
+        directory of the model), with a copy of the model, so runs don't
+        overwrite each other's files. Other files the model includes should
+        be included by their full path.
+
+        The scenarios are exported one after another, and up to 'jobs' of
+        their models are run at once, which should be no more than the GAMS
+        licence allows. The results of each run are imported, one run at a
+        time, as soon as it has finished, while the exports and the other
+        runs carry on.
+
+        Returns a ScenarioRun for each scenario, in the order they were given.
+    """
+    gms_file = os.path.realpath(gms_file)
+    if directory is None:
+        directory = os.path.dirname(gms_file)
+
+    summary = ModelSummary.from_file(gms_file)
+    if len(summary.includes) == 0:
+        raise Exception(f'Unable to identify the name of the input file included by {gms_file}.')
+    input_name = summary.includes[0]
+    if os.path.isabs(input_name):
+        raise Exception(f'{gms_file} includes its input file by its full path ({input_name}), '
+                        'so each scenario can not have its own.')
+
+    connection = BatchConnection(client, scenario_ids)
+    runs = [ScenarioRun(scenario_id, os.path.join(directory, f'scenario_{scenario_id}'))
+            for scenario_id in scenario_ids]
+    #The checkpoints compiled for the first run, which the others restart from
+    checkpoints = []
+    finished = []
+
+    def import_results(run, future):
+        try:
+            future.result()
+        except Exception as e:
+            run.fail('run', e)
+        else:
+            start = time.time()
+            try:
+                run.status = 'importing'
+                network = getattr(run.exporter, 'hydranetwork', None)
+                importer = GAMSImporter(run.scenario_id,
+                                        run.model_file,
+                                        run.gdx_file,
+                                        network=network,
+                                        connection=connection)
+                importer.import_data()
+                run.status = 'ok'
+            except Exception as e:
+                run.fail('import', e)
+            run.seconds['import'] = round(time.time() - start, 2)
+
+        finished.append(run)
+        write_progress(len(finished), len(runs))
+
+    #The imports are run in a thread of their own, one at a time, as each
+    #run finishes. The pool of runs is shut down first, once all of the
+    #imports have been queued.
+    with ThreadPoolExecutor(max_workers=1) as import_pool, \
+            ThreadPoolExecutor(max_workers=jobs) as pool:
+        for run in runs:
+            start = time.time()
+            try:
+                run.status = 'exporting'
+                os.makedirs(os.path.dirname(os.path.join(run.directory, input_name)), exist_ok=True)
+                run.model_file = os.path.join(run.directory, os.path.basename(gms_file))
+                shutil.copyfile(gms_file, run.model_file)
+
+                run.exporter = GAMSExporter(connection,
+                                            run.scenario_id,
+                                            template_id,
+                                            output=os.path.join(run.directory, input_name),
+                                            node_node=node_node,
+                                            link_name=link_name,
+                                            start_date=start_date,
+                                            end_date=end_date,
+                                            time_step=time_step,
+                                            time_axis=time_axis,
+                                            gams_date_time_index=gams_date_time_index,
+                                            output_format=output_format,
+                                            use_cache=use_cache,
+                                            workers=workers)
+                run.exporter.export()
+
+                for checkpoint in checkpoints:
+                    shutil.copy(checkpoint, run.directory)
+                run.model = GamsModel(run.directory, debug,
+                                      data_dir=run.directory,
+                                      reuse_checkpoint=reuse_checkpoint)
+                #With reuse_checkpoint, the first run's model is compiled here
+                run.model.add_job(run.model_file)
+                if reuse_checkpoint is True and len(checkpoints) == 0:
+                    checkpoints = glob.glob(os.path.join(run.directory, CHECKPOINT_PREFIX + '*.g00'))
+            except Exception as e:
+                run.fail('export', e)
+                continue
+            finally:
+                run.seconds['export'] = round(time.time() - start, 2)
+
+            run.status = 'queued'
+            future = pool.submit(run_model, run)
+            future.add_done_callback(
+                lambda future, run=run: import_pool.submit(import_results, run, future))
+
+    failed = [run for run in runs if run.status != 'ok']
+    write_output(f"{len(runs) - len(failed)} of {len(runs)} scenarios run successfully")
+
+    return runs
+
+def format_summary(runs):
+    """
+        Make a table of the status and timings of each scenario of a batch.
+    """
+    def seconds(value):
+        return '-' if value is None else '%.2f'%value
+
+    rows = [('Scenario', 'Status', 'Export (s)', 'Run (s)', 'Import (s)', 'Total (s)', 'Error')]
+    for run in runs:
+        error = '' if run.error is None else run.error.splitlines()[0][:60]
+        rows.append((str(run.scenario_id),
+                     run.status,
+                     seconds(run.seconds['export']),
+                     seconds(run.seconds['run']),
+                     seconds(run.seconds['import']),
+                     seconds(run.total_seconds),
+                     error))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = ['  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+             for row in rows]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
@@ -80,7 +80,21 @@ def start_cli():
 @click.option('-gd', '--gams_date_time_index', is_flag=True,
               help='''Set the time indexes to be timestamps which are
                       compatible with gams date format (dd.mm.yyyy)''')
-def export(obj, network_id,scenario_id, template_id, output, node_node, link_name,start_date, end_date, time_step, time_axis, export_by_type, gams_date_time_index):
+@click.option('-of', '--output-format', type=click.Choice(['txt', 'gdx']), default='txt',
+              help='''Write the data to the text input file (txt, default), or
+                      write scalars, timeseries and dataframes to a GDX file
+                      next to it which the input file loads (gdx).''')
+@click.option('--no-cache', is_flag=True,
+              help='''Export the network even if the same data has been
+                      exported with the same options before.''')
+@click.option('--incremental', is_flag=True,
+              help='''Only render the timeseries tables whose data has changed
+                      since the last export to the same output file, and copy
+                      the rest from it.''')
+@click.option('--workers', type=int, default=None,
+              help='''Render the timeseries tables and decode the dataframes
+                      in this many worker processes.''')
+def export(obj, network_id,scenario_id, template_id, output, node_node, link_name,start_date, end_date, time_step, time_axis, export_by_type, gams_date_time_index, output_format, no_cache, incremental, workers):
 
 
     client = get_logged_in_client(obj)
@@ -97,6 +111,10 @@ def export(obj, network_id,scenario_id, template_id, output, node_node, link_nam
                             time_axis,
                             export_by_type,
                             gams_date_time_index,
+                            output_format=output_format,
+                            use_cache=not no_cache,
+                            incremental=incremental,
+                            workers=workers,
                             db_url=obj['hostname'],
                             connection=client)
 
@@ -140,6 +158,25 @@ def import_results(obj, scenario_id, gms_file, gdx_file):
 @click.option('-f', '--gdx-file', help='GDX file containing GAMS results.')
 @click.option('-et', '--export_by_type', is_flag=True, help='''Use this switch to export data based on type, rather than attribute.''')
 @click.option('-gd', '--gams_date_time_index', is_flag=True, help='Set the time indexes to be timestamps which are compatible with gams date format (dd.mm.yyyy)')
+@click.option('-of', '--output-format', type=click.Choice(['txt', 'gdx']), default='txt',
+              help='''Write the data to the text input file (txt, default), or
+                      write scalars, timeseries and dataframes to a GDX file
+                      next to it which the input file loads (gdx).''')
+@click.option('--no-cache', is_flag=True,
+              help='''Export the network even if the same data has been
+                      exported with the same options before.''')
+@click.option('--incremental', is_flag=True,
+              help='''Only render the timeseries tables whose data has changed
+                      since the last export to the same output file, and copy
+                      the rest from it.''')
+@click.option('--workers', type=int, default=None,
+              help='''Render the timeseries tables and decode the dataframes
+                      in this many worker processes.''')
+@click.option('--reuse-checkpoint', is_flag=True,
+              help='''Compile the model's declarations, up to its first
+                      assignment or solve statement, once, into a checkpoint
+                      in its directory, and restart later runs of it from the
+                      checkpoint with only the new data.''')
 @click.option('--debug', is_flag=True, help='''Use this switch to send highly technical info and GAMS log to stdout.''')
 def export_run_import(obj, network_id,
                         scenario_id,
@@ -155,6 +192,11 @@ def export_run_import(obj, network_id,
                         gdx_file,
                         export_by_type,
                         gams_date_time_index,
+                        output_format,
+                        no_cache,
+                        incremental,
+                        workers,
+                        reuse_checkpoint,
                         debug):
 
 
@@ -175,9 +217,99 @@ def export_run_import(obj, network_id,
                             gdx_file,
                             export_by_type,
                             gams_date_time_index,
+                            output_format=output_format,
+                            use_cache=not no_cache,
+                            incremental=incremental,
+                            workers=workers,
+                            reuse_checkpoint=reuse_checkpoint,
                             debug=debug,
                             db_url=obj['hostname'])
 
+@hydra_app(category='model')
+@cli.command(name='run-batch')
+@click.pass_obj
+@click.option('-s', '--scenario-ids', required=True,
+              help='''IDs of the scenarios to run, all of one network, as a
+                      comma separated list which can include ranges (e.g. 1,4,10-20).''')
+@click.option('-tp', '--template-id', help='''ID of the template to be used.''', default=None)
+@click.option('-m', '--gms-file', required=True, help='''Full path to the GAMS model (*.gms) used for the simulation.''')
+@click.option('-d', '--directory', type=click.Path(file_okay=False, dir_okay=True), default=None,
+              help='''Directory in which each scenario gets its own working
+                      directory (scenario_<id>). Defaults to the directory of the model.''')
+@click.option('-j', '--jobs', type=int, default=1,
+              help='''Number of models to run at once. This should be no more
+                      than the GAMS licence allows.''')
+@click.option('-nn', '--node-node', is_flag=True, help="""(Default) Export links as 'from_name . end_name'.""")
+@click.option('-ln', '--link-name', is_flag=True, help="""Export links as link name only. If two nodes can be connected by more than one link, you should choose this option.""")
+@click.option('-st', '--start-date',help='''Start date of the time period used for simulation.''')
+@click.option('-en', '--end-date', help='''End date of the time period used for simulation.''')
+@click.option('-dt', '--time-step',help='''Time step used for simulation.''')
+@click.option('-tx', '--time-axis', multiple=True, help='''Time axis for the modelling period (a list of comma separated time stamps).''')
+@click.option('-gd', '--gams_date_time_index', is_flag=True, help='Set the time indexes to be timestamps which are compatible with gams date format (dd.mm.yyyy)')
+@click.option('-of', '--output-format', type=click.Choice(['txt', 'gdx']), default='txt',
+              help='''Write the data to the text input file (txt, default), or
+                      write scalars, timeseries and dataframes to a GDX file
+                      next to it which the input file loads (gdx).''')
+@click.option('--no-cache', is_flag=True,
+              help='''Export the network even if the same data has been
+                      exported with the same options before.''')
+@click.option('--workers', type=int, default=None,
+              help='''Render the timeseries tables and decode the dataframes
+                      of each export in this many worker processes.''')
+@click.option('--reuse-checkpoint', is_flag=True,
+              help='''Compile the model's declarations, up to its first
+                      assignment or solve statement, once, and restart the
+                      run of each scenario from it with only the scenario's
+                      data.''')
+@click.option('--debug', is_flag=True, help='''Use this switch to send highly technical info and GAMS log to stdout.''')
+def run_batch(obj, scenario_ids,
+                   template_id,
+                   gms_file,
+                   directory,
+                   jobs,
+                   node_node,
+                   link_name,
+                   start_date,
+                   end_date,
+                   time_step,
+                   time_axis,
+                   gams_date_time_index,
+                   output_format,
+                   no_cache,
+                   workers,
+                   reuse_checkpoint,
+                   debug):
+    """
+        Export, run and import many scenarios of a network, running up to
+        --jobs models at once, and print a summary of each scenario's run.
+    """
+
+    client = get_logged_in_client(obj)
+
+    runs = auto.run_batch(client,
+                          auto.parse_scenario_ids(scenario_ids),
+                          gms_file,
+                          template_id=template_id,
+                          directory=directory,
+                          jobs=jobs,
+                          node_node=node_node,
+                          link_name=link_name,
+                          start_date=start_date,
+                          end_date=end_date,
+                          time_step=time_step,
+                          time_axis=time_axis,
+                          gams_date_time_index=gams_date_time_index,
+                          output_format=output_format,
+                          use_cache=not no_cache,
+                          workers=workers,
+                          reuse_checkpoint=reuse_checkpoint,
+                          debug=debug)
+
+    click.echo(auto.format_summary(runs))
+
+    if any(run.status != 'ok' for run in runs):
+        raise SystemExit(1)
+
 @cli.command(name='inspect')
 @click.option('-f', '--filename', help='''The GDX file to inspect''')
 def inspect_gdx(filename):
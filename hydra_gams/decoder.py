@@ -0,0 +1,262 @@
+# (c) Copyright 2013-2019 University of Manchester
+"""
+    Decoding of the JSON values of Hydra datasets.
+
+    The JSON is parsed with the fastest library installed (orjson, then
+    ujson, then the standard library's json). Dataframes and timeseries,
+    which Hydra stores as {column: {index: value}}, are then built directly
+    from numpy arrays, giving the same frame as pd.read_json would.
+
+    The backend can be chosen with set_backend, or the HYDRA_GAMS_JSON
+    environment variable. The 'pandas' backend uses pd.read_json for frames,
+    as the exporter used to. pd.read_json doesn't parse floats precisely by
+    default, so the last digit of a value can differ between it and the
+    other backends.
+"""
+import io
+import os
+import json
+import logging
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+#Fastest first
+BACKENDS = ('orjson', 'ujson', 'json', 'pandas')
+
+#pd.read_json doesn't take numbers smaller than this (one year, in seconds)
+#to be timestamps
+MIN_STAMP = 31536000
+
+#The units pd.read_json tries to read timestamps in
+STAMP_UNITS = ('s', 'ms', 'us', 'ns')
+
+#How many converted indexes (keyed on their labels) are kept
+LABELS_CACHE_SIZE = 64
+
+
+def get_available_backends():
+    available = []
+    for backend in BACKENDS:
+        if backend == 'orjson' and orjson is None:
+            continue
+        if backend == 'ujson' and ujson is None:
+            continue
+        available.append(backend)
+    return available
+
+
+def _orjson_loads(text):
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        #orjson is stricter than json, for example about NaN
+        return json.loads(text)
+
+
+def _ujson_loads(text):
+    try:
+        return ujson.loads(text)
+    except ValueError:
+        return json.loads(text)
+
+
+_backend = None
+_loads = None
+
+
+def set_backend(backend=None):
+    """
+        Choose the library which parses JSON. If no backend is given, the one
+        in the HYDRA_GAMS_JSON environment variable is used, or failing that,
+        the fastest one installed.
+    """
+    global _backend, _loads
+
+    if backend is None:
+        backend = os.environ.get('HYDRA_GAMS_JSON')
+    if backend is None:
+        backend = get_available_backends()[0]
+
+    if backend not in get_available_backends():
+        raise Exception("JSON backend %s is not available. Use one of %s."%
+                        (backend, ', '.join(get_available_backends())))
+
+    if backend == 'orjson':
+        _loads = _orjson_loads
+    elif backend == 'ujson':
+        _loads = _ujson_loads
+    else:
+        _loads = json.loads
+
+    _backend = backend
+    log.debug("Decoding JSON with %s", backend)
+
+
+def get_backend():
+    return _backend
+
+
+def loads(text):
+    """
+        Parse a JSON string.
+    """
+    return _loads(text)
+
+
+def read_frame(text):
+    """
+        Read a JSON string as a dataframe, as pd.read_json does.
+    """
+    if _backend != 'pandas':
+        frame = frame_from_dict(_loads(text))
+        if frame is not None:
+            return frame
+
+    return pd.read_json(io.StringIO(text))
+
+
+def frame_from_dict(data):
+    """
+        Build a dataframe from a parsed {column: {index: value}} dictionary,
+        converting the index, columns and values the way pd.read_json does.
+
+        Returns None if the dictionary is laid out in a way which isn't
+        handled here, so that pd.read_json can be used instead.
+    """
+    if not isinstance(data, dict) or len(data) == 0:
+        return None
+
+    columns = list(data.keys())
+    column_values = list(data.values())
+    if not all(isinstance(values, dict) for values in column_values):
+        return None
+
+    labels = list(column_values[0].keys())
+    if len(labels) == 0:
+        return None
+
+    if len(column_values) == 1:
+        #pandas sorts the index of a single column, so only take an index
+        #which is already in order.
+        if any(labels[i] > labels[i + 1] for i in range(len(labels) - 1)):
+            return None
+    else:
+        #pandas keeps the order of the index of many columns if they all
+        #have the same one.
+        for values in column_values[1:]:
+            if list(values.keys()) != labels:
+                return None
+
+    index = convert_labels(tuple(labels))
+    columns = convert_labels(tuple(columns))
+    if index is None or columns is None:
+        return None
+
+    #pd.read_json reads columns with names like these as dates
+    for column in columns:
+        if isinstance(column, str):
+            column = column.lower()
+            if (column.endswith('_at') or column.endswith('_time') or
+                    column in ('modified', 'date', 'datetime') or column.startswith('timestamp')):
+                return None
+
+    arrays = []
+    for values in column_values:
+        array = convert_values(list(values.values()))
+        if array is None:
+            return None
+        arrays.append(array)
+
+    frame = pd.DataFrame(dict(enumerate(arrays)), index=index)
+    frame.columns = columns
+    return frame
+
+
+@lru_cache(maxsize=LABELS_CACHE_SIZE)
+def convert_labels(labels):
+    """
+        Convert the labels of an index from strings to dates or numbers, if
+        they all are, as pd.read_json does. Many datasets have the same
+        labels, so the converted indexes are cached.
+
+        :param a tuple of labels
+    """
+    if not all(isinstance(label, str) for label in labels):
+        return None
+
+    data = pd.Index(labels, dtype=object)
+
+    #Dates, as ISO strings or numbers of seconds (or ms, us, ns) since 1970
+    numbers = None
+    try:
+        numbers = data.astype('int64')
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    if numbers is None or (numbers > MIN_STAMP).all():
+        for unit in STAMP_UNITS:
+            try:
+                return pd.to_datetime(numbers if numbers is not None else data,
+                                      errors='raise', unit=unit)
+            except (ValueError, OverflowError, TypeError):
+                continue
+
+    #Numbers
+    try:
+        data = data.astype('float64')
+    except (TypeError, ValueError):
+        return data
+
+    try:
+        integers = data.astype('int64')
+        if (integers == data).all():
+            data = integers
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    return data
+
+
+def convert_values(values):
+    """
+        Make an array of the values of a column, with the type pd.read_json
+        would give it. Returns None if they are not all numbers (or missing).
+    """
+    array = np.array(values)
+
+    if array.dtype == object:
+        try:
+            array = array.astype('float64')
+        except (TypeError, ValueError):
+            return None
+    elif array.dtype.kind not in 'biuf':
+        return None
+
+    if array.ndim != 1:
+        return None
+
+    if array.dtype.kind == 'f' and len(array) > 0:
+        #Floats which are all whole numbers are read as integers
+        with np.errstate(invalid='ignore'):
+            integers = array.astype('int64')
+        if (integers == array).all():
+            array = integers
+
+    return array
+
+
+set_backend()
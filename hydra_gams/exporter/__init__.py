@@ -33,6 +33,16 @@ Option                 Short   Parameter  Description
 ====================== ======= ========== ======================================
 --group-nodes-by       -gn     GROUP_ATTR Group nodes by this attribute(s).
 --group_links-by       -gl     GROUP_ATTR Group links by this attribute(s).
+--output-format        -of     FORMAT     'txt' (default) writes all data to the
+                                          output file. 'gdx' writes scalars,
+                                          timeseries and single-column
+                                          dataframes to a GDX file with the
+                                          same name, which the output file
+                                          declares and loads.
+--workers                      N          Render the timeseries tables and
+                                          decode the dataframes in N worker
+                                          processes. The output is the same
+                                          as with one (the default).
 ====================== ======= ========== ======================================
 
 **Switches:**
@@ -44,6 +54,16 @@ Option                 Short  Description
                               on attributes only, default is export
                               data by attributes unless this option
                               is set.
+--no-cache                    Export the network even if the same
+                              data has been exported with the same
+                              options before. Exported files are
+                              cached in ~/.hydra/gams_export_cache,
+                              or the directory set in the
+                              HYDRA_GAMS_CACHE environment variable.
+--incremental                 Keep a manifest of the output file's
+                              sections next to it, and only render
+                              the timeseries tables whose data has
+                              changed since the last export to it.
 ====================== ====== =========================================
 
 
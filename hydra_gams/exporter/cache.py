@@ -0,0 +1,185 @@
+# (c) Copyright 2013, 2014, 2015 University of Manchester\
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.hydra', 'gams_export_cache')
+#Once the cache holds more than this, the least recently used files are removed
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+#Files which haven't been used for this many seconds are removed
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+#Change this whenever the exporter's output changes, so that files written by
+#an older version are not reused.
+CACHE_VERSION = 1
+
+
+class ExportCache(object):
+    """
+        An on-disk cache of exported GAMS input files.
+
+        Each file is stored under a key made from everything which determines
+        its contents: the network, scenario and template, the export options
+        and a stamp of the scenario's data. If an export with the same key
+        has been done before, its file is copied to the output instead of
+        exporting the network again.
+
+        Files are evicted once they are older than max_age, or, least
+        recently used first, once the cache is bigger than max_size.
+
+        Files which are written next to an export, named with one of the
+        suffixes in sidecars, are cached along with it.
+    """
+    def __init__(self,
+                 cache_dir=None,
+                 max_size=DEFAULT_MAX_SIZE,
+                 max_age=DEFAULT_MAX_AGE,
+                 sidecars=()):
+
+        if cache_dir is None:
+            cache_dir = os.environ.get('HYDRA_GAMS_CACHE', DEFAULT_CACHE_DIR)
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.max_age = max_age
+        self.sidecars = sidecars
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def make_key(self, **key_parts):
+        """
+            Make a key from keyword arguments which can be serialised to JSON.
+        """
+        key_parts['version'] = CACHE_VERSION
+        key_text = json.dumps(key_parts, sort_keys=True, default=str)
+        return hashlib.sha256(key_text.encode('utf-8')).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key + '.gms')
+
+    def fetch(self, key, filename):
+        """
+            Copy the file stored under key to filename. Returns False if
+            there is no such file.
+        """
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            return False
+
+        shutil.copyfile(path, filename)
+        #Mark the file as recently used
+        os.utime(path, None)
+
+        #A sidecar which wasn't cached is removed, as it would be stale.
+        for suffix in self.sidecars:
+            if os.path.exists(path + suffix):
+                shutil.copyfile(path + suffix, filename + suffix)
+            elif os.path.exists(filename + suffix):
+                os.remove(filename + suffix)
+
+        log.info("Export %s found in cache %s", key, self.cache_dir)
+        return True
+
+    def store(self, key, filename):
+        """
+            Store a copy of filename under key, then evict any old files.
+        """
+        path = self._get_path(key)
+        #Copy to a temporary name first, so that a half-written file is
+        #never found by another export.
+        for suffix in self.sidecars:
+            if os.path.exists(filename + suffix):
+                shutil.copyfile(filename + suffix, path + suffix + '.tmp')
+                os.replace(path + suffix + '.tmp', path + suffix)
+
+        tmp_path = path + '.tmp'
+        shutil.copyfile(filename, tmp_path)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def evict(self):
+        """
+            Remove the files older than max_age, then the least recently used
+            ones until the cache is no bigger than max_size.
+        """
+        now = time.time()
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.gms'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            if now - stat.st_mtime > self.max_age:
+                log.info("Removing %s from the export cache, as it is too old.", name)
+                self.remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            log.info("Removing %s from the export cache, as the cache is full.", os.path.basename(path))
+            self.remove(path)
+            total_size -= size
+
+    def remove(self, path):
+        os.remove(path)
+        for suffix in self.sidecars:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+class DatasetCache(object):
+    """
+        The decoded values of the datasets used in one export, keyed on the
+        kind of decoding (a timeseries, a dataframe, JSON...) and dataset id,
+        so that a dataset shared by many resources is only decoded once.
+
+        The decoded values are shared, so they must not be changed.
+    """
+    def __init__(self):
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, dataset_id, value, decode):
+        """
+            Get a dataset's value decoded with decode(value), decoding it if
+            it hasn't been already. Datasets without an id are not cached.
+        """
+        if dataset_id is None:
+            return decode(value)
+
+        key = (kind, dataset_id)
+        if key in self.values:
+            self.hits += 1
+            return self.values[key]
+
+        self.misses += 1
+        decoded = decode(value)
+        self.values[key] = decoded
+        return decoded
+
+    def contains(self, kind, dataset_id):
+        return (kind, dataset_id) in self.values
+
+    def add(self, kind, dataset_id, decoded):
+        """
+            Add a value which has been decoded elsewhere.
+        """
+        self.misses += 1
+        self.values[(kind, dataset_id)] = decoded
+
+    def log_stats(self):
+        log.info("Decoded %s datasets. %s more uses were found in the cache.",
+                 self.misses, self.hits)
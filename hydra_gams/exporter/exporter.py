@@ -1,20 +1,53 @@
 # (c) Copyright 2013, 2014, 2015 University of Manchester\
 
+import os
 import json
+import hashlib
 import logging
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, Future
 from decimal import Decimal
 from string import ascii_lowercase
-import io
+import numpy as np
 import pandas as pd
 
-from hydra_gams.util import reindex_timeseries
+from hydra_gams import decoder
+from hydra_gams.util import reindex_timeseries, reindex_timeseries_batch, read_timeseries, TimeAxis
 
 from hydra_client.output import write_progress, write_output
 
-from hydra_gams.lib import GAMSnetwork, convert_date_to_timeindex
+from hydra_gams.lib import GAMSnetwork, convert_date_to_timeindex, ExportIndex, INDEX_SUFFIX
+
+from hydra_gams.exporter.writer import SectionWriter, GDXWriter
+from hydra_gams.exporter.cache import ExportCache, DatasetCache
+from hydra_gams.exporter.manifest import SectionManifest, hash_text
+from hydra_gams.exporter.registry import OrderedSet, AttributeRegistry
 
 log = logging.getLogger(__name__)
 
+#The exporter attributes tables are rendered from. Worker processes are given
+#a copy of these, as the exporter itself holds the connection and the network.
+RENDER_STATE = ('timeline', 'name_len', 'array_len', 'links_as_name', 'use_gams_date_index')
+
+#Stand-ins for the resources and attributes of a table sent to a worker
+TableResource = namedtuple('TableResource', ['name', 'gams_name', 'from_node', 'to_node'])
+TableAttribute = namedtuple('TableAttribute', ['name', 'dataset_id', 'value'])
+
+#The exporter used to render tables in a worker process
+_worker_exporter = None
+
+def _init_worker(render_state):
+    global _worker_exporter
+    _worker_exporter = GAMSExporter.__new__(GAMSExporter)
+    _worker_exporter.__dict__.update(render_state)
+    _worker_exporter.datasets = DatasetCache()
+
+def _render_timeseries_table(attribute, ts_resources, islink, t_):
+    return _worker_exporter.render_timeseries_table(attribute, ts_resources, islink, t_)
+
+def _read_dataframe(value):
+    return decoder.read_frame(value)
+
 def export_network(client,
                    scenario_id,
                    template_id,
@@ -26,10 +59,15 @@ def export_network(client,
                    time_step,
                    time_axis,
                    export_by_type=False,
-                   gams_date_time_index=False):
+                   gams_date_time_index=False,
+                   output_format='txt',
+                   use_cache=True,
+                   incremental=False,
+                   workers=None):
 
     """
-        Export a network to a GAMS text input file.
+        Export a network to a GAMS text input file. With output_format 'gdx'
+        the numeric data is written to a GDX file alongside it instead.
     """
     message = None
     errors = []
@@ -46,7 +84,11 @@ def export_network(client,
                          time_step,
                          time_axis,
                          export_by_type=export_by_type,
-                         gams_date_time_index=gams_date_time_index)
+                         gams_date_time_index=gams_date_time_index,
+                         output_format=output_format,
+                         use_cache=use_cache,
+                         incremental=incremental,
+                         workers=workers)
         e.export()
 
     except Exception as e:
@@ -81,7 +123,12 @@ class GAMSExporter:
                  export_by_type=False,
                  gams_date_time_index=False,
                  default_dict = {},
-                 settings_text=''):
+                 settings_text='',
+                 output_format='txt',
+                 use_cache=True,
+                 cache_dir=None,
+                 incremental=False,
+                 workers=None):
 
         if template_id is not None:
             self.template_id = int(template_id)
@@ -99,8 +146,17 @@ class GAMSExporter:
         self.attr_default_datasets = {}
         self.filename = output
         self.time_index = []
+        #(label, ordinal) of each step of the time index, as written
+        self.timestamps = []
+        #The time index, converted once for all the timeseries. Set by
+        #write_time_index.
+        self.timeline = TimeAxis([], labels=[])
+        self.timeline_stamp = None
         self.time_axis =None
-        self.sets=""
+        #The sets are written to the top of the file, followed by the output
+        #(time index and data). Both are streamed to their own buffered sink
+        #and only joined when the file is written.
+        self.sets = SectionWriter()
         self.settings_text = settings_text ## put in some arbitrary settings
         ##this is a dictionary, keyed on attribute name.
         ##If a particular attribute is not contained in the input data, then it
@@ -120,8 +176,40 @@ class GAMSExporter:
 
         self.descriptors = {}
         self.dataframes_keys={}
-        self.output=''
-        self.added_pars=[]
+        self.output = SectionWriter()
+        #'txt' writes everything to the text input file. 'gdx' writes the
+        #scalars, timeseries and dataframes to a GDX file next to it instead,
+        #which the text input file then loads.
+        if output_format not in ('txt', 'gdx'):
+            raise Exception("Unknown output format %s. Use 'txt' or 'gdx'."%(output_format,))
+        self.output_format = output_format
+        self.gdx = None
+
+        #Exported files are cached, so that exporting the same data with the
+        #same options again just copies the file. GDX exports write a second
+        #file, which is referred to by its full path, so they are not cached.
+        self.cache = None
+        if use_cache is True and output_format == 'txt':
+            self.cache = ExportCache(cache_dir=cache_dir, sidecars=(INDEX_SUFFIX,))
+
+        #In incremental mode, a manifest of the sections in the output file is
+        #kept next to it, and the sections whose data hasn't changed are
+        #copied from the previous export rather than rendered again.
+        self.incremental = incremental
+        self.manifest = None
+
+        #With more than one worker, the timeseries tables are rendered and the
+        #dataframes decoded in a pool of processes, which is started when
+        #it's first needed. The results are used in the same order as
+        #they would have been rendered in, so the file is the same.
+        self.workers = workers
+        self.pool = None
+
+        #Each dataset is only decoded once, however many resources use it
+        self.datasets = DatasetCache()
+        #The unique attributes each pass writes are only collected once
+        self.attributes = AttributeRegistry()
+        self.added_pars=OrderedSet()
         self.junc_node={}
         self.link_code={}#Links are allowed to have 'codes' which are an attribute with a shorthand name to simplify indexing in the model
         self.empty_groups=[]
@@ -189,15 +277,37 @@ class GAMSExporter:
 
         self.get_network()
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.get_cache_key(stamp=self.get_data_stamp())
+            if self.cache.fetch(cache_key, self.filename):
+                #The cached index describes the cached file, not its copy
+                ExportIndex.restamp(self.filename)
+                self.write_progress(self.steps)
+                write_output("Network exported successfully (from cache)")
+                return
+
         self.write_progress()
         if(self.gams_date_time_index is True):
             self.use_gams_date_index=True
 
-        self.write_time_index()
-        if self.export_by_type is True:
-            self.export_data_using_types()
-        else:
-            self.export_data_using_attributes()
+        if self.output_format == 'gdx':
+            self.gdx = GDXWriter(os.path.splitext(self.filename)[0] + '.gdx')
+
+        try:
+            self.write_time_index()
+            #Every timeseries table depends on the time index, so a changed
+            #time index invalidates all of the sections
+            if self.incremental is True and self.output_format == 'txt':
+                self.manifest = SectionManifest(self.filename,
+                                                key=self.get_manifest_key())
+
+            if self.export_by_type is True:
+                self.export_data_using_types()
+            else:
+                self.export_data_using_attributes()
+        finally:
+            self.close_pool()
 
         self.write_progress()
         self.write_descriptors()
@@ -207,10 +317,67 @@ class GAMSExporter:
 
         self.write_progress()
         self.write_file()
+        self.write_export_index()
+        self.datasets.log_stats()
+
+        if self.cache is not None:
+            self.cache.store(cache_key, self.filename)
 
         write_output("Network exported successfully")
         log.info("Network exported successfully")
 
+    def get_pool(self):
+        """
+            Get the pool of worker processes, starting it if needed. Returns
+            None if rendering is not done in parallel.
+        """
+        if self.workers is None or self.workers <= 1:
+            return None
+
+        if self.pool is None:
+            render_state = dict((name, getattr(self, name)) for name in RENDER_STATE)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            initializer=_init_worker,
+                                            initargs=(render_state,))
+            log.info("Rendering with %s worker processes", self.workers)
+
+        return self.pool
+
+    def close_pool(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def get_cache_key(self, stamp):
+        """
+            Make the export cache key from the network, scenario and template,
+            the export options and a stamp of the scenario's data.
+        """
+        return self.cache.make_key(network_id=self.network_id,
+                                   scenario_id=self.scenario_id,
+                                   template_id=self.template_id,
+                                   links_as_name=self.links_as_name,
+                                   time_axis=self.time_axis,
+                                   export_by_type=self.export_by_type,
+                                   gams_date_time_index=self.gams_date_time_index,
+                                   default_dict=self.default_dict,
+                                   settings_text=self.settings_text,
+                                   stamp=stamp)
+
+    def get_data_stamp(self):
+        """
+            Hash what the export is made from, so that any change to the
+            network, the exported scenario's data, the template or the
+            attributes gives a new cache key. Only the first of the network's
+            scenarios is exported, so the others, which a batch fetches with
+            it, are left out.
+        """
+        structure = dict((key, value) for key, value in self.hydranetwork.items()
+                         if key != 'scenarios')
+        data = json.dumps([structure, self.hydranetwork.scenarios[0], self.template, self.attrs],
+                          sort_keys=True, default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
     def get_network(self):
 
         net = self.connection.get_network(network_id=self.network_id,
@@ -259,6 +426,7 @@ class GAMSExporter:
         log.info("Loading net into gams network.")
 
         self.network.load(net, self.attrs)
+        self.attributes = AttributeRegistry(self.network)
         if (self.time_axis == None):
             s = net.scenarios[0]
             if (s.start_time is not None and s.end_time is not None and s.time_step is not None):
@@ -296,7 +464,7 @@ class GAMSExporter:
 """
 
         settings_text =  f"*settings*\n{self.settings_text}\n\n*****************"
-        self.sets += info + settings_text
+        self.sets.write(info + settings_text)
 
     def _get_index(self, df):
         """
@@ -329,13 +497,23 @@ class GAMSExporter:
 
 
     def check_links_between_nodes(self):
-        for link in self.network.links:
-            for link_ in self.network.links:
-                if(link== link_):
-                    continue
-                if(link_.to_node==link.to_node and link_.from_node==link.from_node):
-                    self.links_as_name = True
-                    break
+        """
+            Links are exported as 'from . to' unless two or more links connect
+            the same nodes in the same direction, in which case they must be
+            exported by name. Returns the (from, to) node pairs which have more
+            than one link, so that the network can be fixed.
+        """
+        link_counts = Counter((link.from_node, link.to_node) for link in self.network.links)
+
+        parallel_links = [node_pair for node_pair, count in link_counts.items() if count > 1]
+
+        if len(parallel_links) > 0:
+            self.links_as_name = True
+            log.warning("Exporting links by name, as more than one link connects %s node pairs: %s",
+                        len(parallel_links),
+                        ", ".join("%s -> %s"%node_pair for node_pair in parallel_links))
+
+        return parallel_links
 
     def export_network(self):
         if self.links_as_name is False and len(self.junc_node)==0:
@@ -343,7 +521,7 @@ class GAMSExporter:
 
         #FIX ME: Export desriptors first as they don't rely on other entries, but others
         #may well rely on them.
-        self.sets += '* Network definition\n\n'
+        self.sets.write('* Network definition\n\n')
 
         log.info("Exporting nodes")
         self.export_nodes()
@@ -384,28 +562,28 @@ class GAMSExporter:
         self.array_len=str(node_name_len*2+15)
 
     def export_nodes(self):
-        self.sets += 'SETS\n\n'
+        self.sets.write('SETS\n\n')
         # Write all nodes ...
-        self.sets += 'i vector of all nodes /\n'
+        self.sets.write('i vector of all nodes /\n')
         for node in self.network.nodes:
-            self.sets += self.get_name(node) + '\n'
-        self.sets += '    /\n\n'
+            self.sets.write(self.get_name(node) + '\n')
+        self.sets.write('    /\n\n')
         # ... and create an alias for the index i called j:
-        self.sets += 'Alias(i,j)\n\n'
+        self.sets.write('Alias(i,j)\n\n')
         # After an 'Alias; command another 'SETS' command is needed
-        self.sets += '* Node types\n\n'
-        self.sets += 'SETS\n\n'
+        self.sets.write('* Node types\n\n')
+        self.sets.write('SETS\n\n')
         # Group nodes by type
-        self.sets += 'nodes_types   /\n'
+        self.sets.write('nodes_types   /\n')
         for object_type in self.node_types:
-            self.sets += object_type.name+'\n'
-        self.sets += '/\n\n'
+            self.sets.write(object_type.name+'\n')
+        self.sets.write('/\n\n')
 
         for object_type in self.node_types:
-            self.sets += object_type.name + '(i) /\n'
+            self.sets.write(object_type.name + '(i) /\n')
             for node in self.network.get_node(node_type_id=object_type.id):
-                self.sets += self.get_name(node) + '\n'
-            self.sets += '/\n\n'
+                self.sets.write(self.get_name(node) + '\n')
+            self.sets.write('/\n\n')
 
     def export_node_groups(self):
         "Export node groups if there are any."
@@ -432,27 +610,25 @@ class GAMSExporter:
                 group_strings.append(grp_str)
 
         if len(node_groups) > 0:
-            self.sets += '* Node groups\n\n'
-            self.sets += 'node_groups vector of all node groups /\n'
+            self.sets.write('* Node groups\n\n')
+            self.sets.write('node_groups vector of all node groups /\n')
             for group in node_groups:
-                self.sets += group.name + '\n'
-            self.sets += '/\n\n'
+                self.sets.write(group.name + '\n')
+            self.sets.write('/\n\n')
             for grp_str in group_strings:
-                self.sets += grp_str
+                self.sets.write(grp_str)
 
         return node_groups
 
     def get_junc_link(self):
-        for link in self.network.links:
-            res=link.get_attribute(attr_name="jun_node")
-            if res is None or res.value is None:
+        for link, res in self.network.get_resources_with_attribute('LINK', 'jun_node'):
+            if res.value is None:
                   continue
             self.junc_node[link.name]=res.value
 
     def get_link_codes(self):
-        for link in self.network.links:
-            res=link.get_attribute(attr_name="code")
-            if res is None or res.value is None:
+        for link, res in self.network.get_resources_with_attribute('LINK', 'code'):
+            if res.value is None:
                     continue
             self.link_code[link.name]=res.value
 
@@ -460,59 +636,59 @@ class GAMSExporter:
         return link.name[:63]
 
     def export_links(self):
-        self.sets += 'SETS\n\n'
+        self.sets.write('SETS\n\n')
         # Write all links ...
         if self.links_as_name:
-            self.sets += 'link_name /\n'
+            self.sets.write('link_name /\n')
             for link in self.network.links:
-                self.sets +=self.get_name(link)+'\n'
-            self.sets += '/\n\n'
-            self.sets += 'links (link_name) vector of all links /\n'
+                self.sets.write(self.get_name(link)+'\n')
+            self.sets.write('/\n\n')
+            self.sets.write('links (link_name) vector of all links /\n')
         else:
             if self.use_jun==True:
-                self.sets += 'links(i, jun_set, j) vector of all links /\n'
+                self.sets.write('links(i, jun_set, j) vector of all links /\n')
             else:
-                self.sets += 'links(i,j) vector of all links /\n'
+                self.sets.write('links(i,j) vector of all links /\n')
         for link in self.network.links:
             if self.links_as_name:
-                self.sets += self.get_name(link) +'\n'
+                self.sets.write(self.get_name(link) +'\n')
             else:
                 if(self.use_jun==True):
                     jun=self.junc_node[link.name]
-                    self.sets += link.from_node+' . ' +jun+' . '+link.to_node+ '\n'
+                    self.sets.write(link.from_node+' . ' +jun+' . '+link.to_node+ '\n')
                 else:
-                    self.sets += link.gams_name + '\n'
-        self.sets += '    /\n\n'
+                    self.sets.write(link.gams_name + '\n')
+        self.sets.write('    /\n\n')
         # Group links by type
-        self.sets += '* Link types\n\n'
-        self.sets += 'links_types   /\n'
+        self.sets.write('* Link types\n\n')
+        self.sets.write('links_types   /\n')
         for object_type in self.link_types:
-            self.sets += object_type.name + '\n'
-        self.sets += '/\n\n'
+            self.sets.write(object_type.name + '\n')
+        self.sets.write('/\n\n')
 
         for object_type in self.link_types:
-            self.sets += object_type.name
+            self.sets.write(object_type.name)
             if self.links_as_name:
-                self.sets +=  'link_name /\n'
+                self.sets.write('link_name /\n')
             else:
                 if self.use_jun == True:
-                    self.sets += 'links(i, jun_set, j) vector of '+object_type.name+' links /\n'
+                    self.sets.write('links(i, jun_set, j) vector of '+object_type.name+' links /\n')
                 else:
-                    self.sets += '(i,j) /\n'
+                    self.sets.write('(i,j) /\n')
             for link in self.network.get_link(link_type_id=object_type.id):
                 if self.links_as_name:
-                    self.sets += self.get_name(link) + '\n'
+                    self.sets.write(self.get_name(link) + '\n')
                 else:
                     if self.use_jun == True:
                         jun = self.junc_node[link.name]
-                        self.sets += link.from_node + ' . ' + jun + ' . ' + link.to_node + '\n'
+                        self.sets.write(link.from_node + ' . ' + jun + ' . ' + link.to_node + '\n')
                     else:
-                        self.sets += link.gams_name + '\n'
-            self.sets += '/\n\n'
+                        self.sets.write(link.gams_name + '\n')
+            self.sets.write('/\n\n')
 
     def export_link_groups(self):
         "Export link groups if there are any."
-        self.sets += '* Link groups ....\n\n'
+        self.sets.write('* Link groups ....\n\n')
         link_groups = []
         link_strings = []
         links_groups_members={}
@@ -524,7 +700,7 @@ class GAMSExporter:
                 #is it a subgroup? If so, store it as such and don't write it
                 #like a first-level group
                 if group.name in self.subgroups:
-                    manual_idx = group.get_attribute(attr_name='index')
+                    manual_idx = self.network.get_resource_attribute(group, 'index')
                     if manual_idx is not None:
                         for l in group_links:
                             #If there's a 'Code' attribute, use that instead of the name.
@@ -562,29 +738,29 @@ class GAMSExporter:
                 link_strings.append(lstring)
 
         if len(link_groups) > 0:
-            self.output += '\n* Link groups\n\n'
+            self.output.write('\n* Link groups\n\n')
             for lstring in link_strings:
-                self.sets += lstring
+                self.sets.write(lstring)
 
         return link_groups
 
     def export_groups(self):
-        self.sets += 'SETS\n\n'
+        self.sets.write('SETS\n\n')
         # Write all groups ...
-        self.sets += 'group_name /\n'
+        self.sets.write('group_name /\n')
         for group in self.network.groups:
-            self.sets +=group.name+'\n'
-        self.sets += '/\n\n'
-        self.sets += 'groups (group_name) vector of all groups /\n'
+            self.sets.write(group.name+'\n')
+        self.sets.write('/\n\n')
+        self.sets.write('groups (group_name) vector of all groups /\n')
         for group in self.network.groups:
-            self.sets += group.name +'\n'
-        self.sets += '    /\n\n'
+            self.sets.write(group.name +'\n')
+        self.sets.write('    /\n\n')
         # Group groups by type
-        self.sets += '* group types\n\n'
-        self.sets += 'group_types   /\n'
+        self.sets.write('* group types\n\n')
+        self.sets.write('group_types   /\n')
         for object_type in self.group_types:
-            self.sets += object_type.name + '\n'
-        self.sets += '/\n\n'
+            self.sets.write(object_type.name + '\n')
+        self.sets.write('/\n\n')
 
         for group in self.network.groups:
             group_subgroups=self.network.get_group(group=group.ID)
@@ -606,17 +782,17 @@ class GAMSExporter:
         for object_type in self.group_types:
             groups_of_type = self.network.get_group(group_type_id=object_type.id)
             if len(groups_of_type) > 0 and groups_of_type[0].name not in self.subgroups:
-                self.sets += object_type.name
-                self.sets +=  ' /\n'
+                self.sets.write(object_type.name)
+                self.sets.write(' /\n')
                 for group in groups_of_type:
-                    self.sets += group.name + '\n'
-                self.sets += '/\n\n'
+                    self.sets.write(group.name + '\n')
+                self.sets.write('/\n\n')
 
 
     def export_subgroup_groups(self):
         "Export subgroup groups if there are any."
 
-        self.sets += '* Subgroup groups ....\n\n'
+        self.sets.write('* Subgroup groups ....\n\n')
 
         subgroup_groups = []
         group_strings = []
@@ -634,19 +810,19 @@ class GAMSExporter:
                 group_strings.append(grp_str)
 
         if len(subgroup_groups) > 0:
-            self.sets += '* subgroup groups\n\n'
-            self.sets += 'subgroup_groups vector of all subgroup groups /\n'
+            self.sets.write('* subgroup groups\n\n')
+            self.sets.write('subgroup_groups vector of all subgroup groups /\n')
             for group in subgroup_groups:
-                self.sets += group.name + '\n'
-            self.sets += '/\n\n'
+                self.sets.write(group.name + '\n')
+            self.sets.write('/\n\n')
             for grp_str in group_strings:
-                self.sets += grp_str
+                self.sets.write(grp_str)
 
         return subgroup_groups
 
     def export_subgroups(self):
 
-        self.sets += '* Subgroups ....\n\n'
+        self.sets.write('* Subgroups ....\n\n')
 
         subgroup_sets = {}
         subgrouptype_parenttype_map = {}
@@ -693,12 +869,12 @@ class GAMSExporter:
         for subgrouptype_name, contents in subgroup_sets.items():
             parent_type = subgrouptype_parenttype_map[subgrouptype_name]
             index = subgroup_type_index[subgrouptype_name]
-            self.sets += "%s (%s,%s)\n"%(subgrouptype_name, parent_type, index)
-            self.sets += "/\n"
+            self.sets.write("%s (%s,%s)\n"%(subgrouptype_name, parent_type, index))
+            self.sets.write("/\n")
             for c in contents:
-                self.sets += "%s . %s\n"%(c[0], c[1])
+                self.sets.write("%s . %s\n"%(c[0], c[1]))
 
-            self.sets += '/\n\n'
+            self.sets.write('/\n\n')
 
     def set_empty_groups(self, node_groups, link_groups, subgroup_groups):
         """
@@ -730,13 +906,13 @@ class GAMSExporter:
     def create_connectivity_matrix(self):
         ff='{0:<'+self.name_len+'}'
 
-        self.output += '* Connectivity matrix.\n'
-        self.output += 'Table Connect(i,j)\n'
-        self.output +=ff.format('')
+        self.output.write('* Connectivity matrix.\n')
+        self.output.write('Table Connect(i,j)\n')
+        self.output.write(ff.format(''))
         node_names = [self.get_name(node) for node in self.network.nodes]
         for name in node_names:
-            self.output += ff.format( name)
-        self.output += '\n'
+            self.output.write(ff.format( name))
+        self.output.write('\n')
         conn = [[0 for node in node_names] for node in node_names]
         for link in self.network.links:
             conn[node_names.index(link.from_node)]\
@@ -752,108 +928,111 @@ class GAMSExporter:
             x = "".join(txt)
             rows.append("%s%s"%(x, '\n\n'))
 
-        self.output = self.output + "".join(rows)
+        self.output.write("".join(rows))
 
     def export_resources_coordinates(self):
         ff='{0:<'+self.name_len+'}'
         threeplaces = Decimal('0.001')
-        self.output += ('\nParameter x_coord (i)/\n')
+        self.output.write('\nParameter x_coord (i)/\n')
 
         for node in self.network.nodes:
-            self.output += (ff.format(self.get_name(node)))
+            self.output.write(ff.format(self.get_name(node)))
             x_coord = Decimal(node.X).quantize(threeplaces)
-            self.output += (ff.format(x_coord))
-            self.output += ('\n')
+            self.output.write(ff.format(x_coord))
+            self.output.write('\n')
 
-        self.output += ('/;\n\nParameter y_coord (i)/\n')
+        self.output.write('/;\n\nParameter y_coord (i)/\n')
         for node in self.network.nodes:
-            self.output += (ff.format(self.get_name(node)))
+            self.output.write(ff.format(self.get_name(node)))
             y_coord = Decimal(node.Y).quantize(threeplaces)
-            self.output += (ff.format(y_coord))
-            self.output += ('\n')
-        self.output += ('/;\n\n');
+            self.output.write(ff.format(y_coord))
+            self.output.write('\n')
+        self.output.write('/;\n\n')
 
     def export_data_using_types(self):
         log.info("Exporting data")
         # Export node data for each node type
-        data = ['* Node data\n\n']
+        self.output.write('* Node data\n\n')
         self.time_table={}
         for node_type in self.node_types:
             type_name = node_type.name
-            data.append('* Data for node type %s\n\n' % type_name)
+            self.output.write('* Data for node type %s\n\n' % type_name)
             nodes = self.network.get_node(node_type=type_name)
-            data.extend(self.export_parameters_using_type(nodes, type_name, 'scalar'))
-            data.extend(self.export_parameters_using_type(nodes, type_name, 'descriptor'))
-            data.extend(self.export_timeseries_using_type(nodes, type_name))
-            # data.extend(self.export_arrays(nodes))
-            data.extend(self.export_dataframe(nodes))
+            self.output.writelines(self.export_parameters_using_type(nodes, type_name, 'scalar'))
+            self.output.writelines(self.export_parameters_using_type(nodes, type_name, 'descriptor'))
+            self.output.writelines(self.export_timeseries_using_type(nodes, type_name))
+            # self.output.writelines(self.export_arrays(nodes))
+            self.output.writelines(self.export_dataframe(nodes))
 
         # Export link data for each node type
-        data.append('* Link data\n\n')
+        self.output.write('* Link data\n\n')
         for link_type in self.link_types:
             type_name = link_type.name
-            data.append('* Data for link type %s\n\n' % type_name)
+            self.output.write('* Data for link type %s\n\n' % type_name)
             links = self.network.get_link(link_type=type_name)
-            data.extend(self.export_parameters_using_type(links, type_name, 'scalar', res_type='LINK'))
-            data.extend(self.export_parameters_using_type(links, type_name,'descriptor', res_type='LINK'))
-            data.extend(self.export_timeseries_using_type(links, type_name, res_type='LINK'))
+            self.output.writelines(self.export_parameters_using_type(links, type_name, 'scalar', res_type='LINK'))
+            self.output.writelines(self.export_parameters_using_type(links, type_name,'descriptor', res_type='LINK'))
+            self.output.writelines(self.export_timeseries_using_type(links, type_name, res_type='LINK'))
             #self.export_arrays(links)
-            data.extend(self.export_dataframe(links))
-        self.output = "%s%s"%(self.output, ''.join(data))
+            self.output.writelines(self.export_dataframe(links))
         log.info("Data exported")
 
     def export_data_using_attributes (self):
+        """
+            Export the data, attribute by attribute. Each section is written
+            to the output as soon as it has been rendered.
+        """
         log.info("Exporting data")
         # Export node data for each node
         self.get_longest_node_link_name()
 
         self.time_table={}
-        data = ['\n* Network data\n']
+        self.output.write('\n* Network data\n')
 
-        data.extend(self.export_parameters_using_attributes([self.network],'scalar',res_type='NETWORK'))
+        self.output.writelines(self.export_parameters_using_attributes([self.network],'scalar',res_type='NETWORK'))
         self.export_descriptor_parameters_using_attributes([self.network])
-        data.extend(self.export_dataframe([self.network],res_type='NETWORK'))
+        self.output.writelines(self.export_dataframe([self.network],res_type='NETWORK'))
 
-        data.append('\n\n\n* Nodes data\n')
-        data.extend(self.export_parameters_using_attributes(self.network.nodes,'scalar'))
+        self.output.write('\n\n\n* Nodes data\n')
+        self.output.writelines(self.export_parameters_using_attributes(self.network.nodes,'scalar'))
         self.export_descriptor_parameters_using_attributes(self.network.nodes)
-        #data.extend(self.export_parameters_using_attributes (self.network.nodes,'descriptor'))
-        data.extend(self.export_timeseries_using_attributes (self.network.nodes))
-        #data.extend(self.export_arrays(self.network.nodes)) #?????
-        data.extend(self.export_dataframe(self.network.nodes))
+        #self.output.writelines(self.export_parameters_using_attributes (self.network.nodes,'descriptor'))
+        self.write_output(self.export_timeseries_using_attributes (self.network.nodes))
+        #self.output.writelines(self.export_arrays(self.network.nodes)) #?????
+        self.output.writelines(self.export_dataframe(self.network.nodes))
 
         # Export link data for each node
-        data.append('\n\n\n* Links data\n')
+        self.output.write('\n\n\n* Links data\n')
         #links = self.network.get_link(link_type=link_type)
-        data.extend(self.export_parameters_using_attributes (self.network.links,'scalar', res_type='LINK'))
+        self.output.writelines(self.export_parameters_using_attributes (self.network.links,'scalar', res_type='LINK'))
         self.export_descriptor_parameters_using_attributes(self.network.links)
-        #data.extend(self.export_parameters_using_attributes (self.network.links, 'descriptor', res_type='LINK'))
-        data.extend(self.export_timeseries_using_attributes (self.network.links, res_type='LINK'))
+        #self.output.writelines(self.export_parameters_using_attributes (self.network.links, 'descriptor', res_type='LINK'))
+        self.write_output(self.export_timeseries_using_attributes (self.network.links, res_type='LINK'))
         self.export_arrays(self.network.links) #??????
-        data.extend(self.export_dataframe(self.network.links, res_type = 'LINK'))
+        self.output.writelines(self.export_dataframe(self.network.links, res_type = 'LINK'))
 
-        data.append('\n\n\n* Default data\n')
-        data.extend(self.export_default_values())
+        self.output.write('\n\n\n* Default data\n')
+        self.output.writelines(self.export_default_values())
 
-        self.output = "%s%s"%(self.output, ''.join(data))
         log.info("Data exported")
 
+    def write_output(self, lines):
+        """
+            Write rendered lines to the output, recording where their sections
+            are if exporting incrementally.
+        """
+        if self.manifest is not None:
+            self.manifest.write_lines(self.output, lines)
+        else:
+            self.output.writelines(lines)
+
     def export_parameters_using_type(self, resources, obj_type, datatype, res_type=None):
         """
         Export scalars or descriptors.
         """
         islink = res_type == 'LINK'
-        attributes = []
-        attr_names = []
         attr_outputs = []
-        for resource in resources:
-            for attr in resource.attributes:
-                if attr.dataset_type == datatype and attr.is_var is False:
-                    translated_attr_name = translate_attr_name(attr.name)
-                    attr.name = translated_attr_name
-                    if attr.name not in attr_names:
-                        attributes.append(attr)
-                        attr_names.append(attr.name)
+        attributes = self.attributes.get_attributes(resources, datatype)
 
         if len(attributes) > 0:
             attr_outputs.append('SETS\n\n')  # Needed before sets are defined
@@ -894,7 +1073,7 @@ class GAMSExporter:
                     attr_outputs.append('{0:24}'.format(resource.name))
 
                 for attribute in attributes:
-                    attr = resource.get_attribute(attr_name=attribute.name)
+                    attr = self.network.get_resource_attribute(resource, attribute.name)
 
                     if attr is None or attr.value is None or attr.dataset_type != datatype:
                         continue
@@ -932,18 +1111,8 @@ class GAMSExporter:
         """
         islink = res_type == 'LINK'
         counter_=0
-        attributes = []
-        attr_names = []
         attr_outputs = []
-        for resource in resources:
-            for attr in resource.attributes:
-                if attr.dataset_type.lower() == datatype.lower() and attr.is_var is False:
-                    translated_attr_name = translate_attr_name(attr.name)
-                    res = resource.get_attribute(attr_name=attr.name)
-                    attr.name = translated_attr_name
-                    if attr.name not in attr_names:
-                        attributes.append(attr)
-                        attr_names.append(attr.name)
+        attributes = self.attributes.get_attributes(resources, datatype.lower())
 
         ff='{0:<'+self.name_len+'}'
         if datatype=="descriptor":
@@ -955,6 +1124,10 @@ class GAMSExporter:
                 title="Parameter"
 
         for attribute in attributes:
+            if self.gdx is not None and datatype == 'scalar':
+                self.write_scalars_to_gdx(attribute, resources, res_type=res_type)
+                continue
+
             if islink == True:
                 if self.links_as_name:
                     attr_outputs.append('\n'+title+' '+ attribute.name+'(link_name)\n')
@@ -973,7 +1146,7 @@ class GAMSExporter:
             attr_outputs.append('\n')
 
             for resource in resources:
-                attr = resource.get_attribute(attr_name=attribute.name)
+                attr = self.network.get_resource_attribute(resource, attribute.name)
 
                 if attr is None or attr.value is None or attr.dataset_type != datatype:
                     continue
@@ -1005,36 +1178,76 @@ class GAMSExporter:
         else:
             return []
 
+    def write_scalars_to_gdx(self, attribute, resources, res_type=None):
+        """
+            Write the scalar values of an attribute to the GDX file, rather
+            than as a parameter in the text input file.
+        """
+        islink = res_type == 'LINK'
+        if islink:
+            if self.links_as_name:
+                domain = ['link_name']
+            elif self.use_jun == True:
+                domain = ['i', 'jun_set', 'j']
+            else:
+                domain = ['i', 'j']
+        elif res_type == 'NETWORK':
+            domain = []
+        else:
+            domain = ['i']
+
+        records = []
+        for resource in resources:
+            attr = self.network.get_resource_attribute(resource, attribute.name)
+
+            if attr is None or attr.value is None or attr.dataset_type != 'scalar':
+                continue
+            add = resource.name + "_" + attr.name
+            if add in self.added_pars:
+                continue
+
+            if islink:
+                if self.links_as_name:
+                    key = (resource.name,)
+                elif self.use_jun == True:
+                    key = (resource.from_node, self.junc_node[resource.name], resource.to_node)
+                else:
+                    key = (resource.from_node, resource.to_node)
+            elif res_type == 'NETWORK':
+                key = ()
+            else:
+                key = (resource.name,)
+
+            try:
+                records.append((key, float(attr.value)))
+            except ValueError:
+                raise Exception("Value %s of attribute %s on resource %s is not a number"
+                                " and can't be written to GDX"%(attr.value, attr.name, resource.name))
+
+        if len(records) > 0:
+            self.gdx.add_parameter(attribute.name, domain, records)
+
     def export_descriptor_parameters_using_attributes(self, resources):
         """Export scalars or descriptors.
         """
         datatype='descriptor'
-        attributes = []
-        attr_names = []
         attr_outputs = []
-        for resource in resources:
-            for attr in resource.attributes:
-                if attr.dataset_type == datatype and attr.is_var is False:
-                    translated_attr_name = translate_attr_name(attr.name)
-                    attr.name = translated_attr_name
-                    if attr.name not in attr_names:
-                        attributes.append(attr)
-                        attr_names.append(attr.name)
+        attributes = self.attributes.get_attributes(resources, datatype)
         for attribute in attributes:
-            descriptor_list = []
+            descriptor_list = OrderedSet()
 
             # attr_outputs.append(ff.format(0))
             attr_outputs.append('\n')
 
             for resource in resources:
-                attr = resource.get_attribute(attr_name=attribute.name)
+                attr = self.network.get_resource_attribute(resource, attribute.name)
 
                 if attr is None or attr.value is None or attr.dataset_type != datatype:
                     continue
-                if attr.value not in descriptor_list:
-                    descriptor_list.append(attr.value)
+                descriptor_list.add(attr.value)
 
 
+            descriptor_list = list(descriptor_list)
             if (len(descriptor_list) > 0):
                 if len(descriptor_list) == 1:
                     self.direct_outputs.append(descriptor_list[0])
@@ -1045,18 +1258,10 @@ class GAMSExporter:
         """Export time series.
         """
         islink = res_type == 'LINK'
-        attributes = []
-        attr_names = []
         attr_outputs = []
 
         #Identify only the timeseries values we're interested in.
-        for resource in resources:
-            for attr in resource.attributes:
-                if attr.dataset_type == 'timeseries' and attr.is_var is False:
-                    attr.name = translate_attr_name(attr.name)
-                    if attr.name not in attr_names:
-                        attributes.append(attr)
-                        attr_names.append(attr.name)
+        attributes = self.attributes.get_attributes(resources, 'timeseries')
 
         if len(attributes) > 0:
             attr_outputs.append('SETS\n\n')  # Needed before sets are defined
@@ -1077,7 +1282,7 @@ class GAMSExporter:
             col_header_length = dict()
             for attribute in attributes:
                 for resource in resources:
-                    attr = resource.get_attribute(attr_name=attribute.name)
+                    attr = self.network.get_resource_attribute(resource, attribute.name)
                     if attr is not None and attr.dataset_id is not None:
                         if islink:
                             col_header = ' %14s' % (resource.gams_name + '.'
@@ -1094,12 +1299,12 @@ class GAMSExporter:
 
             attr_outputs.append('\n')
             resource_data_cache = {}
-            for timestamp in self.time_index:
-                attr_outputs.append('{0:<7}'.format(self.times_table[timestamp]))
+            for timestamp, label in zip(self.timeline, self.timeline.labels):
+                attr_outputs.append('{0:<7}'.format(label))
 
                 for attribute in attributes:
                     for resource in resources:
-                        attr = resource.get_attribute(attr_name=attribute.name)
+                        attr = self.network.get_resource_attribute(resource, attribute.name)
 
                         #Only interested in attributes with data
                         if attr is None or attr.dataset_id is None:
@@ -1110,7 +1315,7 @@ class GAMSExporter:
                         try:
                             all_data = resource_data_cache.get((resource.name, attribute.name))
                             if all_data is None:
-                                all_data = self.get_time_value(attr.value, self.time_index)
+                                all_data = self.get_time_value(self.read_timeseries(attr), self.timeline)
                                 resource_data_cache[(resource.name, attribute.name)] = all_data
                         except Exception as e:
                             log.exception(e)
@@ -1137,22 +1342,14 @@ class GAMSExporter:
         return attr_outputs
 
     def get_time_axis_from_attributes_values(self, resources):
-        attributes = []
-        attr_names = []
         t_axis = []
-        for resource in resources:
-            for attr in resource.attributes:
-                if attr.dataset_type == 'timeseries' and attr.is_var is False:
-                    attr.name = translate_attr_name(attr.name)
-                    if attr.name not in attr_names:
-                        attributes.append(attr)
-                        attr_names.append(attr.name)
+        attributes = self.attributes.get_attributes(resources, 'timeseries')
 
         for attribute in attributes:
             for resource in resources:
-                attr = resource.get_attribute(attr_name=attribute.name)
+                attr = self.network.get_resource_attribute(resource, attribute.name)
                 if attr is not None:
-                    vv = json.loads(attr.value)
+                    vv = self.datasets.get('json', attr.dataset_id, attr.value, decoder.loads)
                     for key in vv.keys():
                         for date in vv[key].keys():
                             if '9999' in date:
@@ -1169,54 +1366,28 @@ class GAMSExporter:
         """Export time series.
         """
         islink = res_type == 'LINK'
-        attributes = []
-        attr_names = []
         attr_outputs = []
         counter_ = 0
 
         # Identify all the timeseries attributes and unique attribute
         # names
-        for resource in resources:
-            for attr in resource.attributes:
-                if attr.dataset_type == 'timeseries' and attr.is_var is False:
-                    attr.name = translate_attr_name(attr.name)
-                    if attr.name not in attr_names:
-                        attributes.append(attr)
-                        attr_names.append(attr.name)
+        attributes = self.attributes.get_attributes(resources, 'timeseries')
 
         ff = '{0:<' + self.name_len + '}'
         t_ = ff.format('')
 
-        for timestamp in self.time_index:
-            t_ = t_ + ff.format(self.times_table[timestamp])
+        for label in self.timeline.labels:
+            t_ = t_ + ff.format(label)
 
+        tables = []
         for attribute in attributes:
             if(self.time_axis is None):
                 raise Exception("Missing time axis or start date, end date and time step or bad format")
-            attr_outputs.append('\n*'+attribute.name)
-
-            if islink:
-                if self.links_as_name:
-                    attr_outputs.append('\nTable '+attribute.name + ' (link_name,i,j')
-                else:
-                    attr_outputs.append('\nTable '+attribute.name + ' (i,j')
-            else:
-                attr_outputs.append('\nTable '+attribute.name + ' (i')
-
-            if self.use_gams_date_index is True:
-                attr_outputs.append(', yr, mn, dy)\n')
-            else:
-                attr_outputs.append(', t)\n')
-
-            if self.links_as_name:
-                attr_outputs.append('\n'+ff.format(''))
-                attr_outputs.append(str(t_))
-            else:
-                attr_outputs.append('\n'+str(t_))
 
             #Identify the datasets that we need data for
+            ts_resources = []
             for resource in resources:
-                attr = resource.get_attribute(attr_name=attribute.name)
+                attr = self.network.get_resource_attribute(resource, attribute.name)
 
                 #Only interested in attributes with data and that are timeseries
                 if attr is None or attr.dataset_id is None or attr.dataset_type != "timeseries":
@@ -1225,42 +1396,36 @@ class GAMSExporter:
                 if add in self.added_pars:
                     continue
                 counter_+=1
+                ts_resources.append((resource, attr))
 
-                #Pass in the JSON value and the list of timestamps,
-                #Get back a dictionary with values, keyed on the timestamps
-                try:
-                    all_data = self.get_time_value(attr.value, self.time_index)
-                except Exception as e:
-                    log.exception(e)
-                    all_data = None
-
-                if all_data is None:
-                    raise Exception("Error finding value attribute %s on"
-                                          "resource %s"%(attr.name, resource.name))
-                if islink:
-                    if self.links_as_name:
-                        attr_outputs.append('\n'+ff.format(resource.name+ '.'+resource.from_node+'.'+resource.to_node))
-                        attr_outputs.append(ff.format('\t'))
-
-                    else:
-                        attr_outputs.append('\n'+ff.format(resource.gams_name))
-                else:
-                    attr_outputs.append('\n'+ff.format(resource.name))
-
-                #Get each value in turn and add it to the line
-                for timestamp in self.time_index:
-                    tmp = all_data[timestamp]
-
-                    if isinstance(tmp, list):
-                        data="-".join(tmp)
-                        ff_='{0:<'+self.array_len+'}'
-                        data_str = ff_.format(str(data))
-                    else:
-                        data=str(tmp)
-                        data_str = ff.format(str(float(data)))
-                    attr_outputs.append(data_str)
+            if self.gdx is not None:
+                self.write_timeseries_to_gdx(attribute, ts_resources, islink)
+                continue
 
-            attr_outputs.append('\n')
+            section_name = 'timeseries:%s:%s'%(res_type or 'NODE', attribute.name)
+            data_hash = None
+            section = None
+            if self.manifest is not None:
+                #Reuse the table from the previous export if none of its
+                #data has changed
+                data_hash = self.get_timeseries_table_hash(attribute, ts_resources, t_)
+                section = self.manifest.get_section(section_name, data_hash)
+
+            if section is None:
+                table = self.submit_timeseries_table(attribute, ts_resources, islink, t_)
+            else:
+                table = [section]
+            tables.append((section_name, data_hash, table))
+
+        #Collect the tables in the order of the attributes, waiting for
+        #any which are being rendered by the pool
+        for section_name, data_hash, table in tables:
+            if isinstance(table, Future):
+                table = table.result()
+            start = len(attr_outputs)
+            attr_outputs.extend(table)
+            if self.manifest is not None:
+                self.manifest.add_section(section_name, data_hash, start, len(attr_outputs))
 
         attr_outputs.append('\n')
         if counter_> 0:
@@ -1268,6 +1433,256 @@ class GAMSExporter:
         else:
             return []
 
+    def submit_timeseries_table(self, attribute, ts_resources, islink, t_):
+        """
+            Render the table of an attribute's timeseries. If there is a pool
+            of workers, the table is sent to it to be rendered, and a future
+            of its lines is returned instead.
+        """
+        pool = self.get_pool()
+        if pool is None:
+            return self.render_timeseries_table(attribute, ts_resources, islink, t_)
+
+        #Only send the parts of the resources and attributes the table uses
+        rows = []
+        for resource, attr in ts_resources:
+            rows.append((TableResource(resource.name,
+                                       getattr(resource, 'gams_name', None),
+                                       getattr(resource, 'from_node', None),
+                                       getattr(resource, 'to_node', None)),
+                         TableAttribute(attr.name, attr.dataset_id, attr.value)))
+
+        return pool.submit(_render_timeseries_table,
+                           TableAttribute(attribute.name, None, None), rows, islink, t_)
+
+    def render_timeseries_table(self, attribute, ts_resources, islink, t_):
+        """
+            Render the table of an attribute's timeseries, one row per
+            (resource, attribute) in ts_resources. t_ is the table's header.
+        """
+        ff = '{0:<' + self.name_len + '}'
+        attr_outputs = []
+
+        attr_outputs.append('\n*'+attribute.name)
+
+        if islink:
+            if self.links_as_name:
+                attr_outputs.append('\nTable '+attribute.name + ' (link_name,i,j')
+            else:
+                attr_outputs.append('\nTable '+attribute.name + ' (i,j')
+        else:
+            attr_outputs.append('\nTable '+attribute.name + ' (i')
+
+        if self.use_gams_date_index is True:
+            attr_outputs.append(', yr, mn, dy)\n')
+        else:
+            attr_outputs.append(', t)\n')
+
+        if self.links_as_name:
+            attr_outputs.append('\n'+ff.format(''))
+            attr_outputs.append(str(t_))
+        else:
+            attr_outputs.append('\n'+str(t_))
+
+        #Get the formatted values of all the timeseries in one go
+        value_rows = self.get_timeseries_rows(ts_resources)
+
+        for (resource, attr), value_row in zip(ts_resources, value_rows):
+            if islink:
+                if self.links_as_name:
+                    attr_outputs.append('\n'+ff.format(resource.name+ '.'+resource.from_node+'.'+resource.to_node))
+                    attr_outputs.append(ff.format('\t'))
+
+                else:
+                    attr_outputs.append('\n'+ff.format(resource.gams_name))
+            else:
+                attr_outputs.append('\n'+ff.format(resource.name))
+
+            attr_outputs.append(value_row)
+
+        attr_outputs.append('\n')
+
+        return attr_outputs
+
+    def get_timeseries_table_hash(self, attribute, ts_resources, t_):
+        """
+            Hash everything a timeseries table is rendered from: the options
+            which affect its layout, its header and, for each row, the
+            resource and the dataset.
+        """
+        rows = []
+        for resource, attr in ts_resources:
+            rows.append([resource.name,
+                         getattr(resource, 'gams_name', None),
+                         getattr(resource, 'from_node', None),
+                         getattr(resource, 'to_node', None),
+                         self.get_dataset_stamp(attr)])
+
+        table = [attribute.name,
+                 self.links_as_name,
+                 self.use_gams_date_index,
+                 self.name_len,
+                 t_,
+                 self.get_timeline_stamp(),
+                 rows]
+
+        return hash_text(json.dumps(table, default=str))
+
+    def get_timeline_stamp(self):
+        """
+            Hash the time index, with the date and time of each step, as the
+            labels of the steps don't change when the dates do.
+        """
+        if self.timeline_stamp is None:
+            steps = [[str(label), str(t)] for label, t in zip(self.timeline.labels or [],
+                                                              self.timeline.datetimes)]
+            self.timeline_stamp = hash_text(json.dumps(steps))
+        return self.timeline_stamp
+
+    def get_manifest_key(self):
+        """
+            Make the key of an incremental export's manifest from what all of
+            its sections depend on: the time index and the layout options.
+        """
+        return hash_text(json.dumps([self.get_timeline_stamp(),
+                                     self.links_as_name,
+                                     self.use_gams_date_index]))
+
+    def get_dataset_stamp(self, attr):
+        """
+            Identify the data of an attribute by its dataset id and hash. If
+            the dataset has no hash, the value is hashed instead.
+        """
+        dataset_hash = None
+        resource_scenario = self.resourcescenarios_ids.get(attr.resource_attr_id)
+        if resource_scenario is not None:
+            dataset_hash = getattr(resource_scenario.dataset, 'hash', None)
+        if dataset_hash is None:
+            dataset_hash = hash_text(str(attr.value))
+        return [attr.dataset_id, dataset_hash]
+
+    def get_timeseries_values(self, ts_resources):
+        """
+            Get the values of a set of timeseries on the time index.
+
+            All the timeseries are aligned on the time index together.
+
+            :param a list of (resource, attribute) tuples
+            :returns a 2-D numpy array, with one row for each (resource, attribute)
+                     and one column for each timestamp.
+            :raises ValueError if the timeseries can't be aligned together,
+                    for example because one of them has more than one column.
+        """
+        values = reindex_timeseries_batch([self.read_timeseries(attr) for _, attr in ts_resources],
+                                          self.timeline)
+
+        #A gap in a timeseries, or a step before it starts, is written as
+        #nan, but a timeseries with no values on the time index is missing
+        missing = np.isnan(values).all(axis=1)
+        for (resource, attr), is_missing in zip(ts_resources, missing):
+            if is_missing:
+                raise Exception("Error finding value attribute %s on"
+                                      "resource %s"%(attr.name, resource.name))
+
+        return values
+
+    def get_timeseries_rows(self, ts_resources):
+        """
+            Get the values of a set of timeseries on the time index, formatted
+            as rows of a GAMS table (one string per resource).
+
+            The timeseries are aligned and formatted together as a matrix. If
+            they can't be (for example if any of them has more than one column),
+            each timeseries is instead looked up and formatted one at a time.
+
+            :param a list of (resource, attribute) tuples
+            :returns a list of strings, one for each (resource, attribute)
+        """
+        try:
+            values = self.get_timeseries_values(ts_resources)
+        except ValueError as e:
+            log.debug("Unable to align timeseries together (%s). "
+                      "Formatting them one at a time.", e)
+            return [self.get_timeseries_row(resource, attr)
+                    for resource, attr in ts_resources]
+
+        return format_values(values, int(self.name_len))
+
+    def write_timeseries_to_gdx(self, attribute, ts_resources, islink=False):
+        """
+            Write the timeseries of an attribute to the GDX file, rather than
+            as a table in the text input file.
+        """
+        if islink:
+            if self.links_as_name:
+                domain = ['link_name', 'i', 'j']
+            else:
+                domain = ['i', 'j']
+        else:
+            domain = ['i']
+
+        if self.use_gams_date_index is True:
+            domain.extend(['yr', 'mn', 'dy'])
+        else:
+            domain.append('t')
+
+        if len(ts_resources) == 0:
+            return
+
+        values = self.get_timeseries_values(ts_resources)
+
+        time_keys = [tuple(str(label).split(' . ')) for label in self.timeline.labels]
+
+        records = []
+        for (resource, attr), row in zip(ts_resources, values.tolist()):
+            if islink:
+                if self.links_as_name:
+                    resource_key = (resource.name, resource.from_node, resource.to_node)
+                else:
+                    resource_key = (resource.from_node, resource.to_node)
+            else:
+                resource_key = (resource.name,)
+
+            records.extend((resource_key + time_key, value)
+                           for time_key, value in zip(time_keys, row))
+
+        self.gdx.add_parameter(attribute.name, domain, records)
+
+    def get_timeseries_row(self, resource, attr):
+        """
+            Get the values of a single timeseries on the time index, formatted
+            as a row of a GAMS table.
+        """
+        ff = '{0:<' + self.name_len + '}'
+
+        #Pass in the JSON value and the list of timestamps,
+        #Get back a dictionary with values, keyed on the timestamps
+        try:
+            all_data = self.get_time_value(self.read_timeseries(attr), self.timeline)
+        except Exception as e:
+            log.exception(e)
+            all_data = None
+
+        if all_data is None:
+            raise Exception("Error finding value attribute %s on"
+                                  "resource %s"%(attr.name, resource.name))
+
+        #Get each value in turn and add it to the line
+        row = []
+        for timestamp in self.timeline:
+            tmp = all_data[timestamp]
+
+            if isinstance(tmp, list):
+                data="-".join(tmp)
+                ff_='{0:<'+self.array_len+'}'
+                data_str = ff_.format(str(data))
+            else:
+                data=str(tmp)
+                data_str = ff.format(str(float(data)))
+            row.append(data_str)
+
+        return ''.join(row)
+
     def export_default_values(self):
         """Export any values which have been set as default values in the template
         but which are not present in the network data.
@@ -1277,15 +1692,7 @@ class GAMSExporter:
             log.info("No default values to write")
             return attr_outputs
 
-        used_attribute_names = []
-        for resource in self.network.links:
-            for attr in resource.attributes:
-                if attr.name not in used_attribute_names:
-                    used_attribute_names.append(attr.name)
-        for resource in self.network.nodes:
-            for attr in resource.attributes:
-                if attr.attr_id not in used_attribute_names:
-                    used_attribute_names.append(attr.name)
+        used_attribute_names = self.attributes.get_names(self.network.links + self.network.nodes)
 
         values_to_write = set(self.default_dict) - set(used_attribute_names)
 
@@ -1299,8 +1706,8 @@ class GAMSExporter:
         '''
             get data for timmp
 
-            :param a JSON string
-            :param a timestamp or list of timestamps (datetimes)
+            :param a JSON string, or a dataframe from read_timeseries
+            :param a timestamp, list of timestamps (datetimes) or TimeAxis
             :returns a dictionary, keyed on the timestamps provided.
             return None if no data is found
         '''
@@ -1339,19 +1746,126 @@ class GAMSExporter:
 
 
     def compare_sets(self, key, key_):
+        """
+            Add the items of key_ which are not in key to the end of it.
+        """
+        in_key = set(key)
         for item in key_:
-            if not item in key:
+            if item not in in_key:
+                in_key.add(item)
                 key.append(item)
 
         return key
 
 
+    def write_dataframe_to_gdx(self, attribute_name, resource_scenarios, set_name, id='default', res_type=None):
+        """
+            Write the dataframe values of an attribute to the GDX file, rather
+            than as a table in the text input file. Only single-column
+            dataframes are supported, as the table is indexed by the
+            dataframe index alone. Returns False, having written nothing,
+            if any of the dataframes has more than one column.
+        """
+        islink = res_type == 'LINK'
+        if islink:
+            if self.links_as_name:
+                domain = ['link_name']
+            elif id != 'default':
+                domain = [id]
+            elif self.use_jun == True:
+                domain = ['i', 'jun_set', 'j']
+            else:
+                domain = ['i', 'j']
+        elif res_type == 'NETWORK':
+            domain = []
+        else:
+            domain = ['i']
+
+        dataframes = []
+        for resource, rs in resource_scenarios.items():
+            add = resource.name + "_" + attribute_name
+            if add in self.added_pars:
+                continue
+            df = self.read_dataframe(rs.dataset)
+            if len(df.columns) > 1:
+                return False
+            dataframes.append((resource, df))
+
+        records = []
+        for resource, df in dataframes:
+            if (set_name not in self.dataframes_keys):
+                self.dataframes_keys[set_name]=self._get_index(df)
+            else:
+                keys_=self.dataframes_keys[set_name]
+                self.dataframes_keys[set_name]=self.compare_sets(self._get_index(df), keys_)
+
+            if islink:
+                if self.links_as_name:
+                    key = (resource.name,)
+                elif id != 'default':
+                    id_value = self.network.get_resource_attribute(resource, id)
+                    if id_value.value == None:
+                        break
+                    key = (id_value.value,)
+                elif self.use_jun == True:
+                    key = (resource.from_node, self.junc_node[resource.name], resource.to_node)
+                else:
+                    key = (resource.from_node, resource.to_node)
+            elif res_type == 'NETWORK':
+                key = ()
+            else:
+                key = (resource.name,)
+
+            column = df.columns[0]
+            for index in df.index:
+                records.append((key + (index,), float(df[column][index])))
+
+        if len(records) > 0:
+            self.gdx.add_parameter(attribute_name, domain + [set_name], records)
+
+        return True
+
+    def decode_dataframes(self, ids, data_types):
+        """
+            Decode all the dataframes which are about to be exported in the
+            pool of workers, if there is one, ready for read_dataframe.
+        """
+        pool = self.get_pool()
+        if pool is None:
+            return
+
+        datasets = {}
+        for attribute_name, resource_scenarios in ids.items():
+            if data_types[attribute_name] not in ('dataframe', 'hashtable_seasonal'):
+                continue
+            for resource, rs in resource_scenarios.items():
+                if resource.name + "_" + attribute_name in self.added_pars:
+                    continue
+                if rs.dataset.id is not None and not self.datasets.contains('dataframe', rs.dataset.id):
+                    datasets[rs.dataset.id] = rs.dataset.value
+
+        dataframes = pool.map(_read_dataframe, datasets.values())
+        for dataset_id, df in zip(datasets.keys(), dataframes):
+            self.datasets.add('dataframe', dataset_id, df)
+
+    def read_dataframe(self, dataset):
+        """
+            Get a dataset's value as a dataframe, decoding it if it hasn't
+            already been decoded.
+        """
+        return self.datasets.get('dataframe', dataset.id, dataset.value, _read_dataframe)
+
+    def read_timeseries(self, attr):
+        """
+            Get an attribute's timeseries as a dataframe, ready to be
+            reindexed, decoding it if it hasn't already been decoded.
+        """
+        return self.datasets.get('timeseries', attr.dataset_id, attr.value, read_timeseries)
+
     def export_dataframe(self, resources,res_type=None):
         """Export dataframe which includes seasonal data .
                     """
         islink = res_type == 'LINK'
-        attributes = []
-        attr_names = []
         attr_outputs = []
         id='default'
         ids={}
@@ -1363,7 +1877,7 @@ class GAMSExporter:
         for resource in resources:
             for attr in resource.attributes:
                 if attr.dataset_type in ('dataframe', 'array') and attr.is_var is False:
-                    attr.name = translate_attr_name(attr.name)
+                    attr.name = self.attributes.get_gams_name(attr.name)
                     if attr.name not in ids:
                        ids[attr.name] = {}
                     ids[attr.name][resource] = self.resourcescenarios_ids[attr.resource_attr_id]
@@ -1386,22 +1900,31 @@ class GAMSExporter:
                         if attr.name+"_sub_key" not in set_names:
                             set_names[attr.name+"_sub_key"] = metadata["sub_key"].lower()
 
+        self.decode_dataframes(ids, data_types)
+
         for attribute_name in ids.keys():
-            attr_outputs.append('\n\n\n*dataframe:' + attribute_name)
-            ff = '{0:<' + self.array_len + '}'
-            t_ = ff.format('')
-            counter=0
             type_= data_types[attribute_name]
             if attribute_name in set_names:
                 set_name=set_names[attribute_name]
             else:
                 set_name=attribute_name+"_index"
+
+            if self.gdx is not None and type_ == "dataframe":
+                #Multi-column dataframes stay in the text file
+                if self.write_dataframe_to_gdx(attribute_name, ids[attribute_name], set_name,
+                                               ids_key.get(attribute_name, 'default'), res_type=res_type):
+                    continue
+
+            attr_outputs.append('\n\n\n*dataframe:' + attribute_name)
+            ff = '{0:<' + self.array_len + '}'
+            t_ = ff.format('')
+            counter=0
             if(type_ == "dataframe"):
                 for resource, rs in ids[attribute_name].items():
                     add=resource.name+"_"+attribute_name
                     if add in self.added_pars:
                         continue
-                    df = pd.read_json(io.StringIO(rs.dataset.value))
+                    df = self.read_dataframe(rs.dataset)
                     if (set_name not in self.dataframes_keys):
                         self.dataframes_keys[set_name]=self._get_index(df)
                     else:
@@ -1460,7 +1983,7 @@ class GAMSExporter:
                                     attr_outputs.append('\n' + ff.format(resource.from_node + '.' + jun+' . '+resource.to_node))
                             else:
 
-                                id_value = resource.get_attribute(attr_name=id)
+                                id_value = self.network.get_resource_attribute(resource, id)
                                 if id_value.value == None:
                                     break
                                 attr_outputs.append('\n' + ff.format(id_value.value))
@@ -1471,16 +1994,13 @@ class GAMSExporter:
                     else:
                         attr_outputs.append('\n' + ff.format(resource.name))
 
-                    for index in df.index:
-                        for column in df.columns:
-                            v = str(df[column][index])
-                            if res_type != "NETWORK":
-                                data_str = ff.format(v)
-                                attr_outputs.append(data_str)
-                            else:
-                                ##print "=========>", data, attribute_name, "----------------------->"
-                                data_str = ff.format(index)+ff.format(v)
-                                attr_outputs.append(data_str+'\n')
+                    cells = pad_cells(get_cells(df), int(self.array_len))
+                    if res_type != "NETWORK":
+                        attr_outputs.extend(''.join(row) for row in cells)
+                    else:
+                        for index, row in zip(df.index, cells):
+                            for data_str in row:
+                                attr_outputs.append(ff.format(index)+data_str+'\n')
             elif type_ =="hashtable_seasonal":
                 for resource, rs in ids[attribute_name].items():
                     add=resource.name+"_"+attribute_name
@@ -1488,7 +2008,7 @@ class GAMSExporter:
                     if add in self.added_pars:
                         continue
 
-                    df = pd.read_json(io.StringIO(rs.dataset.value))
+                    df = self.read_dataframe(rs.dataset)
 
                     keys = df.index
                     if set_name not in self.dataframes_keys:
@@ -1524,7 +2044,10 @@ class GAMSExporter:
                         elif res_type != "NETWORK":
                             attr_outputs.append('\n' + str(t_))
                     counter += 1
-                    for key in df.index:
+                    cells = pad_cells(get_cells(df), int(self.array_len))
+                    if res_type == "NETWORK":
+                        float_cells = pad_cells(get_cells(df.astype(float)), int(self.array_len))
+                    for i, key in enumerate(df.index):
                         if islink == True:
                             if self.links_as_name:
                                 attr_outputs.append(
@@ -1548,13 +2071,11 @@ class GAMSExporter:
                         if sub_set_name not in self.dataframes_keys:
                             self.dataframes_keys[sub_set_name] = df.columns
 
-                        for col in df.columns:
-                            if res_type != "NETWORK":
-                                data_str = ff.format(str((df[col][key])))
-                                attr_outputs.append(data_str)
-                            else:
-                                data_str = ff.format(keys[i]) + ff.format(str(float(df[col][key])))
-                                attr_outputs.append(data_str + '\n')
+                        if res_type != "NETWORK":
+                            attr_outputs.append(''.join(cells[i]))
+                        else:
+                            for data_str in float_cells[i]:
+                                attr_outputs.append(ff.format(keys[i]) + data_str + '\n')
 
             elif type_ == "nodes_array_collection" and res_type == "NETWORK":
                 for resource, rs in ids[attribute_name].items():
@@ -1630,9 +2151,13 @@ class GAMSExporter:
                 return True
         return False
 
+    def get_collection_names(self, pars_collections):
+        """
+            The names in a collection, as compared by is_it_in_list.
+        """
+        return set(name.lower().strip() for name in pars_collections)
+
     def get_resource_array_pars_collection(self, resources, attribute_name_, pars_collections, set_name_, islink=False):
-        attributes = []
-        attr_names = []
         attr_outputs = []
         ids = {}
         data_types = {}
@@ -1641,10 +2166,11 @@ class GAMSExporter:
         # names
         main_key=''
         sub_key=''
+        collection_names = self.get_collection_names(pars_collections)
         for resource in resources:
             for attr in resource.attributes:
-                if attr.dataset_type == 'dataframe' and attr.is_var is False and self.is_it_in_list(attr.name, pars_collections)==True:
-                    attr.name = translate_attr_name(attr.name)
+                if attr.dataset_type == 'dataframe' and attr.is_var is False and attr.name.lower().strip() in collection_names:
+                    attr.name = self.attributes.get_gams_name(attr.name)
                     if attr.name not in ids:
                        ids[attr.name] = {}
                     ids[attr.name][resource] = self.resourcescenarios_ids[attr.resource_attr_id]
@@ -1698,9 +2224,9 @@ class GAMSExporter:
                 for resource, rs in ids[attribute_name].items():
                     add = resource.name + "_" + attribute_name
                     if not add in self.added_pars:
-                        self.added_pars.append(add)
+                        self.added_pars.add(add)
 
-                    df = pd.read_json(io.StringIO(rs.dataset.value))
+                    df = self.read_dataframe(rs.dataset)
                     #setting the 'yr' and 'counter' here.
                     if (set_name not in self.dataframes_keys):
                         self.dataframes_keys[set_name] = self._get_index(df)
@@ -1708,9 +2234,9 @@ class GAMSExporter:
                         keys_ = self.dataframes_keys[set_name]
                         self.dataframes_keys[set_name] = self.compare_sets(self._get_index(df), keys_)
 
-                    for index in df.index:
-                        for column in df.columns:
-                            data_str = ff.format(str(df[column][index]))
+                    cells = pad_cells(get_cells(df), int(self.array_len))
+                    for index, row in zip(df.index, cells):
+                        for data_str in row:
                             if islink == True:
                                 if self.links_as_name:
                                     attr_outputs.append(
@@ -1744,16 +2270,16 @@ class GAMSExporter:
                 for resource, rs in ids[attribute_name].items():
                     add = resource.name + "_" + attribute_name
                     if not add in self.added_pars:
-                        self.added_pars.append(add)
+                        self.added_pars.add(add)
 
-                    df = pd.read_json(io.StringIO(rs.dataset.value))
+                    df = self.read_dataframe(rs.dataset)
 
                     if set_name not in self.dataframes_keys:
                         self.dataframes_keys[set_name] = list(df.index)
 
-                    for index in df.index:
-                        for column in df.columns:
-                            v = str(df[column][index])
+                    cells = get_cells(df).tolist()
+                    for index, row in zip(df.index, cells):
+                        for column, v in zip(df.columns, row):
                             if islink:
                                 if self.links_as_name:
                                     attr_outputs.append(
@@ -1777,8 +2303,6 @@ class GAMSExporter:
 
     def get_resourcess_scalar_pars_collection(self, resources, attribute_name_, pars_collections, set_name_,
                                              islink=False):
-        attributes = []
-        attr_names = []
         attr_outputs = []
         ids = {}
         data_types = {}
@@ -1789,11 +2313,11 @@ class GAMSExporter:
             res_type = 'node'
         # Identify all the timeseries attributes and unique attribute
         # names
+        collection_names = self.get_collection_names(pars_collections)
         for resource in resources:
             for attr in resource.attributes:
-                if attr.dataset_type == 'scalar' and attr.is_var is False and self.is_it_in_list(attr.name,
-                                                                                                pars_collections) == True:
-                    attr.name = translate_attr_name(attr.name)
+                if attr.dataset_type == 'scalar' and attr.is_var is False and attr.name.lower().strip() in collection_names:
+                    attr.name = self.attributes.get_gams_name(attr.name)
                     if attr.name not in ids:
                        ids[attr.name] = {}
                     ids[attr.name][resource] = self.resourcescenarios_ids[attr.resource_attr_id]
@@ -1818,7 +2342,7 @@ class GAMSExporter:
             for resource, rs in ids[attribute_name].items():
                 add = resource.name + "_" + attribute_name
                 if not add in self.added_pars:
-                    self.added_pars.append(add)
+                    self.added_pars.add(add)
                 value_ = str(rs.dataset.value)
                 if islink:
                     if self.links_as_name:
@@ -1919,7 +2443,7 @@ class GAMSExporter:
                         else:
                             line = tt
                     else:
-                        tt=resource.get_attribute(attr_name=set)
+                        tt=self.network.get_resource_attribute(resource, set)
                         if tt==None:
                             break
                         if line:
@@ -1938,17 +2462,9 @@ class GAMSExporter:
     def export_arrays(self, resources):
         """Export arrays.
         """
-        attributes = []
-        attr_names = []
         attr_outputs = []
         ff='{0:<'+self.name_len+'}'
-        for resource in resources:
-            for attr in resource.attributes:
-                if attr.dataset_type == 'array' and attr.is_var is False:
-                    attr.name = translate_attr_name(attr.name)
-                    if attr.name not in attr_names:
-                        attributes.append(attr)
-                        attr_names.append(attr.name)
+        attributes = self.attributes.get_attributes(resources, 'array')
         if len(attributes) > 0:
             # We have to write the complete array information for every single
             # node, because they might have different sizes.
@@ -1957,9 +2473,9 @@ class GAMSExporter:
                 # This exporter only supports 'rectangular' arrays
                 dim_=None
                 for resource in resources:
-                    attr = resource.get_attribute(attr_name=attribute.name)
+                    attr = self.network.get_resource_attribute(resource, attribute.name)
                     if attr is not None and attr.value is not None:
-                        array=json.loads(attr.value)
+                        array=self.datasets.get('json', attr.dataset_id, attr.value, decoder.loads)
                         dim = self.get_dim(array)
                         if (dim_ is None):
                             dim_=dim
@@ -1990,9 +2506,9 @@ class GAMSExporter:
                 attr_outputs.append('\n')
 
                 for resource in resources:
-                    attr = resource.get_attribute(attr_name=attribute.name)
+                    attr = self.network.get_resource_attribute(resource, attribute.name)
                     if attr is not None and attr.value is not None:
-                        array=json.loads(attr.value)
+                        array=self.datasets.get('json', attr.dataset_id, attr.value, decoder.loads)
                         #dim = self.get_dim(array)
                         '''
                         for i, n in enumerate(dim):
@@ -2102,13 +2618,16 @@ class GAMSExporter:
             for date in self.time_axis:
                 self.time_index.append(date)
                 if self.use_gams_date_index is True:
-                    t=str(date.year)+" . "+str(date.month)+" . "+str(date.day)
-                    self.times_table[date]=_t
+                    self.times_table[date]=str(date.year)+" . "+str(date.month)+" . "+str(date.day)
                 else:
                     time_index.append('%s\n' % t)
                     self.times_table[date]=t
                 t += 1
 
+            self.timeline = TimeAxis(self.time_index,
+                                     labels=[self.times_table[date] for date in self.time_index])
+            self.timeline_stamp = None
+
             time_index.append('/\n\n')
 
             time_index.append('* define time steps dependent on time index (t)\n\n')
@@ -2120,14 +2639,14 @@ class GAMSExporter:
             for t, date in enumerate(self.time_index):
                 if self.use_gams_date_index is True:
                     keyy=str(date.year)+"\",\""+str(date.month)+"\", \""+str(date.day)
-                    time_index.append('    timestamp("%s") = %s ;\n' % \
-                    (keyy, convert_date_to_timeindex(date)))
                 else:
-                    time_index.append('    timestamp("%s") = %s ;\n' % \
-                    (self.times_table[date], convert_date_to_timeindex(date)))
+                    keyy=self.times_table[date]
+                ordinal = str(convert_date_to_timeindex(date))
+                time_index.append('    timestamp("%s") = %s ;\n' % (keyy, ordinal))
+                self.timestamps.append((str(keyy), ordinal))
             time_index.append('\n\n')
 
-            self.output = self.output + ''.join(time_index)
+            self.output.writelines(time_index)
             log.info("Time index written")
         except Exception as e:
             log.exception(e)
@@ -2136,30 +2655,30 @@ class GAMSExporter:
     def write_descriptors(self):
         log.info("Writing descriptor sets %s.", self.filename)
         for key in self.descriptors:
-            self.sets +=('\nset '+key+'\n/')
+            self.sets.write('\nset '+key+'\n/')
             for val in self.descriptors[key]:
-                self.sets +=('\n' + str(val))
-            self.sets += ('\n/\n\n')
+                self.sets.write('\n' + str(val))
+            self.sets.write('\n/\n\n')
 
 
     def write_direct_outputs(self):
         log.info("Writing direct outputs")
         for formatted_text in self.direct_outputs:
-            self.sets += '\n'
-            self.sets += formatted_text
-            self.sets += '\n'
+            self.sets.write('\n')
+            self.sets.write(formatted_text)
+            self.sets.write('\n')
 
     def write_file(self):
         log.info("Writing file %s.", self.filename)
 
         for key in self.dataframes_keys:
-            self.sets += ('\n' + key + '\n/')
+            self.sets.write('\n' + key + '\n/')
             for val in self.dataframes_keys[key]:
-                self.sets += ('\n' + str(val))
-            self.sets += ('\n/\n\n')
+                self.sets.write('\n' + str(val))
+            self.sets.write('\n/\n\n')
 
 
-        self.sets += '* empty groups\n\n'
+        self.sets.write('* empty groups\n\n')
         log.info(g.name for g in self.empty_groups)
         #keep a list of the group names which have been rendered in case
         #empty groups have been added twice
@@ -2186,27 +2705,81 @@ class GAMSExporter:
             except:
                 pass
 
-            self.sets += ('\n' + empty_group.name + index + '\n/')
-            self.sets += ('\n/\n\n')
+            self.sets.write('\n' + empty_group.name + index + '\n/')
+            self.sets.write('\n/\n\n')
 
             rendered_groups.append(empty_group.name)
 
         self.write_direct_outputs()
 
-        with open(self.filename, 'w') as f:
-            f.write(self.sets + self.output)
+        #The manifest's offsets are in bytes of UTF-8 with '\n' line endings
+        with open(self.filename, 'w', encoding='utf-8', newline='\n') as f:
+            self.sets.copy_to(f)
+            self.output.copy_to(f)
+            if self.gdx is not None:
+                self.gdx.close()
+                f.write(self.gdx.get_load_statements())
 
-def translate_attr_name(name):
-    """Replace non alphanumeric characters with '_'. This function throws an
-    error, if the first letter of an attribute name is not an alphabetic
-    character.
+        if self.manifest is not None:
+            self.manifest.save(self.sets.size)
+
+        self.sets.close()
+        self.output.close()
+
+    def write_export_index(self):
+        """
+            Write the ids and time index of the export next to it, so that the
+            importer can use them without reading the exported file.
+        """
+        if self.time_axis is None:
+            time_index_type = None
+        elif self.use_gams_date_index is True:
+            time_index_type = 'date'
+        else:
+            time_index_type = 't_index'
+
+        ExportIndex(network_id=self.network.id,
+                    scenario_id=self.network.scenario_id,
+                    template_id=self.template_id,
+                    links_as_name=self.links_as_name,
+                    time_index_type=time_index_type,
+                    timestamps=self.timestamps).save(self.filename)
+
+def format_values(values, width):
+    """
+        Format a 2-D array of numbers as rows of left-aligned, fixed-width
+        GAMS table cells, returning one string per row.
     """
-    if isinstance(name, str):
-        translator = ''.join(chr(c) if chr(c).isalnum()
-                             else '_' for c in range(256))
+    return [''.join(row) for row in pad_cells(values.astype(str), width)]
+
+def pad_cells(cells, width):
+    """
+        Pad a 2-D array of strings to left-aligned, fixed-width GAMS table
+        cells, as '{0:<width}'.format does, returning a list of rows.
+    """
+    #np.char.ljust would truncate cells longer than the width, and the other
+    #np.char functions are slower than padding each string.
+    return [[cell.ljust(width) for cell in row] for row in cells.tolist()]
+
+def get_cells(df):
+    """
+        Get the value of each cell of a dataframe as a string, the way str()
+        formats it, column by column. Returns a 2-D array of strings with
+        a row for each row of the dataframe.
+    """
+    columns = []
+    for n in range(len(df.columns)):
+        values = df.iloc[:, n].values
+        if values.dtype.kind in 'biufO':
+            columns.append(values.astype(str))
+        else:
+            #numpy formats dates and the like differently to str()
+            columns.append(np.array([str(v) for v in df.iloc[:, n]]))
+
+    if len(columns) == 0:
+        return np.empty((len(df.index), 0), dtype=str)
 
-    name = name.translate(translator)
-    return name
+    return np.column_stack(columns)
 
 def get_dict(obj):
     if type(obj) is list:
@@ -0,0 +1,132 @@
+# (c) Copyright 2013, 2014, 2015 University of Manchester\
+
+import os
+import json
+import hashlib
+import logging
+
+from hydra_gams.util import hash_file
+from hydra_gams.exporter.writer import get_size
+
+log = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+
+
+def get_manifest_name(filename):
+    return filename + '.manifest.json'
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class SectionManifest(object):
+    """
+        Records where each section of an exported file is, and a hash of the
+        data it was rendered from, in a sidecar file next to it
+        (<output>.manifest.json).
+
+        On the next export to the same file, a section whose hash has not
+        changed is copied from the previous file instead of being rendered
+        again. The previous file is only used if it hasn't been changed
+        since the manifest was written, and if it was exported with the same
+        key, which identifies what all the sections depend on, such as the
+        time index.
+
+        The file must be written as UTF-8 with '\n' line endings, as the
+        offsets of the sections are in bytes.
+    """
+    def __init__(self, filename, key=None):
+        self.filename = filename
+        self.manifest_name = get_manifest_name(filename)
+        self.key = key
+
+        #The sections of the previous export, if it can be used
+        self.previous_sections = {}
+
+        #name -> {'hash', 'start', 'end'}, with offsets into the output
+        #stream, which are moved to offsets into the file when it is saved.
+        self.sections = {}
+        #Sections which have been rendered, but not yet written to the output
+        self.pending = []
+
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.manifest_name) or not os.path.exists(self.filename):
+            return
+
+        try:
+            with open(self.manifest_name) as f:
+                manifest = json.load(f)
+        except ValueError:
+            log.warning("Ignoring unreadable manifest %s", self.manifest_name)
+            return
+
+        if manifest.get('version') != MANIFEST_VERSION:
+            return
+
+        if manifest.get('key') != self.key:
+            log.info("%s was exported with a different time index or options. Exporting all sections.", self.filename)
+            return
+
+        if hash_file(self.filename) != manifest.get('file_hash'):
+            log.info("%s has changed since it was exported. Exporting all sections.", self.filename)
+            return
+
+        self.previous_sections = manifest['sections']
+
+    def get_section(self, name, data_hash):
+        """
+            Get the text of a section from the previous export, or None if it
+            isn't there or was rendered from different data.
+        """
+        section = self.previous_sections.get(name)
+        if section is None or section['hash'] != data_hash:
+            return None
+
+        log.info("Section %s is unchanged.", name)
+        with open(self.filename, 'rb') as f:
+            f.seek(section['start'])
+            return f.read(section['end'] - section['start']).decode('utf-8')
+
+    def add_section(self, name, data_hash, start, end):
+        """
+            Record a section as items start to end of the next list of lines
+            written to the output.
+        """
+        self.pending.append((name, data_hash, start, end))
+
+    def write_lines(self, output, lines):
+        """
+            Write lines to the output, recording the position of the pending
+            sections in them.
+        """
+        if len(lines) > 0 and len(self.pending) > 0:
+            offsets = [output.size]
+            for line in lines:
+                offsets.append(offsets[-1] + get_size(line))
+            for name, data_hash, start, end in self.pending:
+                self.sections[name] = {'hash': data_hash,
+                                       'start': offsets[start],
+                                       'end': offsets[end]}
+        self.pending = []
+
+        output.writelines(lines)
+
+    def save(self, output_offset):
+        """
+            Save the manifest for the file which has just been written.
+            output_offset is the byte where the output stream starts in the
+            file.
+        """
+        for section in self.sections.values():
+            section['start'] += output_offset
+            section['end'] += output_offset
+
+        with open(self.manifest_name, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION,
+                       'key': self.key,
+                       'file_hash': hash_file(self.filename),
+                       'sections': self.sections}, f, indent=1, sort_keys=True)
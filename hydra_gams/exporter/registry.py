@@ -0,0 +1,111 @@
+# (c) Copyright 2013, 2014, 2015 University of Manchester\
+
+import logging
+
+from hydra_gams.lib import translate_attr_name, classify_attributes
+
+log = logging.getLogger(__name__)
+
+
+class OrderedSet(object):
+    """
+        A set which keeps the order its items were first added in, for
+        collecting unique names or values which are written out in order.
+    """
+    def __init__(self, items=()):
+        self.items = dict.fromkeys(items)
+
+    def add(self, item):
+        self.items[item] = None
+
+    def update(self, items):
+        for item in items:
+            self.items[item] = None
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return 'OrderedSet(%s)'%list(self.items)
+
+
+class AttributeRegistry(object):
+    """
+        The attributes of the resources being exported, as classified by
+        dataset type and GAMS name when the network was loaded, so that each
+        export pass can get the unique attributes it writes without scanning
+        every attribute of every resource again.
+
+        As the exporter always has, attributes are renamed in place to their
+        GAMS names when they are first asked for, and the first attribute
+        with a name is the one returned for it.
+    """
+    def __init__(self, network=None):
+        self.network = network
+        #ids of the resources -> the classified attributes of the resources
+        self.attribute_classes = {}
+        #(ids of the resources, dataset type) -> [attribute]
+        self.unique_attributes = {}
+        #Many resources share attribute names, so only translate each once
+        self.gams_names = {}
+
+    def get_gams_name(self, name):
+        if self.network is not None:
+            return self.network.get_gams_name(name)
+
+        gams_name = self.gams_names.get(name)
+        if gams_name is None:
+            gams_name = translate_attr_name(name)
+            self.gams_names[name] = gams_name
+        return gams_name
+
+    def get_attribute_classes(self, resources):
+        resource_ids = tuple(id(resource) for resource in resources)
+        attribute_classes = self.attribute_classes.get(resource_ids)
+        if attribute_classes is None:
+            if self.network is not None:
+                attribute_classes = self.network.get_attribute_classes(resources)
+            else:
+                attribute_classes = classify_attributes(resources, self.get_gams_name)
+            self.attribute_classes[resource_ids] = attribute_classes
+        return attribute_classes
+
+    def get_attributes(self, resources, dataset_type):
+        """
+            Get the first attribute with each GAMS name among the resources
+            which has the dataset type and is not a variable, in the order
+            the resources and their attributes are in.
+
+            :param a list of resources
+            :param a dataset type, in lower case
+        """
+        key = (tuple(id(resource) for resource in resources), dataset_type)
+        attributes = self.unique_attributes.get(key)
+        if attributes is not None:
+            return attributes
+
+        names = self.get_attribute_classes(resources).get(dataset_type, {})
+        attributes = []
+        for gams_name, resource_attributes in names.items():
+            for resource, attr in resource_attributes:
+                attr.name = gams_name
+            attributes.append(resource_attributes[0][1])
+
+        self.unique_attributes[key] = attributes
+        log.debug("%s unique %s attributes", len(attributes), dataset_type)
+        return attributes
+
+    def get_names(self, resources):
+        """
+            Get the names of all the attributes of the resources, in order.
+        """
+        names = OrderedSet()
+        for resource in resources:
+            names.update(attr.name for attr in resource.attributes)
+        return names
@@ -0,0 +1,158 @@
+# (c) Copyright 2013, 2014, 2015 University of Manchester\
+
+import os
+import shutil
+import logging
+import tempfile
+
+log = logging.getLogger(__name__)
+
+#Sections smaller than this stay in memory, larger ones are spooled to disk.
+DEFAULT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+def get_size(text):
+    """
+        The number of bytes text takes in UTF-8. Checking if a string is
+        ASCII is free, so it is only encoded if it isn't.
+    """
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-8'))
+
+
+class SectionWriter(object):
+    """
+        A buffered sink for one part of the GAMS input file.
+
+        Text written here is spooled to a temporary file once it grows
+        beyond ``max_size`` rather than being accumulated in a string, so
+        the exporter only ever holds the section it is currently rendering
+        in memory. The parts are joined into the output file with
+        ``copy_to``.
+    """
+    def __init__(self, max_size=DEFAULT_SPOOL_SIZE):
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=max_size,
+                                                     mode='w+',
+                                                     encoding='utf-8')
+        #The number of bytes written so far, once encoded as UTF-8
+        self.size = 0
+
+    def write(self, text):
+        self._buffer.write(text)
+        self.size += get_size(text)
+
+    def writelines(self, lines):
+        """
+            Write a rendered section, as returned by the exporter's
+            export_* functions (a list of strings).
+        """
+        for line in lines:
+            self._buffer.write(line)
+            self.size += get_size(line)
+
+    def copy_to(self, f):
+        """
+            Copy everything written so far onto the end of the open file f.
+        """
+        self._buffer.flush()
+        self._buffer.seek(0)
+        shutil.copyfileobj(self._buffer, f)
+        self._buffer.seek(0, 2)
+
+    def getvalue(self):
+        self._buffer.seek(0)
+        value = self._buffer.read()
+        self._buffer.seek(0, 2)
+        return value
+
+    def close(self):
+        self._buffer.close()
+
+
+class GDXWriter(object):
+    """
+        Writes parameters straight to a GDX file, as an alternative to
+        rendering them as text in the GAMS input file.
+
+        Each symbol is written to the GDX file as soon as it is added. The
+        declarations and the $gdxin / $load statements the model needs to read
+        them are returned by get_load_statements, for inclusion in the
+        (much smaller) text input file.
+    """
+    def __init__(self, filename):
+        try:
+            from gams.core import gdx
+        except ImportError as e:
+            log.exception(e)
+            raise Exception("Unable to import modules from gams.")
+
+        self.gdx = gdx
+        self.filename = os.path.abspath(filename)
+        #(name, declaration) of every symbol written, in order
+        self.symbols = []
+
+        self.gdx_handle = gdx.new_gdxHandle_tp()
+        rc = gdx.gdxCreate(self.gdx_handle, gdx.GMS_SSSIZE)
+        if rc[0] == 0:
+            raise Exception('Could not find GAMS installation.')
+
+        rc = gdx.gdxOpenWrite(self.gdx_handle, self.filename, 'Hydra GAMS')
+        if rc[0] == 0:
+            raise Exception("Unable to open GDX file %s for writing."%(self.filename,))
+
+    def add_parameter(self, name, domain, records, text=''):
+        """
+            Write a parameter. Records are (key, value) tuples, where the key
+            is a tuple with one entry per domain set. A parameter without a
+            domain is written as a scalar.
+        """
+        gdx = self.gdx
+
+        if not gdx.gdxDataWriteStrStart(self.gdx_handle, name, text, len(domain), gdx.GMS_DT_PAR, 0):
+            self._raise_error(name)
+
+        values = [0.0] * gdx.GMS_VAL_MAX
+        for key, value in records:
+            values[gdx.GMS_VAL_LEVEL] = value
+            gdx.gdxDataWriteStr(self.gdx_handle, [str(k) for k in key], values)
+
+        if not gdx.gdxDataWriteDone(self.gdx_handle):
+            self._raise_error(name)
+
+        if len(domain) > 0:
+            declaration = 'Parameter %s(%s)'%(name, ','.join(domain))
+        else:
+            declaration = 'Scalar %s'%(name,)
+        if text:
+            declaration = "%s '%s'"%(declaration, text)
+
+        self.symbols.append((name, declaration + ' ;'))
+
+    def _raise_error(self, name):
+        error_number = self.gdx.gdxGetLastError(self.gdx_handle)
+        error = self.gdx.gdxErrorStr(self.gdx_handle, error_number)[1]
+        raise Exception("Unable to write %s to GDX file %s: %s"%(name, self.filename, error))
+
+    def close(self):
+        self.gdx.gdxClose(self.gdx_handle)
+        self.gdx.gdxFree(self.gdx_handle)
+
+    def get_load_statements(self):
+        """
+            Get the GAMS code which declares every symbol in the GDX file and
+            loads it.
+        """
+        if len(self.symbols) == 0:
+            return ''
+
+        statements = ['\n* Data loaded from %s\n\n'%(os.path.basename(self.filename),)]
+        for _, declaration in self.symbols:
+            statements.append(declaration + '\n')
+
+        statements.append('\n$gdxin "%s"\n'%(self.filename,))
+        for name, _ in self.symbols:
+            statements.append('$load %s\n'%(name,))
+        statements.append('$gdxin\n\n')
+
+        return ''.join(statements)
@@ -54,6 +54,12 @@ Option                 Short  Parameter  Description
 --gams-path            -G     GAMS_PATH  File path of the GAMS installation.
 
 
+The exporter writes an index of each input file next to it
+(``<input file>.index.json``), holding its time index and the network and
+scenario ids. When the model includes an input file which has an index, the
+importer reads the index instead of the input file. The index is ignored if
+the input file has been changed since it was exported.
+
 GAMSimport needs a wrapper script that sets an environment variable
 (``LD_LIBRARY_PATH``) before the gamsAPI library is loaded. This can not be
 done at run-time because environment variables can not be set from a
@@ -66,3 +72,4 @@ hydra-gams import -t 4 -s 4 -f "/path/to/Results.gdx" -m "/path/to/Demo2.gms"
 
 '''
 from .importer import GAMSImporter, import_data
+from .uploader import ResultUploader
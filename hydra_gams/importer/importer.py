@@ -1,16 +1,18 @@
 # (c) Copyright 2013-2019 University of Manchester
 import os
 import sys
-import re
 import json
-import copy
+
+import numpy as np
 
 from decimal import Decimal
 from operator import mul
 
 from hydra_gams.util import ordinal_to_timestamp, date_to_string
 
-from hydra_gams.lib import import_gms_data
+from hydra_gams.lib import iter_gms_lines, ModelSummary, ExportIndex
+
+from hydra_gams.importer.uploader import ResultUploader, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_BYTES, DEFAULT_WORKERS
 
 from hydra_client.output import write_progress
 
@@ -61,8 +63,178 @@ class GDXvariable(object):
         self.records = 0
         self.description = None
         self.datatype = None
-        self.data = []
-        self.index = []
+        #The records as read from the GDX file: an int32 matrix of UEL numbers
+        #(one row per record, one column per dimension) and a float64 matrix
+        #with one column per value field (level, marginal, lower, upper, scale).
+        #uels maps UEL numbers to their names.
+        self.keys = None
+        self.values = None
+        self.uels = None
+        self._index = None
+        self._data = None
+        #Rows of the records containing each element name, built the first
+        #time a resource's records are looked up.
+        self._rows = None
+        self._lower_rows = None
+        self._joined_rows = None
+
+    def set_records(self, keys, values, uels):
+        self.keys = keys
+        self.values = values
+        self.uels = uels
+        self._index = None
+        self._data = None
+        self._rows = None
+        self._lower_rows = None
+        self._joined_rows = None
+
+    @property
+    def index(self):
+        """
+            The index of each record as a list of names, resolved from the
+            UEL table the first time it is needed.
+        """
+        if self._index is None:
+            if self.keys is None:
+                self._index = []
+            else:
+                self._index = self.uels[self.keys].tolist()
+        return self._index
+
+    @property
+    def data(self):
+        """
+            The level of each record.
+        """
+        if self._data is None:
+            if self.values is None:
+                self._data = []
+            else:
+                #The level is the first value field
+                self._data = self.values[:, 0].tolist()
+        return self._data
+
+    def _build_row_index(self):
+        """
+            Index the rows of the records by the names of the elements in
+            them, so that the records of one resource can be found without
+            scanning the whole symbol.
+        """
+        self._rows = {}
+        if self.keys is None or self.keys.size == 0:
+            return
+
+        record_count, dim = self.keys.shape
+        rows = np.repeat(np.arange(record_count), dim)
+        #(element, row) pairs, sorted by element then row. A row is only
+        #listed once for each element, however often the element appears in it.
+        pairs = np.unique(np.stack([self.keys.ravel(), rows], axis=1), axis=0)
+        boundaries = np.flatnonzero(np.diff(pairs[:, 0])) + 1
+        for group in np.split(pairs, boundaries):
+            self._rows[self.uels[group[0, 0]]] = group[:, 1]
+
+    def get_rows(self, name):
+        """
+            Get the rows of the records whose index contains name, in record order.
+        """
+        if self._rows is None:
+            self._build_row_index()
+        return self._rows.get(name, np.empty(0, dtype=np.int64))
+
+    def _resolve(self, rows):
+        """
+            Get the index of each of the given rows as a list of names,
+            without resolving the rest of the symbol.
+        """
+        if self._index is not None:
+            return [self._index[i] for i in rows]
+        return self.uels[self.keys[rows]].tolist()
+
+    def get_records(self, name):
+        """
+            Get (row, index) for each record whose index contains name.
+        """
+        rows = self.get_rows(name)
+        return list(zip(rows, self._resolve(rows)))
+
+    def get_link_records(self, fromnode, tonode):
+        """
+            Get (row, index) for each record whose index contains both nodes
+            of a link, with the start node first.
+        """
+        rows = np.intersect1d(self.get_rows(fromnode), self.get_rows(tonode))
+        return [(i, idx) for i, idx in zip(rows, self._resolve(rows))
+                if idx.index(fromnode) < idx.index(tonode)]
+
+    def get_link_name_records(self, link_name, fromnode, tonode):
+        """
+            Get (row, index) for each record indexed by link name followed by
+            the link's nodes.
+        """
+        rows = np.intersect1d(self.get_rows(link_name),
+                              np.intersect1d(self.get_rows(fromnode), self.get_rows(tonode)))
+        return [(i, idx) for i, idx in zip(rows, self._resolve(rows))
+                if idx[0] == link_name]
+
+    def _get_joined_rows(self, offset):
+        """
+            Index the rows by the lower case name made by joining three
+            consecutive elements of their index with '_', starting at offset.
+            This is how records are indexed by the name of a link
+            ('from_jun_to', for example) rather than by its nodes.
+        """
+        if self._joined_rows is None:
+            self._joined_rows = {}
+
+        if offset not in self._joined_rows:
+            joined_rows = {}
+            if self.keys is not None and self.dim >= offset + 3:
+                names = self.uels[self.keys[:, offset:offset + 3]]
+                for i, name in enumerate(names):
+                    joined_rows.setdefault('_'.join(name).lower(), []).append(i)
+            self._joined_rows[offset] = joined_rows
+
+        return self._joined_rows[offset]
+
+    def get_resource_records(self, name, solution=None):
+        """
+            Get the index and level of the records which can belong to a
+            resource, for building its array or dataframe. These are the
+            records containing name (ignoring case) or, for a name
+            containing '_', whose elements join up to make it.
+
+            For MGA results, solution restricts them to the records of one
+            solution, which is the first element of their index.
+
+            The rows are taken straight from the symbol's arrays, so only
+            the resource's own records are copied.
+        """
+        if self._rows is None:
+            self._build_row_index()
+
+        if self._lower_rows is None:
+            self._lower_rows = {}
+            for element, rows in self._rows.items():
+                self._lower_rows.setdefault(str(element).strip().lower(), []).append(rows)
+
+        candidates = self._lower_rows.get(name.strip().lower(), [])
+        if '_' in name:
+            #MGA results have the solution in front of the link name
+            offsets = (0,) if solution is None else (1, 2)
+            for offset in offsets:
+                rows = self._get_joined_rows(offset).get(name.lower())
+                if rows is not None:
+                    candidates = candidates + [np.array(rows)]
+
+        if len(candidates) == 0:
+            return [], []
+
+        rows = np.unique(np.concatenate(candidates))
+        if solution is not None:
+            rows = np.intersect1d(rows, self.get_rows(solution))
+
+        #The level is the first value field
+        return self._resolve(rows), self.values[rows, 0].tolist()
 
     def set_info(self, info, extinfo, var_domain=None):
         self.var_domain = var_domain
@@ -106,7 +278,8 @@ def get_index(index_file_names):
 
 
 class GAMSImporter:
-    def __init__(self, scenario_id, gms_file, gdx_file, gams_path=None, connection=None, db_url=None, network=None):
+    def __init__(self, scenario_id, gms_file, gdx_file, gams_path=None, connection=None, db_url=None, network=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, chunk_bytes=DEFAULT_CHUNK_BYTES, upload_workers=DEFAULT_WORKERS):
         from gams.core import gdx
         self.gdx=gdx
         self.gdx_handle = gdx.new_gdxHandle_tp()
@@ -138,9 +311,19 @@ class GAMSImporter:
         self.scenario = None
 
         self.gms_data = []
+        self.gms_summary = None
+        #The index the exporter wrote next to the exported input file
+        self.export_index = None
 
         self.connection = connection
 
+        #The results are saved in chunks of at most chunk_size resource
+        #scenarios or chunk_bytes bytes, by upload_workers threads.
+        self.uploader = ResultUploader(connection,
+                                       chunk_size=chunk_size,
+                                       chunk_bytes=chunk_bytes,
+                                       workers=upload_workers)
+
         attrslist = self.connection.get_attributes()
         self.attrs = {attr.id:attr.name for attr in attrslist}
 
@@ -280,12 +463,18 @@ class GAMSImporter:
     def read_gdx_data(self):
         """
            Read variables and data from GDX file.
+
+           Records are read with the raw API, as UEL numbers and values, into
+           one pair of numpy arrays per symbol. The UEL names are only looked
+           up when a symbol's index is used.
         """
 
         log.info("Reading GDX Data")
 
         self.gdx.gdxOpenRead(self.gdx_handle, self.gdx_file)
 
+        uels = self.read_uels()
+
         for i in range(self.symbol_count):
             gdx_variable = GDXvariable()
 
@@ -293,14 +482,46 @@ class GAMSImporter:
             extinfo = self.gdx.gdxSymbolInfoX(self.gdx_handle, i + 1)
             var_domain = self.gdx.gdxSymbolGetDomainX(self.gdx_handle, i + 1)
             gdx_variable.set_info(info, extinfo, var_domain)
-            self.gdx.gdxDataReadStrStart(self.gdx_handle, i + 1)
 
-            for n in range(gdx_variable.records):
-                x, idx, data, y = self.gdx.gdxDataReadStr(self.gdx_handle)
-                gdx_variable.index.append(idx)
-                gdx_variable.data.append(data[0])
+            keys, values = self.read_symbol_records(i + 1, gdx_variable.dim)
+            gdx_variable.set_records(keys, values, uels)
+
             self.gdx_variables.update({gdx_variable.name: gdx_variable})
 
+    def read_uels(self):
+        """
+            Read the names of all the unique elements (UELs) in the GDX file.
+            Returns a numpy array of names indexed by UEL number (from 1).
+        """
+        rc, uel_count, high_map = self.gdx.gdxUMUelInfo(self.gdx_handle)
+
+        uels = np.empty(uel_count + 1, dtype=object)
+        uels[0] = ''
+        for n in range(1, uel_count + 1):
+            uels[n] = self.gdx.gdxUMUelGet(self.gdx_handle, n)[1]
+
+        return uels
+
+    def read_symbol_records(self, symbol_number, dim):
+        """
+            Read all the records of a symbol using the raw API.
+            Returns an int32 matrix of UEL numbers (records x dim) and a
+            float64 matrix of values (records x value fields).
+        """
+        rc, record_count = self.gdx.gdxDataReadRawStart(self.gdx_handle, symbol_number)
+
+        keys = np.empty((record_count, dim), dtype=np.int32)
+        values = np.empty((record_count, self.gdx.GMS_VAL_MAX), dtype=np.float64)
+
+        for n in range(record_count):
+            rc, key, value, dim_first = self.gdx.gdxDataReadRaw(self.gdx_handle)
+            keys[n] = key[:dim]
+            values[n] = value[:self.gdx.GMS_VAL_MAX]
+
+        self.gdx.gdxDataReadDone(self.gdx_handle)
+
+        return keys, values
+
 
     def load_gams_file(self):
         """Read in the .gms file.
@@ -310,30 +531,62 @@ class GAMSImporter:
 
         gms_file = os.path.abspath(self.gms_file)
 
-        gms_data = import_gms_data(gms_file)
-
-        self.gms_data = gms_data.split('\n')
+        #An exported input file which has an index isn't read, as it holds
+        #all of the network's data, and only its time index and ids are used.
+        self.export_index = None
+        self.gms_data = [line.rstrip('\n') for _, _, line in
+                         iter_gms_lines(gms_file, skip_include=self.read_export_index)]
+        #The model can be hundreds of thousands of lines long once the
+        #exported data is included, so it is only read through once.
+        self.gms_summary = ModelSummary(self.gms_data)
 
         if self.network_id is None or self.scenario_id is None:
             self.network_id, self.scenario_id = self.get_ids_from_gms()
 
+    def read_export_index(self, filename):
+        """
+            Read the index of an included file, if the exporter wrote one for
+            it. Returns True if it did, so the file doesn't need to be read.
+            The first index read is the one whose ids and time index are used.
+        """
+        export_index = ExportIndex.load(filename)
+        if export_index is None:
+            return False
+
+        #An index of another network or scenario than the one being imported
+        #to, or than the other indexed files, is not used, so that the file
+        #is read as it would be without one.
+        for name in ('network_id', 'scenario_id'):
+            given = getattr(self, name)
+            if given is None and self.export_index is not None:
+                given = getattr(self.export_index, name)
+            indexed = getattr(export_index, name)
+            if given is not None and indexed is not None and int(given) != int(indexed):
+                log.warning("%s was exported for %s %s, not %s. Not using its index.",
+                            filename, name, indexed, given)
+                return False
+
+        if self.export_index is None:
+            self.export_index = export_index
+
+        log.info("Using the index of exported file %s", filename)
+        return True
+
     def get_ids_from_gms(self):
         """Read the network and scenario ids from the GMS file. This function
         should be called when the user doesn't supply a network and/or a
         scenario id.
         """
-        # Get the very first line containing 'Network-ID' and 'Scenario-ID'
-        networkline = next((x for x in self.gms_data if 'Network-ID' in x),
-                           None)
-        scenarioline = next((x for x in self.gms_data if 'Scenario-ID' in x),
-                            None)
-        if networkline is not None:
-            network_id = int(networkline.split(':')[1])
+        # From the export's index, or the very first line containing
+        # 'Network-ID' and 'Scenario-ID'
+        ids = self.export_index if self.export_index is not None else self.gms_summary
+        if ids.network_id is not None:
+            network_id = int(ids.network_id)
         else:
             network_id = None
 
-        if scenarioline is not None:
-            scenario_id = int(scenarioline.split(':')[1])
+        if ids.scenario_id is not None:
+            scenario_id = int(ids.scenario_id)
         else:
             scenario_id = None
 
@@ -344,38 +597,17 @@ class GAMSImporter:
         Read the time index of the GAMS model used. This only works for
         models where data is exported from Hydra using GAMSexport.
         """
-        time_index_type=None
-        for i, line in enumerate(self.gms_data):
-            #if line[0:24] == 'Parameter timestamp(t) ;':
-             #  break
-            if line.strip().startswith('Parameter timestamp(yr, mn, dy)'):
-                time_index_type='date'
-                break
-            elif line.strip().startswith('Parameter timestamp(t)'):
-                time_index_type='t_index'
-                break
-        if time_index_type == "t_index":
-            i += 2
-            line = self.gms_data[i]
-            while line.split('(', 1)[0].strip() == 'timestamp':
-                idx = int(line.split('"')[1])
-                timestamp = ordinal_to_timestamp(Decimal(line.split()[2]))
-                timestamp = date_to_string(timestamp)
-                self.time_axis.update({idx: timestamp})
-                i += 1
-                line = self.gms_data[i]
-        elif time_index_type == "date":
-           i += 2
-           line = self.gms_data[i]
-           while line.strip().startswith("timestamp"):
-               line_parts=line.split("=")
-               timestamp=ordinal_to_timestamp(Decimal(line_parts[1].replace(";","")))
-               #idx=[timestamp.year, timestamp.month, timestamp.day]
-               idx=str(timestamp.year)+"."+str(timestamp.month)+"."+str(timestamp.day)
-               timestamp=date_to_string(timestamp)
-               self.time_axis.update({idx: timestamp})
-               i += 1
-               line = self.gms_data[i]
+        time_index = self.export_index if self.export_index is not None else self.gms_summary
+        time_index_type = time_index.time_index_type
+        for label, ordinal in time_index.timestamps:
+            timestamp = ordinal_to_timestamp(Decimal(ordinal))
+            if time_index_type == "t_index":
+                idx = int(label)
+            else:
+                #idx=[timestamp.year, timestamp.month, timestamp.day]
+                idx=str(timestamp.year)+"."+str(timestamp.month)+"."+str(timestamp.day)
+            timestamp = date_to_string(timestamp)
+            self.time_axis.update({idx: timestamp})
 
     def parse_variables(self, variable):
         """For all variables stored in the gdx file, check if these are time
@@ -384,38 +616,13 @@ class GAMSImporter:
 
         log.info("Parsing variables %s", variable)
 
-        for i, line in enumerate(self.gms_data):
-            if line.strip().lower() == variable:
-                break
-
-        i += 1
-        if(i>=len(self.gms_data)):
-            return
-
-        line = self.gms_data[i]
-
-        while line.strip() != ';':
-
-            if len(line.strip()) == 0:
-                break
-            var = line.split()[0]
-            splitvar = var.split('(', 1)
-            if len(splitvar) <= 1:
-                params = []
-            else:
-                params = splitvar[1][0:-1].split(',')
-            varname = splitvar[0]
-            if(re.search(r'\[(.*?)\]', line)!=None):
-                self.gams_units.update({varname:
-                                re.search(r'\[(.*?)\]', line).group(1)})
+        for declaration in self.gms_summary.get_declarations(variable):
+            if declaration.units is not None:
+                self.gams_units.update({declaration.name: declaration.units})
             else:
                 error_message="Units are missing, units need to be added in square brackets where the variables are specified in the .gms file, ex: v1(i, t) my variable [m^3]"
-            if 't' in params:
-                self.gdx_ts_vars.update({varname: params.index('t')})
-            elif('yr' in params and 'mn' in params and 'dy' in params):
-                self.gdx_ts_vars.update({varname: params.index('dy')})
-            i += 1
-            line = self.gms_data[i]
+            if declaration.time_position is not None:
+                self.gdx_ts_vars.update({declaration.name: declaration.time_position})
 
     def assign_attr_data(self):
         """Assign data to all variable attributes in the network.
@@ -531,32 +738,31 @@ class GAMSImporter:
                                 dataset['type'] = 'timeseries'
                                 index = []
                                 data = []
-                                for i, idx in enumerate(gdxvar.index):
-                                    if node.name in idx:
-                                        if len(idx) == 4:
-                                            index.append('.'.join(map(str, idx[1:])))
-                                        elif len(idx) == 2:
-                                            index.append(idx[self.gdx_ts_vars[gdxvar.name]])
-                                        data.append(gdxvar.data[i])
+                                for i, idx in gdxvar.get_records(node.name):
+                                    if len(idx) == 4:
+                                        index.append('.'.join(map(str, idx[1:])))
+                                    elif len(idx) == 2:
+                                        index.append(idx[self.gdx_ts_vars[gdxvar.name]])
+                                    data.append(gdxvar.data[i])
                                 #dataset['value'] = self.create_timeseries(index, data)
                                 MGA_values[j]=self.create_timeseries(index, data)
                             elif gdxvar.dim == 2:
-                                for i, idx in enumerate(gdxvar.index):
-                                    if node.name in idx:
-                                        data = gdxvar.data[i]
-                                        try:
-                                            data_ = float(data)
-                                            dataset['type'] = 'scalar'
-                                            MGA_values[j] = data
-                                        except ValueError:
-                                            dataset['type'] = 'descriptor'
-                                            MGA_values[j] = data
-                                        break
+                                for i, idx in gdxvar.get_records(node.name):
+                                    data = gdxvar.data[i]
+                                    try:
+                                        data_ = float(data)
+                                        dataset['type'] = 'scalar'
+                                        MGA_values[j] = data
+                                    except ValueError:
+                                        dataset['type'] = 'descriptor'
+                                        MGA_values[j] = data
+                                    break
 
                             elif gdxvar.dim > 2:
                                 index = []
                                 data = []
-                                MGA_values.update(self.create_dataframe_from_mga_results(j, self.MGA_index[j], gdxvar.index, gdxvar.data, node.name))
+                                index, data = gdxvar.get_resource_records(node.name, solution=self.MGA_index[j])
+                                MGA_values.update(self.create_dataframe_from_mga_results(j, self.MGA_index[j], index, data, node.name))
                                 dataset['type'] = 'dataframe'
 
                     if len(MGA_values) > 0 and self.check_for_empty_values(MGA_values)==True:
@@ -595,52 +801,48 @@ class GAMSImporter:
                                 dataset['type'] = 'timeseries'
                                 index = []
                                 data = []
-                                for i, idx in enumerate(gdxvar.index):
-                                    if fromnode in idx and tonode in idx and \
-                                                    idx.index(fromnode) < idx.index(tonode):
-                                        if len(idx) == 5:
-                                            index.append('.'.join(map(str, idx[2:])))
-                                        elif len(idx) == 3:
-                                            index.append(idx[self.gdx_ts_vars[gdxvar.name]])
-                                        data.append(gdxvar.data[i])
+                                for i, idx in gdxvar.get_link_records(fromnode, tonode):
+                                    if len(idx) == 5:
+                                        index.append('.'.join(map(str, idx[2:])))
+                                    elif len(idx) == 3:
+                                        index.append(idx[self.gdx_ts_vars[gdxvar.name]])
+                                    data.append(gdxvar.data[i])
                                 MGA_values[j]=self.create_timeseries(index, data)
                                 #dataset['value'] = self.create_timeseries(index, data)
                             elif gdxvar.dim == 2:
-                                for i, idx in enumerate(gdxvar.index):
-                                    if fromnode in idx and tonode in idx and \
-                                                    idx.index(fromnode) < idx.index(tonode):
+                                for i, idx in gdxvar.get_link_records(fromnode, tonode):
+                                    data = gdxvar.data[i]
+                                    try:
+                                        data_ = float(data)
+                                        dataset['type'] = 'scalar'
+                                        MGA_values[j] = data
+                                    except ValueError:
+                                        dataset['type'] = 'descriptor'
+                                        MGA_values[j] = (data)
+                                    break
+                            elif gdxvar.dim > 2:
+                                is_in = False
+                                if gdxvar.dim == 3:
+                                    for i, idx in gdxvar.get_link_name_records(link.name, fromnode, tonode):
                                         data = gdxvar.data[i]
                                         try:
                                             data_ = float(data)
                                             dataset['type'] = 'scalar'
-                                            MGA_values[j] = data
+                                            MGA_values[j] = (data)
                                         except ValueError:
                                             dataset['type'] = 'descriptor'
                                             MGA_values[j] = (data)
+                                        is_in = True
                                         break
-                            elif gdxvar.dim > 2:
-                                is_in = False
-                                if gdxvar.dim == 3:
-                                    for i, idx in enumerate(gdxvar.index):
-                                        if idx[0] == link.name and fromnode in idx and tonode in idx:
-                                            data = gdxvar.data[i]
-                                            try:
-                                                data_ = float(data)
-                                                dataset['type'] = 'scalar'
-                                                MGA_values[j] = (data)
-                                            except ValueError:
-                                                dataset['type'] = 'descriptor'
-                                                MGA_values[j] = (data)
-                                            is_in = True
-                                            break
                                 if is_in is False:
 
-                                    df = self.create_dataframe_from_mga_results(j, self.MGA_index[j], gdxvar.index, gdxvar.data, link.name)
+                                    index, data = gdxvar.get_resource_records(link.name, solution=self.MGA_index[j])
+                                    df = self.create_dataframe_from_mga_results(j, self.MGA_index[j], index, data, link.name)
                                     # continue
                                     MGA_values.update(df)
 
                                     if attr.name.lower() == 'al' and df:
-                                        self.create_dataframe_from_mga_results(j, self.MGA_index[j], gdxvar.index, gdxvar.data, link.name)
+                                        self.create_dataframe_from_mga_results(j, self.MGA_index[j], index, data, link.name)
 
                                     dataset['type'] = 'dataframe'
 
@@ -727,40 +929,29 @@ class GAMSImporter:
                             dataset['type'] = 'timeseries'
                             index = []
                             data = []
-                            for i, idx in enumerate(gdxvar.index):
-                                if node.name in idx:
-                                    if len(idx) == 4:
-                                        index.append('.'.join(map(str, idx[1:])))
-                                    elif len(idx) == 2:
-                                        index.append(idx[self.gdx_ts_vars[gdxvar.name]])
-                                    data.append(gdxvar.data[i])
+                            for i, idx in gdxvar.get_records(node.name):
+                                if len(idx) == 4:
+                                    index.append('.'.join(map(str, idx[1:])))
+                                elif len(idx) == 2:
+                                    index.append(idx[self.gdx_ts_vars[gdxvar.name]])
+                                data.append(gdxvar.data[i])
                             dataset['value'] = self.create_timeseries(index, data)
                         elif gdxvar.dim == 1:
-                            for i, idx in enumerate(gdxvar.index):
-                                if node.name in idx:
-                                    data = gdxvar.data[i]
-                                    try:
-                                        data_ = float(data)
-                                        dataset['type'] = 'scalar'
-                                        dataset['value'] = data
-                                    except ValueError:
-                                        dataset['type'] = 'descriptor'
-                                        dataset['value'] = data
-                                    break
+                            for i, idx in gdxvar.get_records(node.name):
+                                data = gdxvar.data[i]
+                                try:
+                                    data_ = float(data)
+                                    dataset['type'] = 'scalar'
+                                    dataset['value'] = data
+                                except ValueError:
+                                    dataset['type'] = 'descriptor'
+                                    dataset['value'] = data
+                                break
 
                         elif gdxvar.dim > 1:
                             dataset['type'] = 'array'
-                            index = []
-                            data = []
-                            inx = copy.deepcopy(gdxvar.index)
-                            dat = copy.deepcopy(gdxvar.data)
-                            for i, idx in enumerate(inx):
-                                if node.name in idx:
-                                    idx.pop(idx.index(node.name))
-                                    index.append(idx)
-                                    data.append(dat[i])
-
-                            dataset['value'] = self.create_array(gdxvar.index, gdxvar.data, node.name)
+                            index, data = gdxvar.get_resource_records(node.name)
+                            dataset['value'] = self.create_array(index, data, node.name)
                             dataset['type'] = 'dataframe'
 
                             if dataset['value'] == {}:
@@ -799,19 +990,28 @@ class GAMSImporter:
                             dataset['type'] = 'timeseries'
                             index = []
                             data = []
-                            for i, idx in enumerate(gdxvar.index):
-                                if fromnode in idx and tonode in idx and \
-                                                idx.index(fromnode) < idx.index(tonode):
-                                    if len(idx) == 5:
-                                        index.append('.'.join(map(str, idx[2:])))
-                                    elif len(idx) == 3:
-                                        index.append(idx[self.gdx_ts_vars[gdxvar.name]])
-                                    data.append(gdxvar.data[i])
+                            for i, idx in gdxvar.get_link_records(fromnode, tonode):
+                                if len(idx) == 5:
+                                    index.append('.'.join(map(str, idx[2:])))
+                                elif len(idx) == 3:
+                                    index.append(idx[self.gdx_ts_vars[gdxvar.name]])
+                                data.append(gdxvar.data[i])
                             dataset['value'] = self.create_timeseries(index, data)
                         elif gdxvar.dim == 2:
-                            for i, idx in enumerate(gdxvar.index):
-                                if fromnode in idx and tonode in idx and \
-                                                idx.index(fromnode) < idx.index(tonode):
+                            for i, idx in gdxvar.get_link_records(fromnode, tonode):
+                                data = gdxvar.data[i]
+                                try:
+                                    data_ = float(data)
+                                    dataset['type'] = 'scalar'
+                                    dataset['value'] = data
+                                except ValueError:
+                                    dataset['type'] = 'descriptor'
+                                    dataset['value'] = data
+                                break
+                        elif gdxvar.dim > 2:
+                            is_in = False
+                            if gdxvar.dim == 3:
+                                for i, idx in gdxvar.get_link_name_records(link.name, fromnode, tonode):
                                     data = gdxvar.data[i]
                                     try:
                                         data_ = float(data)
@@ -820,22 +1020,8 @@ class GAMSImporter:
                                     except ValueError:
                                         dataset['type'] = 'descriptor'
                                         dataset['value'] = data
+                                    is_in = True
                                     break
-                        elif gdxvar.dim > 2:
-                            is_in = False
-                            if gdxvar.dim == 3:
-                                for i, idx in enumerate(gdxvar.index):
-                                    if idx[0] == link.name and fromnode in idx and tonode in idx:
-                                        data = gdxvar.data[i]
-                                        try:
-                                            data_ = float(data)
-                                            dataset['type'] = 'scalar'
-                                            dataset['value'] = data
-                                        except ValueError:
-                                            dataset['type'] = 'descriptor'
-                                            dataset['value'] = data
-                                        is_in = True
-                                        break
                             if is_in is False:
                                 # continue
                                 dataset['type'] = 'array'
@@ -850,8 +1036,8 @@ class GAMSImporter:
                                         index.append(idx)
                                         data.append(gdxvar.data[i])
                                 '''
-                                dataset['value'] = self.create_array(gdxvar.index,
-                                                                     gdxvar.data, link.name)
+                                index, data = gdxvar.get_resource_records(link.name)
+                                dataset['value'] = self.create_array(index, data, link.name)
 
                                 # Should be removed later
                                 dataset['type'] = 'dataframe'
@@ -984,9 +1170,7 @@ class GAMSImporter:
         #first delete the old results
         # self.connection.delete_scenario_results(self.scenario_id)
         #Make this empty to avoid potential updates, and to save on work in Hydra
-        self.connection.bulk_update_resourcedata(
-            scenario_ids=[int(self.scenario_id)],
-            resource_scenarios=self.res_scenarios)
+        self.uploader.upload(self.scenario_id, self.res_scenarios)
 
 
 def date_to_string(date, seasonal=False):
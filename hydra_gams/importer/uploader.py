@@ -0,0 +1,118 @@
+# (c) Copyright 2013-2019 University of Manchester
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from hydra_client.output import write_progress
+
+log = logging.getLogger(__name__)
+
+#A chunk is sent once it holds this many resource scenarios...
+DEFAULT_CHUNK_SIZE = 500
+#...or once adding another would take it over this many bytes of JSON.
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+#Seconds to wait before the first retry. This doubles on each retry.
+DEFAULT_BACKOFF = 2.0
+
+#Errors which are worth retrying. Connection errors and timeouts from the
+#requests library are subclasses of IOError, so are covered by OSError.
+#Errors returned by the server (HydraClientError) are not retried.
+TRANSIENT_ERRORS = (OSError,)
+
+
+class ResultUploader(object):
+    """
+        Saves resource scenarios to a scenario in size-bounded chunks, rather
+        than in one bulk_update_resourcedata request.
+
+        The chunks are sent by a small pool of threads. A chunk which fails
+        with a transient error is retried, waiting longer each time. Progress
+        is reported with write_progress as the chunks complete.
+
+        The connection only needs a bulk_update_resourcedata method, so a
+        local stub can be used in place of a Hydra connection.
+    """
+    def __init__(self,
+                 connection,
+                 chunk_size=DEFAULT_CHUNK_SIZE,
+                 chunk_bytes=DEFAULT_CHUNK_BYTES,
+                 workers=DEFAULT_WORKERS,
+                 retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF):
+
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.chunk_bytes = chunk_bytes
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+
+    def make_chunks(self, resource_scenarios):
+        """
+            Split the resource scenarios into chunks of at most chunk_size
+            entries and chunk_bytes bytes of JSON. A resource scenario
+            which is bigger than chunk_bytes on its own is sent on its own.
+        """
+        chunks = []
+        chunk = []
+        chunk_bytes = 0
+        for resource_scenario in resource_scenarios:
+            size = len(json.dumps(resource_scenario))
+            if len(chunk) > 0 and (len(chunk) >= self.chunk_size or
+                                   chunk_bytes + size > self.chunk_bytes):
+                chunks.append(chunk)
+                chunk = []
+                chunk_bytes = 0
+            chunk.append(resource_scenario)
+            chunk_bytes += size
+
+        if len(chunk) > 0:
+            chunks.append(chunk)
+
+        return chunks
+
+    def upload(self, scenario_id, resource_scenarios):
+        """
+            Save all the resource scenarios to a scenario. If a chunk can't
+            be saved, the chunks which haven't been sent yet are cancelled
+            and the error is raised.
+        """
+        chunks = self.make_chunks(resource_scenarios)
+
+        log.info("Saving %s resource scenarios in %s chunks",
+                 len(resource_scenarios), len(chunks))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.upload_chunk, scenario_id, chunk) for chunk in chunks]
+
+            try:
+                for n, future in enumerate(as_completed(futures)):
+                    future.result()
+                    write_progress(n + 1, len(chunks))
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def upload_chunk(self, scenario_id, chunk):
+        """
+            Save one chunk, retrying it if it fails with a transient error.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return self.connection.bulk_update_resourcedata(
+                    scenario_ids=[int(scenario_id)],
+                    resource_scenarios=chunk)
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.retries:
+                    log.critical("Unable to save %s resource scenarios after %s attempts.",
+                                 len(chunk), attempt + 1)
+                    raise
+
+                delay = self.backoff * 2 ** attempt
+                log.warning("Error saving %s resource scenarios (%s). Retrying in %s seconds.",
+                            len(chunk), e, delay)
+                time.sleep(delay)
@@ -1,9 +1,12 @@
 # (c) Copyright 2013, 2014, 2015 University of Manchester\
 
 import os
+import re
 import sys
 import shutil
+import hashlib
 import logging
+from collections import OrderedDict
 
 from hydra_client.resources import HydraResource, HydraNetwork
 
@@ -18,13 +21,39 @@ if (sys.version_info > (3, 0)):
      python_version_prefix='_36'
 
 
+#The workspaces of GamsModels which reuse their checkpoints, by working
+#directory, GAMS system directory and debug level, so that repeated runs in
+#the same process share one
+_workspaces = {}
+
+#The prefix of the names of the checkpoints (save files) of compiled models
+CHECKPOINT_PREFIX = '_hydra_model_'
+
 class GamsModel(object):
-    def __init__(self, working_directory, turn_debug_on, data_dir='/tmp'):
+    """
+        Runs a GAMS model in a GAMS workspace.
+
+        If reuse_checkpoint is True, the model can be run many times with
+        different data, for example for each scenario of a network. The
+        model's declarations, up to the first statement which runs something
+        (an assignment, a loop, a solve...), are compiled once into a
+        checkpoint (a GAMS save file) in the working directory. Each run then
+        restarts from the checkpoint, reads the data include again and runs
+        the rest of the model, so no statement is run with the data the
+        checkpoint was compiled with. Checkpoints are kept between processes,
+        and a model is compiled again when its text, or a file it includes
+        other than its data, changes.
+    """
+    def __init__(self, working_directory, turn_debug_on, data_dir='/tmp', reuse_checkpoint=False):
         gamspath=get_gams_path()
         self.working_directory = working_directory
         self.data_dir = data_dir
+        self.reuse_checkpoint = reuse_checkpoint
         log.info("Using GAMS Path: %s", gamspath)
         self.lst_name = '_gams_py_gjo0.lst'
+        self.cp = None
+        #The checkpoints compiled by this model, by model file
+        self.checkpoints = {}
         try:
             import gams
             real_path = os.path.realpath(os.path.abspath(gamspath))
@@ -36,7 +65,15 @@ class GamsModel(object):
                 debug_level = 3
             else:
                 debug_level = 1
-            self.ws = gams.GamsWorkspace(working_directory=working_directory, system_directory=gamspath, debug = debug_level)
+
+            if reuse_checkpoint is True:
+                key = (os.path.realpath(working_directory), real_path, debug_level)
+                self.ws = _workspaces.get(key)
+                if self.ws is None:
+                    self.ws = gams.GamsWorkspace(working_directory=working_directory, system_directory=gamspath, debug = debug_level)
+                    _workspaces[key] = self.ws
+            else:
+                self.ws = gams.GamsWorkspace(working_directory=working_directory, system_directory=gamspath, debug = debug_level)
 
         except Exception as e:
             log.exception(e)
@@ -47,17 +84,108 @@ class GamsModel(object):
        read the model from the file and add model stratus scalar to the model
         and job to the Gams workspace
        """
-       self.cp = self.ws.add_checkpoint()
        with open (model_file, "r") as myfile:
             model=myfile.read()
        self.model_name=self.get_model_name(model)
+       status = ''
        if self.model_name is not None:
            self.model_name=self.model_name.replace(";", "")
-           model=model+"\nscalar ms; \nms="+self.model_name.strip()+".Modelstat; "
-           model = model + "\nscalar Sos; \nSos=" + self.model_name.strip() + ".Solvestat; "
-           #model = model + "\nscalar TSos; \nTSos=" + self.model_name.strip() + ".Tsolstat; "
+           status = "\nscalar ms; \nms="+self.model_name.strip()+".Modelstat; "
+           status = status + "\nscalar Sos; \nSos=" + self.model_name.strip() + ".Solvestat; "
+           #status = status + "\nscalar TSos; \nTSos=" + self.model_name.strip() + ".Tsolstat; "
+
+       if self.reuse_checkpoint is True:
+           self.add_restart_job(model_file, model, status)
+       else:
+           self.cp = self.ws.add_checkpoint()
+           self.job = self.ws.add_job_from_string(model + status)
+
+    def split_model(self, model):
+        """
+            Split a model into the part which is compiled into its checkpoint,
+            up to the first statement which runs something, and the rest.
+            Returns (compiled part, data include line, rest), where the data
+            include is the first file the model includes, and is None if that
+            isn't in the compiled part.
+        """
+        lines = model.split("\n")
+        split = get_first_execution(lines)
+        return "\n".join(lines[:split]), get_first_include(lines[:split]), "\n".join(lines[split:])
+
+    def get_include_stamp(self, model_file, compiled, data_include):
+        """
+            Get the path, modification time and size of each file the compiled
+            part of a model includes, other than its data, and of the files
+            they include.
+        """
+        basepath = os.path.dirname(model_file)
+        stamp = []
+        for line in compiled.split("\n"):
+            sline = line.strip()
+            if not sline.startswith('$') or sline == data_include:
+                continue
+            include, _ = get_include(sline, basepath)
+            if include is None or not os.path.isfile(include):
+                continue
+            included = []
+            for filename, _, _ in iter_gms_lines(include):
+                if filename not in included:
+                    included.append(filename)
+            for filename in included:
+                file_stat = os.stat(filename)
+                stamp.append([os.path.realpath(filename), file_stat.st_mtime, file_stat.st_size])
+        return stamp
+
+    def get_checkpoint(self, model_file, compiled, data_include=None):
+        """
+            Get the checkpoint of the compiled part of a model, compiling it if
+            it hasn't been compiled in this working directory.
+        """
+        stamp = self.get_include_stamp(model_file, compiled, data_include)
+        checkpoint_key = compiled + "\n" + repr(stamp)
+        checkpoint_name = CHECKPOINT_PREFIX + hashlib.sha1(checkpoint_key.encode('utf-8')).hexdigest()[:16]
+
+        key = (os.path.realpath(model_file), checkpoint_name)
+        cp = self.checkpoints.get(key)
+        if cp is not None:
+            return cp
+
+        checkpoint_file = os.path.join(self.ws.working_directory, checkpoint_name + '.g00')
+        cp = self.ws.add_checkpoint(checkpoint_name)
+        if os.path.exists(checkpoint_file):
+            log.info("Restarting %s from %s", model_file, checkpoint_file)
+        else:
+            log.info("Compiling %s into %s", model_file, checkpoint_file)
+            try:
+                self.ws.add_job_from_string(compiled).run(checkpoint=cp)
+            except Exception:
+                #Don't restart from a partly written checkpoint
+                if os.path.exists(checkpoint_file):
+                    os.remove(checkpoint_file)
+                raise
 
-       self.job = self.ws.add_job_from_string(model)
+        self.checkpoints[key] = cp
+        return cp
+
+    def add_restart_job(self, model_file, model, status):
+        """
+            Add a job which restarts from the model's checkpoint, with the
+            model's data read again
+        """
+        compiled, data_include, rest = self.split_model(model)
+        if data_include is None and get_first_include(rest.split("\n")) is None:
+            raise Exception(f"Unable to find the data included by {model_file}, "
+                            "so its checkpoint can not be reused.")
+
+        base_cp = self.get_checkpoint(model_file, compiled, data_include)
+
+        if data_include is None:
+            #The data is included after the checkpoint, by the rest
+            restart = rest + status
+        else:
+            #Replace the data the checkpoint was compiled with
+            restart = "$onMultiR\n" + data_include + "\n$offMulti\n" + rest + status
+        self.job = self.ws.add_job_from_string(restart, base_cp)
 
     def get_model_name(self, model):
         '''
@@ -153,7 +281,8 @@ class GamsModel(object):
         run the GAMS model
         and raise an error if something going wrong
         '''
-        lst_location = os.path.join(self.working_directory, self.lst_name)
+        #The jobs of a reused workspace are numbered on from its earlier ones
+        lst_location = os.path.join(self.working_directory, self.job.name + '.lst')
         try:
             import gams
             self.job.run(checkpoint=self.cp)#, gams_options=options.ESol#print)
@@ -188,6 +317,110 @@ class GamsModel(object):
 
 
 class GAMSnetwork(HydraNetwork):
+    def load(self, json_net, json_attrs):
+        #HydraNetwork keeps these lists on the class, and load adds to them,
+        #so each network needs its own, or it has the resources of every
+        #network loaded before it
+        self.nodes = []
+        self.links = []
+        self.groups = []
+        self.node_groups = []
+        self.link_groups = []
+        super(GAMSnetwork, self).load(json_net, json_attrs)
+        self.index_attributes()
+        self.classify_attributes()
+
+    def index_attributes(self):
+        """
+        Index the attributes of the network and its resources by name, so that
+        they can be looked up without scanning each resource's attribute list.
+
+        Each resource gets an attribute_index dict, keyed on the lower case
+        attribute name. The exporter renames attributes in place to their GAMS
+        names, so the lower case GAMS name is indexed too. As with
+        get_attribute, the first attribute with a name wins.
+
+        The network keeps an index of (resource, attribute) pairs, keyed on
+        the resource type ('NETWORK', 'NODE', 'LINK' or 'GROUP') and the lower
+        case attribute name, in the order the resources were loaded.
+        """
+        self.attribute_resources = {}
+        self.gams_names = {}
+        resources = [('NETWORK', self)] + \
+                    [('NODE', node) for node in self.nodes] + \
+                    [('LINK', link) for link in self.links] + \
+                    [('GROUP', group) for group in self.groups]
+
+        for res_type, resource in resources:
+            attribute_index = {}
+            for attr in resource.attributes:
+                name = attr.name.lower()
+                if name not in attribute_index:
+                    attribute_index[name] = attr
+                    self.attribute_resources.setdefault((res_type, name), []).append((resource, attr))
+            for attr in resource.attributes:
+                attribute_index.setdefault(self.get_gams_name(attr.name).lower(), attr)
+            resource.attribute_index = attribute_index
+
+    def get_gams_name(self, name):
+        """
+        Translate an attribute name to its GAMS name. Many resources share
+        attribute names, so each is only translated once.
+        """
+        gams_name = self.gams_names.get(name)
+        if gams_name is None:
+            gams_name = translate_attr_name(name)
+            self.gams_names[name] = gams_name
+        return gams_name
+
+    def classify_attributes(self):
+        """
+        Sort the attributes of the network and its resources into the groups
+        the exporter writes, in a single pass, so that each of its passes
+        doesn't have to filter every attribute of every resource again.
+
+        attribute_classes is keyed on the resource type ('NETWORK', 'NODE'
+        or 'LINK'). See classify_attributes.
+        """
+        self.attribute_classes = {
+            'NETWORK': classify_attributes([self], self.get_gams_name),
+            'NODE': classify_attributes(self.nodes, self.get_gams_name),
+            'LINK': classify_attributes(self.links, self.get_gams_name),
+        }
+
+    def get_attribute_classes(self, resources):
+        """
+        Get the classified attributes of a list of resources, which are
+        only kept for the network itself, its nodes and its links. Any
+        other list of resources is classified when it is asked for.
+        """
+        attribute_classes = getattr(self, 'attribute_classes', None)
+        if attribute_classes is not None:
+            if resources is self.nodes:
+                return attribute_classes['NODE']
+            if resources is self.links:
+                return attribute_classes['LINK']
+            if len(resources) == 1 and resources[0] is self:
+                return attribute_classes['NETWORK']
+        return classify_attributes(resources, self.get_gams_name)
+
+    def get_resource_attribute(self, resource, attr_name):
+        """
+        Get an attribute of a resource by name, ignoring case, or None if the
+        resource doesn't have it.
+        """
+        attribute_index = getattr(resource, 'attribute_index', None)
+        if attribute_index is None:
+            return resource.get_attribute(attr_name=attr_name)
+        return attribute_index.get(attr_name.lower())
+
+    def get_resources_with_attribute(self, res_type, attr_name):
+        """
+        Get (resource, attribute) for each resource of a type ('NETWORK',
+        'NODE', 'LINK' or 'GROUP') which has an attribute, in load order.
+        """
+        return self.attribute_resources.get((res_type, attr_name.lower()), [])
+
     def gams_names_for_links(self, use_link_name=False, jun=None):
         """
         Add a string to each link that can be used directly in GAMS code in
@@ -211,6 +444,37 @@ class GAMSlink(HydraResource):
     to_node = None
 
 
+#Maps each of the first 256 characters to itself if it's alphanumeric, or '_'
+GAMS_NAME_TRANSLATOR = ''.join(chr(c) if chr(c).isalnum() else '_' for c in range(256))
+
+
+def translate_attr_name(name):
+    """Replace non alphanumeric characters with '_'. This function throws an
+    error, if the first letter of an attribute name is not an alphabetic
+    character.
+    """
+    name = name.translate(GAMS_NAME_TRANSLATOR)
+    return name
+
+
+def classify_attributes(resources, get_gams_name=translate_attr_name):
+    """
+    Group the attributes of some resources which are not variables by their
+    (lower case) dataset type and GAMS name, in one pass.
+
+    Returns {dataset_type: {gams_name: [(resource, attr)]}}, with the names
+    in the order they first appear and the pairs in the order of the
+    resources.
+    """
+    attribute_classes = {}
+    for resource in resources:
+        for attr in resource.attributes:
+            if attr.is_var is not False:
+                continue
+            names = attribute_classes.setdefault(attr.dataset_type.lower(), {})
+            names.setdefault(get_gams_name(attr.name), []).append((resource, attr))
+    return attribute_classes
+
 def convert_date_to_timeindex(date):
     totalseconds = date.hour * 3600 + date.minute * 60 + date.second
     return date.toordinal() + float(totalseconds) / 86400
@@ -253,50 +517,224 @@ def create_arr_index(dim):
     return arr_idx
 
 
-def import_gms_data(filename):
+#How many .gms files are kept in memory, so that a model which is imported
+#again doesn't have to be read again if it hasn't changed
+GMS_CACHE_SIZE = 32
+#Files bigger than this are read as they are expanded, and not kept
+GMS_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+#path -> (modification time, size, lines), least recently used first
+_gms_cache = OrderedDict()
+
+#Directives which start and end blocks which are not GAMS code, and so
+#have no includes to expand
+GMS_TEXT_BLOCKS = {'$onecho': '$offecho',
+                   '$onechov': '$offecho',
+                   '$onechos': '$offecho',
+                   '$onput': '$offput',
+                   '$ontext': '$offtext'}
+
+#The statements which declare or define things, rather than run them, so
+#are compiled into a model's checkpoint. 'singleton set' and variables of a
+#type start with the first word.
+GMS_DECLARATIONS = {'set', 'sets', 'singleton', 'alias', 'parameter', 'parameters',
+                    'scalar', 'scalars', 'table', 'tables', 'acronym', 'acronyms',
+                    'variable', 'variables', 'free', 'positive', 'negative',
+                    'binary', 'integer', 'sos1', 'sos2', 'semicont', 'semiint',
+                    'equation', 'equations', 'model', 'models', 'file', 'files',
+                    'function', 'functions'}
+
+#The arguments of a $batinclude, %1, %2..., in the file it includes
+GMS_ARGUMENT = re.compile(r'%(\d+)')
+
+
+def read_gms_lines(path):
     """
-    Read whole .gms file and expand all $ include statements found.
+    Get the lines of a .gms file, from the cache if it hasn't changed since
+    it was last read.
+    """
+    stat = os.stat(path)
+    cached = _gms_cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        _gms_cache.move_to_end(path)
+        return cached[2]
+
+    if stat.st_size > GMS_CACHE_MAX_BYTES:
+        return _stream_lines(path)
+
+    with open(path) as f:
+        lines = f.readlines()
+
+    _gms_cache[path] = (stat.st_mtime, stat.st_size, lines)
+    while len(_gms_cache) > GMS_CACHE_SIZE:
+        _gms_cache.popitem(last=False)
+    return lines
+
+
+def _stream_lines(path):
+    with open(path) as f:
+        for line in f:
+            yield line
+
+
+def get_include(sline, basepath):
+    """
+    Get the path of the file a $include or $batinclude line includes, and
+    the arguments given to it, or (None, None) if the line isn't one.
+    The path is relative to the directory of the including file.
+    """
+    directive = sline[1:].lstrip()
+    lower = directive.lower()
+    for keyword in ('batinclude', 'include'):
+        if lower.startswith(keyword) and directive[len(keyword):len(keyword) + 1] in (' ', '\t'):
+            break
+    else:
+        return None, None
+
+    rest = directive[len(keyword):].strip().rstrip(';').strip()
+    if rest.startswith('"'):
+        name, _, rest = rest[1:].partition('"')
+    else:
+        name, _, rest = rest.partition(' ')
+    if len(name) == 0:
+        return None, None
+
+    args = rest.split() if keyword == 'batinclude' else []
+    return os.path.join(basepath, name), args
+
+
+def get_first_include(lines):
+    """
+    Get the first $include or $batinclude line of a model's lines, stripped,
+    or None if it doesn't include anything.
+    """
+    for line in lines:
+        sline = line.strip()
+        if sline.startswith('$') and get_include(sline, '')[0] is not None:
+            return sline
+    return None
+
+
+def get_first_execution(lines):
+    """
+    Get the index of the line before which a model only declares and defines
+    things: the line on which the first statement which runs something (an
+    assignment, a loop, an option, a solve...) starts, or the start of the
+    statement before it if that ends on the same line. Returns the number of
+    lines if the model doesn't run anything.
+    """
+    def is_declaration(statement):
+        words = statement.split()
+        return len(words) == 0 or words[0].lower() in GMS_DECLARATIONS or \
+            '..' in statement.split('=')[0]
+
+    #The text of the statement being read, and the line the model can be
+    #split at before it
+    statement = ''
+    statement_split = None
+    block_end = None
+    for i, line in enumerate(lines):
+        sline = line.strip()
+        if block_end is not None:
+            if sline.lower().startswith(block_end):
+                block_end = None
+            continue
+        if sline.startswith('$'):
+            directive = sline.split()[0].lower() if sline != '$' else '$'
+            block_end = GMS_TEXT_BLOCKS.get(directive)
+            continue
+        if line.startswith('*'):
+            continue
+
+        line_split = statement_split if statement_split is not None else i
+        #Quoted text can hold semicolons
+        parts = re.sub(r'"[^"]*"|\'[^\']*\'', '""', line).split(';')
+        for n, part in enumerate(parts):
+            if statement_split is None and len(part.strip()) > 0:
+                statement_split = line_split
+            statement = statement + ' ' + part
+            if n == len(parts) - 1:
+                break
+            #The statement ends with the semicolon
+            if not is_declaration(statement):
+                return statement_split
+            statement = ''
+            statement_split = None
+
+    if not is_declaration(statement):
+        return statement_split
+    return len(lines)
+
+
+def iter_gms_lines(filename, skip_include=None, _stack=()):
+    """
+    Read a .gms file line by line, expanding the files it includes with
+    $include and $batinclude where they are included. Yields (file, line
+    number, line) for each line, with its line ending.
+
+    The arguments of a $batinclude replace %1, %2... in the file it
+    includes. Lines in $onecho/$offecho, $onput/$offput and
+    $ontext/$offtext blocks are not GAMS code, so includes in them are not
+    expanded. An include of a file which is already being read raises an
+    exception, as it would never end.
+
+    If skip_include is given, it is called with the path of each included
+    file, and files for which it returns True are not expanded.
     """
     if os.path.isfile(os.path.expanduser(filename))==False:
         raise Exception('Gams file '+filename+' not found.')
 
+    path = os.path.realpath(os.path.expanduser(filename))
+    if path in _stack:
+        raise Exception('Gams file %s includes itself, through %s.'%
+                        (filename, ' -> '.join(_stack)))
+    stack = _stack + (path,)
+
     basepath = os.path.dirname(filename)
 
-    #print "gams files: "+filename
-    gms_data = ''
-    with open(filename) as f:
-        while True:
-            line = f.readline()
-            if line == '':
-                break
-            sline = line.strip()
-            if len(sline) > 0 and sline[0] == '$':
-                lineparts = sline.split()
-                #lineparts2 = sline.split("\"")
-
-                if len(lineparts) > 2 and \
-                        lineparts[1] == 'include':
-                    ff=sline
-                    ff=ff.replace('$','')
-                    ff=ff.replace('"','')
-                    ff=ff.replace(';','')
-                    ff=ff.replace('include','')
-                    ff=ff.strip()
-                 ##   for ll in lineparts:
-                     ##    #print ll
-                     ####    if(ll.__contains__('include')|ll.__contains__('$')):
-                        ##     continue
-
-                    ##     ff=ff+ll
-
-                    #line = import_gms_data(os.path.join(basepath, lineparts[2]))
-                    line = import_gms_data(os.path.join(basepath, ff))
-                elif len(lineparts) == 2 and lineparts[0] == '$include':
-                    file__= os.path.join(basepath, lineparts[1])
-                    if  os.path.isfile(file__):
-                        line = import_gms_data(file__)
-            gms_data += line
-    return gms_data
+    block_end = None
+    for lineno, line in enumerate(read_gms_lines(path), 1):
+        sline = line.strip()
+        if len(sline) == 0 or sline[0] != '$':
+            yield filename, lineno, line
+            continue
+
+        directive = sline.split()[0].lower() if sline != '$' else '$'
+        if block_end is not None:
+            if directive == block_end:
+                block_end = None
+            yield filename, lineno, line
+            continue
+        if directive in GMS_TEXT_BLOCKS:
+            block_end = GMS_TEXT_BLOCKS[directive]
+            yield filename, lineno, line
+            continue
+
+        include, args = get_include(sline, basepath)
+        if include is None or not os.path.isfile(include) or \
+                (skip_include is not None and skip_include(include)):
+            yield filename, lineno, line
+            continue
+
+        for included in iter_gms_lines(include, skip_include, stack):
+            if len(args) > 0 and included[0] == include:
+                #Whole numbers, so %1 doesn't replace the start of %10.
+                #Arguments which weren't given are left as they are.
+                included_line = GMS_ARGUMENT.sub(
+                    lambda m: args[int(m.group(1)) - 1] if 0 < int(m.group(1)) <= len(args)
+                    else m.group(0), included[2])
+                included = (included[0], included[1], included_line)
+            yield included
+
+
+def import_gms_data(filename, skip_include=None):
+    """
+    Read whole .gms file and expand all $ include statements found.
+
+    If skip_include is given, it is called with the path of each included
+    file, and files for which it returns True are not expanded.
+    """
+    return ''.join(line for _, _, line in iter_gms_lines(filename, skip_include))
 
 def check_gams_installation():
     """
@@ -1 +1,3 @@
-from hydra_gams.lib.HydraGAMSlib import GamsModel, GAMSnetwork, GAMSlink, convert_date_to_timeindex, arr_to_matrix, create_arr_index, import_gms_data, get_gams_path,check_gams_installation 
+from hydra_gams.lib.HydraGAMSlib import GamsModel, GAMSnetwork, GAMSlink, convert_date_to_timeindex, translate_attr_name, classify_attributes, arr_to_matrix, create_arr_index, import_gms_data, iter_gms_lines, get_gams_path,check_gams_installation 
+from hydra_gams.lib.modelsummary import ModelSummary, Declaration
+from hydra_gams.lib.exportindex import ExportIndex, get_index_name, INDEX_SUFFIX
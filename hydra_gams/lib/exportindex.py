@@ -0,0 +1,121 @@
+# (c) Copyright 2013, 2014, 2015 University of Manchester\
+
+import os
+import json
+import logging
+
+log = logging.getLogger(__name__)
+
+INDEX_VERSION = 3
+
+#The index of an exported file is written next to it, with this suffix
+INDEX_SUFFIX = '.index.json'
+
+
+def get_index_name(filename):
+    return filename + INDEX_SUFFIX
+
+
+def get_file_stamp(filename):
+    """
+        Identify the version of a file by its size, its modification time
+        in nanoseconds and its inode, without reading it.
+    """
+    file_stat = os.stat(filename)
+    return [file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino]
+
+
+def read_index(index_name):
+    try:
+        with open(index_name) as f:
+            return json.load(f)
+    except ValueError:
+        log.warning("Ignoring unreadable export index %s", index_name)
+        return None
+
+
+class ExportIndex(object):
+    """
+        What the importer needs from an exported input file, written next to
+        it by the exporter (<output>.index.json): the ids of the network and
+        scenario, how links were named and the time index, as (label,
+        ordinal) for each step, as they are written in the file.
+
+        With it, the importer doesn't have to read the exported file, which
+        holds all of the network's data, to find the time index. The index
+        keeps the size, modification time and inode of the file, so it isn't
+        used once the file has been written again.
+    """
+    def __init__(self,
+                 network_id=None,
+                 scenario_id=None,
+                 template_id=None,
+                 links_as_name=False,
+                 time_index_type=None,
+                 timestamps=()):
+        self.network_id = network_id
+        self.scenario_id = scenario_id
+        self.template_id = template_id
+        self.links_as_name = links_as_name
+        #'t_index' or 'date', as in ModelSummary
+        self.time_index_type = time_index_type
+        self.timestamps = [tuple(timestamp) for timestamp in timestamps]
+
+    def save(self, filename):
+        """
+            Write the index of an exported file, once the file has been
+            written.
+        """
+        with open(get_index_name(filename), 'w') as f:
+            json.dump({'version': INDEX_VERSION,
+                       'data_stamp': get_file_stamp(filename),
+                       'network_id': self.network_id,
+                       'scenario_id': self.scenario_id,
+                       'template_id': self.template_id,
+                       'links_as_name': self.links_as_name,
+                       'time_index_type': self.time_index_type,
+                       'timestamps': self.timestamps}, f)
+
+    @classmethod
+    def load(cls, filename):
+        """
+            Read the index of an exported file. Returns None if there isn't
+            one, or if the file has been changed since it was written.
+        """
+        index_name = get_index_name(filename)
+        if not os.path.exists(index_name) or not os.path.exists(filename):
+            return None
+
+        index = read_index(index_name)
+        if index is None or index.get('version') != INDEX_VERSION:
+            return None
+
+        if index.get('data_stamp') != get_file_stamp(filename):
+            log.info("%s has changed since it was exported. Not using its index.", filename)
+            return None
+
+        return cls(network_id=index['network_id'],
+                   scenario_id=index['scenario_id'],
+                   template_id=index['template_id'],
+                   links_as_name=index['links_as_name'],
+                   time_index_type=index['time_index_type'],
+                   timestamps=index['timestamps'])
+
+    @classmethod
+    def restamp(cls, filename):
+        """
+            Record the size, modification time and inode of an exported file
+            in its index, when the file and its index have been copied
+            together, as from the export cache.
+        """
+        index_name = get_index_name(filename)
+        if not os.path.exists(index_name):
+            return
+
+        index = read_index(index_name)
+        if index is None or index.get('version') != INDEX_VERSION:
+            return
+
+        index['data_stamp'] = get_file_stamp(filename)
+        with open(index_name, 'w') as f:
+            json.dump(index, f)
@@ -0,0 +1,180 @@
+# (c) Copyright 2013, 2014, 2015 University of Manchester\
+
+import os
+import re
+import logging
+
+from hydra_gams.lib.HydraGAMSlib import read_gms_lines
+
+log = logging.getLogger(__name__)
+
+#Lines which start a block of declarations, in lower case
+DECLARATION_KEYWORDS = ('sets', 'set',
+                        'parameters', 'parameter',
+                        'scalars', 'scalar',
+                        'variables', 'variable',
+                        'positive variables', 'positive variable',
+                        'negative variables', 'negative variable',
+                        'binary variables', 'binary variable',
+                        'integer variables', 'integer variable',
+                        'free variables', 'free variable',
+                        'equations', 'equation')
+
+UNITS = re.compile(r'\[(.*?)\]')
+
+
+class Declaration(object):
+    """
+        A line of a declaration block, such as 'v1(i, t) my variable [m^3]'.
+
+        :param the line
+    """
+    def __init__(self, line):
+        self.line = line
+
+        symbol = line.split()[0]
+        parts = symbol.split('(', 1)
+        self.name = parts[0]
+        if len(parts) <= 1:
+            self.domain = []
+        else:
+            self.domain = parts[1][0:-1].split(',')
+
+        units = UNITS.search(line)
+        self.units = units.group(1) if units is not None else None
+
+    @property
+    def time_position(self):
+        """
+            The position of the time index in the domain, or None if it isn't
+            indexed on time. A symbol indexed on (yr, mn, dy) is indexed on
+            time by its day.
+        """
+        if 't' in self.domain:
+            return self.domain.index('t')
+        elif 'yr' in self.domain and 'mn' in self.domain and 'dy' in self.domain:
+            return self.domain.index('dy')
+        return None
+
+
+class ModelSummary(object):
+    """
+        What the importer and the runner need to know about a GAMS model,
+        read from its lines in a single pass:
+
+        blocks: (keyword, [Declaration]) for each block of declarations, in
+                the order they are in. A block is a keyword line, such as
+                'Positive Variables', and the lines after it up to an empty
+                line or a line with only ';'.
+        time_index_type: 't_index' or 'date', if the time index of an export
+                         is in the model.
+        timestamps: (label, ordinal) for each step of the time index.
+        network_id, scenario_id: the text after the ':' of the first
+                                 'Network-ID' and 'Scenario-ID' lines.
+        includes: the names of the files included with $include, as they
+                  are written.
+
+        :param the lines of the model (any iterable), usually with its
+               includes expanded
+    """
+    def __init__(self, lines):
+        self.blocks = []
+        self.time_index_type = None
+        self.timestamps = []
+        self.network_id = None
+        self.scenario_id = None
+        self.includes = []
+
+        self.parse(lines)
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+            Summarise a model file, without expanding its includes.
+        """
+        lines = read_gms_lines(os.path.realpath(filename))
+        return cls(line.rstrip('\n') for line in lines)
+
+    def parse(self, lines):
+        #The blocks which the line being read is in. Nested keyword lines
+        #are declarations of the blocks they are in as well as starting their
+        #own, and all of them end on the same line.
+        open_blocks = []
+        #The line the timestamps start on, once the time index is found
+        timestamps_start = None
+        reading_timestamps = False
+
+        for i, line in enumerate(lines):
+            sline = line.strip()
+
+            if len(open_blocks) > 0:
+                if sline == ';' or len(sline) == 0:
+                    open_blocks = []
+                else:
+                    declaration = Declaration(line)
+                    for declarations in open_blocks:
+                        declarations.append(declaration)
+
+            if sline.lower() in DECLARATION_KEYWORDS:
+                declarations = []
+                self.blocks.append((sline.lower(), declarations))
+                open_blocks.append(declarations)
+
+            if self.time_index_type is None:
+                if sline.startswith('Parameter timestamp(yr, mn, dy)'):
+                    self.time_index_type = 'date'
+                    timestamps_start = i + 2
+                elif sline.startswith('Parameter timestamp(t)'):
+                    self.time_index_type = 't_index'
+                    timestamps_start = i + 2
+            elif i == timestamps_start:
+                reading_timestamps = True
+            if reading_timestamps is True:
+                reading_timestamps = self.read_timestamp(line)
+
+            if self.network_id is None and 'Network-ID' in line:
+                self.network_id = line.split(':')[1]
+            if self.scenario_id is None and 'Scenario-ID' in line:
+                self.scenario_id = line.split(':')[1]
+
+            if len(sline) > 0 and sline[0] == '$' and 'include' in line.lower():
+                lineparts = sline.split()
+                if (len(lineparts) > 1 and lineparts[1] == 'include') or lineparts[0] == '$include':
+                    name = sline
+                    name = name.replace('$', '')
+                    name = name.replace('"', '')
+                    name = name.replace(';', '')
+                    name = name.replace('include', '')
+                    self.includes.append(name.strip())
+
+        log.debug("Read %s declaration blocks and %s timestamps",
+                  len(self.blocks), len(self.timestamps))
+
+    def read_timestamp(self, line):
+        """
+            Read a step of the time index, such as 'timestamp("0") = 730120.0 ;'
+            or 'timestamp("2000", "1", "1") = 730120.0 ;'. Returns False if the
+            line isn't one, as the time index has ended.
+        """
+        if self.time_index_type == 't_index':
+            if line.split('(', 1)[0].strip() != 'timestamp':
+                return False
+            label = line.split('"')[1]
+            ordinal = line.split(')', 1)[1]
+        else:
+            if not line.strip().startswith('timestamp'):
+                return False
+            label = line.split('(', 1)[1].split(')', 1)[0]
+            ordinal = line.split('=')[1]
+        self.timestamps.append((label, ordinal.replace('=', '').replace(';', '').strip()))
+        return True
+
+    def get_declarations(self, keyword):
+        """
+            Get the declarations of the first block with a keyword, such as
+            'positive variables', or an empty list if there isn't one.
+        """
+        for block_keyword, declarations in self.blocks:
+            if block_keyword == keyword:
+                return declarations
+        return []
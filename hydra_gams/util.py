@@ -1,14 +1,32 @@
+import hashlib
 import logging
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from dateutil.parser import parse
 from decimal import Decimal, ROUND_HALF_UP
 import pytz
 
+from hydra_gams import decoder
+
 log = logging.getLogger(__name__)
 
 FORMAT = "%Y-%m-%d %H:%M:%S.%f"
 
+#How many detected formats (keyed on the timestamp they were detected from)
+#and parsed time axes (keyed on the timestamps) are kept
+TIMEFMT_CACHE_SIZE = 1024
+TIME_AXIS_CACHE_SIZE = 32
+
+#Files are hashed in chunks of this many bytes
+HASH_CHUNK_SIZE = 1024 * 1024
+
+#Seasonal timeseries are stored with this year, and moved to SEASONAL_YEAR
+#to be reindexed.
+SEASONAL_KEY = '9999'
+SEASONAL_YEAR = '1678'
+
 def date_to_string(date, seasonal=False):
     """Convert a date to a standard string used by Hydra. The resulting string
     looks like this::
@@ -27,54 +45,91 @@ def date_to_string(date, seasonal=False):
         FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
     return date.strftime(FORMAT)
 
+class TimeAxis(object):
+    """
+        The timestamps which timeseries are reindexed on, converted once so
+        that they can be reused for every timeseries.
+
+        Iterating over it gives the timestamps as they were passed in.
+
+        :param a list of timestamps
+        :param the label of each timestamp in the GAMS time index, if any
+    """
+    def __init__(self, timestamps, labels=None):
+        self.timestamps = list(timestamps)
+        self.labels = labels
+
+        self.datetimes = get_datetimes(self.timestamps)
+        self.index = pd.Index(self.datetimes)
+        self._seasonal_index = None
+
+    @property
+    def seasonal_index(self):
+        """
+            The timestamps to look up seasonal timeseries with. These are only
+            made when a seasonal timeseries is reindexed, as a 29th of
+            February has no equivalent in the seasonal year.
+        """
+        if self._seasonal_index is None:
+            self._seasonal_index = pd.Index([t.replace(year=int(SEASONAL_YEAR)) for t in self.datetimes])
+        return self._seasonal_index
+
+    def __iter__(self):
+        return iter(self.timestamps)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+def read_timeseries(ts_string):
+    """
+        Read a timeseries from its JSON string, moving seasonal timestamps
+        to the year they are reindexed in.
+
+        :param a JSON string, in pandas-friendly format
+        :returns a pandas data frame
+    """
+    ts = ts_string.replace(SEASONAL_KEY, SEASONAL_YEAR)
+    return decoder.read_frame(ts)
+
 def reindex_timeseries(ts_string, new_timestamps):
     """
         get data for timesamp
 
-        :param a JSON string, in pandas-friendly format
-        :param a timestamp or list of timestamps (datetime)
+        :param a JSON string, in pandas-friendly format, or a data frame
+               from read_timeseries
+        :param a timestamp, list of timestamps (datetime) or TimeAxis
         :returns a pandas data frame, reindexed with the supplied timestamps or None if no data is found
     """
     #If a single timestamp is passed in, turn it into a list
     #Reindexing can't work if it's not a list
-    if not isinstance(new_timestamps, list):
+    if not isinstance(new_timestamps, (list, TimeAxis)):
         new_timestamps = [new_timestamps]
 
     #Convert the incoming timestamps to datetimes
     #if they are not datetimes.
-    new_timestamps_converted = []
-    for t in new_timestamps:
-        new_timestamps_converted.append(get_datetime(t))
-
-    new_timestamps = new_timestamps_converted
+    if not isinstance(new_timestamps, TimeAxis):
+        new_timestamps = TimeAxis(new_timestamps)
 
-    seasonal_year = '1678'
-    seasonal_key = '9999'
-
-    ts = ts_string.replace(seasonal_key, seasonal_year)
-
-    timeseries = pd.read_json(ts)
+    if isinstance(ts_string, pd.DataFrame):
+        timeseries = ts_string
+    else:
+        timeseries = read_timeseries(ts_string)
 
     idx = timeseries.index
 
-    ts_timestamps = new_timestamps
+    ts_timestamps = new_timestamps.index
 
     #'Fix' the incoming timestamp in case it's a seasonal value
     if type(idx) == pd.DatetimeIndex:
-        if set(idx.year) == set([int(seasonal_year)]):
-            if isinstance(new_timestamps,  list):
-                seasonal_timestamp = []
-                for t in ts_timestamps:
-                    t_1900 = t.replace(year=int(seasonal_year))
-                    seasonal_timestamp.append(t_1900)
-                ts_timestamps = seasonal_timestamp
+        if set(idx.year) == set([int(SEASONAL_YEAR)]):
+            ts_timestamps = new_timestamps.seasonal_index
 
     #Reindex the timeseries to reflect the requested timestamps
     reindexed_ts = timeseries.reindex(ts_timestamps, method='ffill')
 
     i = reindexed_ts.index
 
-    reindexed_ts.index = pd.Index(new_timestamps, names=i.names)
+    reindexed_ts.index = new_timestamps.index.set_names(i.names)
 
     #If there are no values at all, just return None
     if len(reindexed_ts.dropna()) == 0:
@@ -86,6 +141,56 @@ def reindex_timeseries(ts_string, new_timestamps):
     return pandas_ts
 
 
+def reindex_timeseries_batch(ts_strings, new_timestamps):
+    """
+        Reindex many single-column timeseries onto the same timestamps.
+
+        All the timeseries are parsed once and each is aligned on the
+        requested timestamps by looking up the position of each timestamp in
+        its own index, as reindex_timeseries does. A timestamp takes the value
+        at or before it, so gaps (NaN) in a timeseries' own data are kept.
+
+        :param a list of JSON strings, in pandas-friendly format, or data
+               frames from read_timeseries
+        :param a list of timestamps (datetime) or a TimeAxis
+        :returns a 2-D numpy array with one row per timeseries and one column
+                 per timestamp. Values which can't be found are NaN.
+        :raises ValueError if a timeseries has more than one column.
+    """
+    if not isinstance(new_timestamps, TimeAxis):
+        new_timestamps = TimeAxis(new_timestamps)
+
+    values = np.full((len(ts_strings), len(new_timestamps)), np.nan)
+
+    for i, ts_string in enumerate(ts_strings):
+        if isinstance(ts_string, pd.DataFrame):
+            timeseries = ts_string
+        else:
+            timeseries = read_timeseries(ts_string)
+
+        if len(timeseries.columns) > 1:
+            raise ValueError("Timeseries %s has more than one column"%(i,))
+
+        idx = timeseries.index
+        #Timeseries without a time index can't be aligned, so they are left
+        #empty, as reindex_timeseries would.
+        if type(idx) != pd.DatetimeIndex:
+            continue
+
+        ts_timestamps = new_timestamps.index
+        #'Fix' the incoming timestamps for seasonal values
+        if set(idx.year) == set([int(SEASONAL_YEAR)]):
+            ts_timestamps = new_timestamps.seasonal_index
+
+        #The position of the value at or before each timestamp, or -1 if
+        #there isn't one
+        positions = idx.get_indexer(ts_timestamps, method='ffill')
+        found = positions >= 0
+        values[i, found] = timeseries.iloc[:, 0].values[positions[found]]
+
+    return values
+
+
 def get_datetime(timestamp):
     """
         Turn a string timestamp into a date time. First tries to use dateutil.
@@ -135,6 +240,70 @@ def get_datetime(timestamp):
 
     return ts_time
 
+def get_datetimes(timestamps):
+    """
+        Turn a list of timestamps into date times, as get_datetime does for
+        each one.
+
+        If they are all strings in the same format, the format is detected
+        from the first one and the whole list is parsed with it at once.
+        The list is cached, so parsing the same timestamps again is free.
+
+        @returns: A list of the date times get_datetime would return.
+    """
+    return list(_get_datetimes(tuple(timestamps)))
+
+@lru_cache(maxsize=TIME_AXIS_CACHE_SIZE)
+def _get_datetimes(timestamps):
+    if len(timestamps) > 0 and all(isinstance(t, str) for t in timestamps):
+        datetimes = _parse_timestamps(timestamps)
+        if datetimes is not None:
+            return datetimes
+
+    return tuple(get_datetime(t) for t in timestamps)
+
+def _parse_timestamps(timestamps):
+    """
+        Parse a list of string timestamps with the format of the first one.
+        Returns None if they can't all be parsed this way.
+    """
+    fmt = detect_timefmt(timestamps[0])
+
+    #Only formats which start with the year are read the same way by dateutil,
+    #which get_datetime uses, for every date. dateutil reads day or month
+    #first formats differently depending on the day.
+    if fmt is None or not fmt.startswith('%Y'):
+        return None
+
+    try:
+        parsed = pd.to_datetime(pd.Series(timestamps), format=fmt)
+    except (ValueError, TypeError):
+        return None
+
+    #Timestamps with a time zone of their own can't be parsed together
+    if not pd.api.types.is_datetime64_dtype(parsed) or parsed.dt.tz is not None:
+        return None
+
+    #dateutil reads a trailing Z as UTC. Otherwise it is local time.
+    if fmt.endswith('Z'):
+        parsed = parsed.dt.tz_localize('UTC')
+
+    datetimes = tuple(t.astimezone(pytz.utc) for t in parsed.dt.to_pydatetime())
+
+    #Make sure dateutil agrees with the format
+    for i in (0, -1):
+        if datetimes[i] != get_datetime(timestamps[i]):
+            return None
+
+    return datetimes
+
+@lru_cache(maxsize=TIMEFMT_CACHE_SIZE)
+def detect_timefmt(datestr):
+    """
+        guess_timefmt, remembering the format of each timestamp it has seen.
+    """
+    return guess_timefmt(datestr)
+
 def timestamp_to_ordinal(timestamp):
     """Convert a timestamp as defined in the soap interface to the time format
     stored in the database.
@@ -163,7 +332,7 @@ def ordinal_to_timestamp(date):
     if date is None:
         return None
 
-    if isinstance(date, six.string_types):
+    if isinstance(date, str):
         try:
             date = Decimal(date)
         except:
@@ -182,7 +351,8 @@ def ordinal_to_timestamp(date):
     d = datetime.fromordinal(day) + td
     log.debug("%s converted to %s", date, d)
 
-    return get_datetime(d)
+    #As get_datetime does for a datetime, without trying to parse it first
+    return d.astimezone(pytz.utc)
 
 def guess_timefmt(datestr):
     """
@@ -302,4 +472,15 @@ def guess_timefmt(datestr):
             except ValueError:
                 pass
 
-    return None
\ No newline at end of file
+    return None
+
+def hash_file(filename):
+    """
+        Make a sha256 hash of a file's contents, without reading it all into
+        memory.
+    """
+    file_hash = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
@@ -0,0 +1,51 @@
+# (c) Copyright 2013-2019 University of Manchester
+import os
+import sys
+
+import pytest
+
+#The synthetic networks the benchmarks use are served to the exporter and
+#importer in place of a Hydra server
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks'))
+
+from synthetic_network import make_network, StubConnection
+
+#The network the tests export, with a time axis of 24 days
+SMALL_NETWORK = dict(nodes=4,
+                     links=6,
+                     groups=2,
+                     timeseries_length=24,
+                     dataframe_rows=4)
+
+@pytest.fixture
+def export_network(tmp_path):
+    """
+        Export a synthetic network. Returns a function taking the output file
+        name, the range of the network's time axis to export, a function to
+        change the network before it is exported and the exporter's options,
+        which returns the exporter.
+    """
+    from hydra_gams.exporter.exporter import GAMSExporter
+
+    def export(output, steps=None, change=None, **kwargs):
+        network, attributes, template, time_axis = make_network(**SMALL_NETWORK)
+        if change is not None:
+            change(network)
+        options = dict(node_node=False,
+                       link_name=False,
+                       start_date=None,
+                       end_date=None,
+                       time_step=None,
+                       time_axis=None,
+                       use_cache=False)
+        options.update(kwargs)
+        exporter = GAMSExporter(StubConnection(network, attributes, template),
+                                scenario_id=1,
+                                template_id=1,
+                                output=str(tmp_path / output),
+                                **options)
+        exporter.time_axis = time_axis if steps is None else time_axis[steps]
+        exporter.export()
+        return exporter
+
+    return export
@@ -0,0 +1,138 @@
+# (c) Copyright 2013-2019 University of Manchester
+import time
+import threading
+
+from conftest import SMALL_NETWORK
+from synthetic_network import HydraObject, make_network as make_synthetic_network, StubConnection
+
+from hydra_gams.auto import batch
+from hydra_gams.exporter.exporter import GAMSExporter
+from hydra_gams.auto.batch import BatchConnection, run_batch
+
+#How long a test waits for something to happen in another thread
+TIMEOUT = 5
+
+
+class NetworkClient(object):
+    def __init__(self, network):
+        self.network = network
+        self.calls = 0
+
+    def get_network(self, **kwargs):
+        self.calls += 1
+        return self.network
+
+def make_network():
+    scenarios = [HydraObject(id=scenario_id, network_id=1) for scenario_id in (1, 2, 3)]
+    return HydraObject(id=1, name='network', scenarios=scenarios)
+
+def test_network_is_fetched_once():
+    client = NetworkClient(make_network())
+    connection = BatchConnection(client, [1, 2, 3])
+
+    connection.get_network(network_id=1, scenario_ids=[2])
+    connection.get_network(network_id=1, scenario_ids=[3])
+
+    assert client.calls == 1
+
+def test_network_scenarios_are_not_reordered_in_place():
+    network = make_network()
+    connection = BatchConnection(NetworkClient(network), [1, 2, 3])
+
+    second = connection.get_network(network_id=1, scenario_ids=[2])
+    third = connection.get_network(network_id=1, scenario_ids=[3])
+
+    assert [s.id for s in second.scenarios] == [2, 1, 3]
+    assert [s.id for s in third.scenarios] == [3, 1, 2]
+    assert [s.id for s in network.scenarios] == [1, 2, 3]
+    assert second.name == 'network'
+    assert second.scenarios[1] is network.scenarios[0]
+
+
+class FakeExporter(object):
+    """
+        Stands in for GAMSExporter. The export of the last scenario waits
+        until the first one has been imported.
+    """
+    def __init__(self, connection, scenario_id, template_id, output, **kwargs):
+        self.scenario_id = scenario_id
+        self.output = output
+
+    def export(self):
+        if self.scenario_id == 2:
+            assert imported[1].wait(TIMEOUT), "Scenario 1 was not imported during the export of 2"
+        with open(self.output, 'w') as f:
+            f.write("scalar a /%s/;\n"%self.scenario_id)
+
+
+class FakeModel(object):
+    """
+        Stands in for GamsModel. Its runs take long enough for the next
+        export to have started before they finish.
+    """
+    def __init__(self, working_directory, debug, data_dir=None, reuse_checkpoint=False):
+        pass
+
+    def add_job(self, model_file):
+        pass
+
+    def run(self):
+        time.sleep(0.2)
+
+
+class FakeImporter(object):
+    def __init__(self, scenario_id, gms_file, gdx_file, network=None, connection=None):
+        self.scenario_id = scenario_id
+
+    def import_data(self):
+        imported[self.scenario_id].set()
+
+imported = {}
+
+def test_results_are_imported_as_runs_finish(tmp_path, monkeypatch):
+    imported.clear()
+    imported.update({1: threading.Event(), 2: threading.Event()})
+    monkeypatch.setattr(batch, 'GAMSExporter', FakeExporter)
+    monkeypatch.setattr(batch, 'GamsModel', FakeModel)
+    monkeypatch.setattr(batch, 'GAMSImporter', FakeImporter)
+    monkeypatch.setattr(batch, 'get_results_file', lambda directory, since: None)
+
+    gms_file = tmp_path / 'model.gms'
+    with open(gms_file, 'w') as f:
+        f.write("$include data.txt\nsolve m using lp minimizing z;\n")
+
+    runs = run_batch(NetworkClient(make_network()), [1, 2], str(gms_file), jobs=2)
+
+    assert [(run.scenario_id, run.status) for run in runs] == [(1, 'ok'), (2, 'ok')]
+    assert (tmp_path / 'scenario_2' / 'data.txt').exists()
+
+def test_scenarios_with_the_same_data_are_exported_the_same(tmp_path, monkeypatch):
+    network, attributes, template, time_axis = make_synthetic_network(**SMALL_NETWORK)
+    network.scenarios.append(HydraObject(network.scenarios[0], id=2))
+
+    class AxisExporter(GAMSExporter):
+        def __init__(self, *args, **kwargs):
+            super(AxisExporter, self).__init__(*args, **kwargs)
+            self.time_axis = time_axis[0:12]
+
+    imported.clear()
+    imported.update({1: threading.Event(), 2: threading.Event()})
+    monkeypatch.setattr(batch, 'GAMSExporter', AxisExporter)
+    monkeypatch.setattr(batch, 'GamsModel', FakeModel)
+    monkeypatch.setattr(batch, 'GAMSImporter', FakeImporter)
+    monkeypatch.setattr(batch, 'get_results_file', lambda directory, since: None)
+
+    gms_file = tmp_path / 'model.gms'
+    with open(gms_file, 'w') as f:
+        f.write("$include data.txt\nsolve m using lp minimizing z;\n")
+
+    runs = run_batch(StubConnection(network, attributes, template), [1, 2], str(gms_file),
+                     node_node=False, link_name=False, use_cache=False)
+
+    assert [run.status for run in runs] == ['ok', 'ok']
+    with open(tmp_path / 'scenario_1' / 'data.txt') as f:
+        first = f.read()
+    with open(tmp_path / 'scenario_2' / 'data.txt') as f:
+        second = f.read()
+    #Only the scenario id in the header differs
+    assert first.replace('Scenario-ID: 1', 'Scenario-ID: 2') == second
@@ -0,0 +1,72 @@
+# (c) Copyright 2013-2019 University of Manchester
+from conftest import SMALL_NETWORK
+from synthetic_network import make_network, StubConnection, HydraObject
+
+from hydra_gams.auto.batch import BatchConnection
+from hydra_gams.lib import ExportIndex
+from hydra_gams.exporter.exporter import GAMSExporter
+
+class UpdatedAtConnection(StubConnection):
+    """
+        A stub connection whose scenario always says it was last changed at
+        the same time, however its data changes.
+    """
+    def get_scenario(self, scenario_id, include_data=False, **kwargs):
+        return HydraObject(id=scenario_id,
+                           network_id=self.network.id,
+                           updated_at='2020-01-01 00:00:00')
+
+def export(connection, time_axis, output, cache_dir):
+    exporter = GAMSExporter(connection,
+                            scenario_id=1,
+                            template_id=1,
+                            output=str(output),
+                            node_node=False,
+                            link_name=False,
+                            start_date=None,
+                            end_date=None,
+                            time_step=None,
+                            time_axis=None,
+                            cache_dir=str(cache_dir))
+    exporter.time_axis = time_axis[0:12]
+    exporter.export()
+    with open(output) as f:
+        return f.read()
+
+def test_changed_data_is_not_served_from_cache(tmp_path):
+    network, attributes, template, time_axis = make_network(**SMALL_NETWORK)
+    connection = UpdatedAtConnection(network, attributes, template)
+
+    first = export(connection, time_axis, tmp_path / 'first.txt', tmp_path / 'cache')
+
+    #Change the discount rate, without the scenario's updated_at changing
+    for rs in network.scenarios[0].resourcescenarios:
+        if rs.dataset.value == '0.05':
+            rs.dataset.value = '0.07'
+
+    second = export(connection, time_axis, tmp_path / 'second.txt', tmp_path / 'cache')
+    assert second != first
+    assert '0.07' in second
+
+    #The same data again is served from the cache
+    third = export(connection, time_axis, tmp_path / 'third.txt', tmp_path / 'cache')
+    assert third == second
+
+def test_batch_export_is_served_from_cache(tmp_path, monkeypatch):
+    network, attributes, template, time_axis = make_network(**SMALL_NETWORK)
+    first = export(StubConnection(network, attributes, template),
+                   time_axis, tmp_path / 'first.txt', tmp_path / 'cache')
+
+    #A batch fetches the network with the data of its other scenarios too
+    other = HydraObject(network.scenarios[0], id=2, resourcescenarios=[])
+    batch_network = HydraObject(network, scenarios=network.scenarios + [other])
+    connection = BatchConnection(StubConnection(batch_network, attributes, template), [1, 2])
+
+    def write_file(self):
+        raise AssertionError("The export was not served from the cache")
+    monkeypatch.setattr(GAMSExporter, 'write_file', write_file)
+
+    second = export(connection, time_axis, tmp_path / 'second.txt', tmp_path / 'cache')
+    assert second == first
+    #The copy's index can be used
+    assert ExportIndex.load(str(tmp_path / 'second.txt')).scenario_id == 1
@@ -0,0 +1,124 @@
+# (c) Copyright 2013-2019 University of Manchester
+"""
+    With reuse_checkpoint, a model's declarations are compiled once into a
+    checkpoint, and each run restarts from it with the data read again.
+    These tests run GamsModel against a workspace which records the jobs it
+    is given, in place of GAMS.
+"""
+import os
+import time
+
+from hydra_gams.lib.HydraGAMSlib import GamsModel, get_first_execution
+
+
+class FakeCheckpoint(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeJob(object):
+    def __init__(self, workspace, text, checkpoint):
+        self.workspace = workspace
+        self.text = text
+        self.checkpoint = checkpoint
+
+    def run(self, checkpoint=None):
+        self.workspace.compiled.append(self.text)
+        with open(os.path.join(self.workspace.working_directory, checkpoint.name + '.g00'), 'w') as f:
+            f.write(self.text)
+
+
+class FakeWorkspace(object):
+    def __init__(self, working_directory):
+        self.working_directory = working_directory
+        self.compiled = []
+
+    def add_checkpoint(self, name=None):
+        return FakeCheckpoint(name)
+
+    def add_job_from_string(self, text, checkpoint=None):
+        return FakeJob(self, text, checkpoint)
+
+
+MODEL = """Sets i /a, b/;
+$include "data.txt"
+Variables z;
+Positive Variable x(i);
+Equations obj, cap(i);
+obj.. z =e= sum(i, x(i));
+cap(i).. x(i) =l= p(i);
+Model m /all/;
+%s
+solve m using lp maximizing z;
+"""
+
+def make_model(tmp_path, text, data="Parameter p(i) /a 1, b 2/;\n"):
+    model_file = tmp_path / 'model.gms'
+    with open(model_file, 'w') as f:
+        f.write(text)
+    with open(tmp_path / 'data.txt', 'w') as f:
+        f.write(data)
+
+    model = GamsModel.__new__(GamsModel)
+    model.reuse_checkpoint = True
+    model.checkpoints = {}
+    model.ws = FakeWorkspace(str(tmp_path))
+    model.add_job(str(model_file))
+    return model
+
+def test_split_before_first_assignment():
+    lines = (MODEL%"p(i) = p(i) * 2;").split("\n")
+
+    assert lines[get_first_execution(lines)] == "p(i) = p(i) * 2;"
+
+def test_split_keeps_statements_whole():
+    lines = ["Set i",
+             "  /a, b/; Scalar s /1/; s = 2;",
+             "display 'a;b';"]
+
+    assert get_first_execution(lines) == 0
+    assert get_first_execution(["Set i /a/;", "display 'a;b';"]) == 1
+    assert get_first_execution(["Set i /a/;", "* s = 1;"]) == 2
+
+def test_assignments_run_on_restart(tmp_path):
+    model = make_model(tmp_path, MODEL%"p(i) = p(i) * 2;")
+
+    compiled, = model.ws.compiled
+    assert 'p(i) * 2' not in compiled
+    assert 'Model m /all/;' in compiled
+    assert model.job.text.startswith('$onMultiR\n$include "data.txt"\n$offMulti\np(i) = p(i) * 2;')
+
+def test_data_included_after_split(tmp_path):
+    model = make_model(tmp_path, "option limrow = 0;\n" + MODEL%"")
+
+    assert model.ws.compiled == ['']
+    assert model.job.text.startswith("option limrow = 0;\nSets i /a, b/;\n$include")
+
+def test_checkpoint_is_reused(tmp_path):
+    make_model(tmp_path, MODEL%"")
+    model = make_model(tmp_path, MODEL%"")
+
+    assert model.ws.compiled == []
+    assert model.job.checkpoint.name.startswith('_hydra_model_')
+
+def test_changed_include_is_compiled_again(tmp_path):
+    with open(tmp_path / 'sets.gms', 'w') as f:
+        f.write("Set j /c/;\n")
+    text = "$include data.txt\n$include sets.gms\n" + MODEL%""
+    first = make_model(tmp_path, text)
+
+    with open(tmp_path / 'sets.gms', 'w') as f:
+        f.write("Set j /c, d/;\n")
+    stat = os.stat(tmp_path / 'sets.gms')
+    os.utime(tmp_path / 'sets.gms', (stat.st_atime, time.time() + 10))
+    second = make_model(tmp_path, text)
+
+    assert len(second.ws.compiled) == 1
+    assert second.job.checkpoint.name != first.job.checkpoint.name
+
+def test_changed_data_is_not_compiled_again(tmp_path):
+    first = make_model(tmp_path, MODEL%"")
+    second = make_model(tmp_path, MODEL%"", data="Parameter p(i) /a 30, b 40/;\n")
+
+    assert second.ws.compiled == []
+    assert second.job.checkpoint.name == first.job.checkpoint.name
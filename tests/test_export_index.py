@@ -0,0 +1,123 @@
+# (c) Copyright 2013-2019 University of Manchester
+"""
+    The importer reads the index the exporter writes next to an input file
+    in place of the file, so the index must only be used while it still
+    describes the file, and the network and scenario being imported to.
+"""
+import os
+import shutil
+
+from hydra_gams.lib import ExportIndex, get_index_name
+from hydra_gams.importer.importer import GAMSImporter
+
+TIMESTAMPS = [('0', '737426.0'), ('1', '737427.0')]
+
+
+def write_data(filename, text, network_id=1, scenario_id=2):
+    with open(filename, 'w') as f:
+        f.write(text)
+    ExportIndex(network_id=network_id,
+                scenario_id=scenario_id,
+                time_index_type='t_index',
+                timestamps=TIMESTAMPS).save(str(filename))
+
+def load_model(gms_file, network_id=None, scenario_id=None):
+    importer = GAMSImporter.__new__(GAMSImporter)
+    importer.gms_file = str(gms_file)
+    importer.network_id = network_id
+    importer.scenario_id = scenario_id
+    importer.export_index = None
+    importer.load_gams_file()
+    return importer
+
+def make_model(tmp_path, data_files):
+    gms_file = tmp_path / 'model.gms'
+    with open(gms_file, 'w') as f:
+        for data_file in data_files:
+            f.write('$include "%s"\n'%data_file)
+        f.write('solve m using lp minimizing z;\n')
+    return gms_file
+
+def test_index_is_used(tmp_path):
+    data_file = tmp_path / 'data.txt'
+    write_data(data_file, "scalar a /1/;\n")
+
+    index = ExportIndex.load(str(data_file))
+    assert index.network_id == 1
+    assert index.scenario_id == 2
+    assert index.timestamps == TIMESTAMPS
+
+def test_changed_size_is_stale(tmp_path):
+    data_file = tmp_path / 'data.txt'
+    write_data(data_file, "scalar a /1/;\n")
+    with open(data_file, 'a') as f:
+        f.write("scalar b /2/;\n")
+
+    assert ExportIndex.load(str(data_file)) is None
+
+def test_edit_keeping_size_is_stale(tmp_path):
+    data_file = tmp_path / 'data.txt'
+    write_data(data_file, "scalar a /1/;\n")
+    stat = os.stat(data_file)
+
+    with open(data_file, 'w') as f:
+        f.write("scalar a /7/;\n")
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert ExportIndex.load(str(data_file)) is None
+
+def test_replaced_file_is_stale(tmp_path):
+    data_file = tmp_path / 'data.txt'
+    write_data(data_file, "scalar a /1/;\n")
+    stat = os.stat(data_file)
+
+    #Another file, with the same size and modification time
+    with open(tmp_path / 'other.txt', 'w') as f:
+        f.write("scalar a /7/;\n")
+    os.utime(tmp_path / 'other.txt', ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path / 'other.txt', data_file)
+
+    assert ExportIndex.load(str(data_file)) is None
+
+def test_copied_file_is_restamped(tmp_path):
+    data_file = tmp_path / 'data.txt'
+    write_data(data_file, "scalar a /1/;\n")
+    copy = str(tmp_path / 'copy.txt')
+    shutil.copyfile(data_file, copy)
+    shutil.copyfile(get_index_name(str(data_file)), get_index_name(copy))
+
+    assert ExportIndex.load(copy) is None
+    ExportIndex.restamp(copy)
+    assert ExportIndex.load(copy).scenario_id == 2
+
+def test_every_indexed_include_is_skipped(tmp_path):
+    write_data(tmp_path / 'data1.txt', "scalar a /1/;\n")
+    write_data(tmp_path / 'data2.txt', "scalar b /2/;\n")
+    gms_file = make_model(tmp_path, ['data1.txt', 'data2.txt'])
+
+    importer = load_model(gms_file)
+
+    assert importer.gms_data == ['$include "data1.txt"',
+                                 '$include "data2.txt"',
+                                 'solve m using lp minimizing z;']
+    assert (importer.network_id, importer.scenario_id) == (1, 2)
+
+def test_index_of_another_scenario_is_not_used(tmp_path):
+    write_data(tmp_path / 'data.txt', "scalar a /1/;\n")
+    gms_file = make_model(tmp_path, ['data.txt'])
+
+    importer = load_model(gms_file, network_id=1, scenario_id=3)
+
+    assert importer.export_index is None
+    assert 'scalar a /1/;' in importer.gms_data
+
+def test_indexes_must_agree(tmp_path):
+    write_data(tmp_path / 'data1.txt', "scalar a /1/;\n")
+    write_data(tmp_path / 'data2.txt', "scalar b /2/;\n", scenario_id=3)
+    gms_file = make_model(tmp_path, ['data1.txt', 'data2.txt'])
+
+    importer = load_model(gms_file)
+
+    assert importer.export_index.scenario_id == 2
+    assert 'scalar a /1/;' not in importer.gms_data
+    assert 'scalar b /2/;' in importer.gms_data
@@ -0,0 +1,53 @@
+# (c) Copyright 2013-2019 University of Manchester
+import os
+import json
+
+import pytest
+
+from hydra_gams import decoder
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture
+def pandas_decoder():
+    """
+        The expected files were exported before the JSON backends were
+        added, when the values were read with pd.read_json.
+    """
+    backend = decoder.get_backend()
+    decoder.set_backend('pandas')
+    yield
+    decoder.set_backend(backend)
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+@pytest.mark.parametrize('expected, options', [
+    ('export_node_node.txt', {}),
+    ('export_link_name.txt', {'link_name': True}),
+    ('export_node_node.txt', {'workers': 2}),
+])
+def test_export_is_unchanged(tmp_path, export_network, pandas_decoder, expected, options):
+    export_network('data.txt', steps=slice(0, 12), **options)
+
+    assert read(tmp_path / 'data.txt') == read(os.path.join(DATA_DIR, expected))
+
+def test_gaps_are_exported_as_nan(tmp_path, export_network):
+    def change(network):
+        timeseries = [rs.dataset for rs in network.scenarios[0].resourcescenarios
+                      if rs.dataset.type == 'timeseries']
+        #A gap in one timeseries, and another which starts on the fourth step
+        gap = json.loads(timeseries[0].value)
+        gap['0'][sorted(gap['0'])[5]] = None
+        timeseries[0].value = json.dumps(gap)
+        late = json.loads(timeseries[1].value)
+        for timestamp in sorted(late['0'])[:3]:
+            del late['0'][timestamp]
+        timeseries[1].value = json.dumps(late)
+
+    export_network('data.txt', steps=slice(0, 12), change=change)
+
+    cells = read(tmp_path / 'data.txt').decode('utf-8').split()
+    assert cells.count('nan') == 4
@@ -0,0 +1,144 @@
+# (c) Copyright 2013-2019 University of Manchester
+"""
+    The importer reads GDX records with the raw API (gdxDataReadRaw) into
+    numpy arrays. These tests serve it a GDX file from memory, through the
+    calls it makes, and check that the records come out as the string API
+    (gdxDataReadStr) would have given them.
+"""
+import pytest
+
+from hydra_gams.importer.importer import GAMSImporter
+
+#The number of value fields of a record (level, marginal, lower, upper, scale)
+GMS_VAL_MAX = 5
+
+#name -> (domain, [(index, level)])
+SYMBOLS = {'storage': (['i', 't'], [(['node_a', '0'], 1.5),
+                                    (['node_a', '1'], 2.5),
+                                    (['node_b', '0'], 3.0)]),
+           'flow': (['i', 'j', 't'], [(['node_a', 'node_b', '0'], 4.0),
+                                      (['node_b', 'node_a', '0'], 5.0),
+                                      (['node_a', 'node_b', '1'], 6.0)]),
+           'cost': ([], [([], 42.0)])}
+
+
+class MemoryGDX(object):
+    """
+        The calls of the GDX API the importer uses to read a file, serving
+        SYMBOLS.
+    """
+    GMS_VAL_MAX = GMS_VAL_MAX
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols.items())
+        self.uels = []
+        for _, (_, records) in self.symbols:
+            for index, _ in records:
+                for element in index:
+                    if element not in self.uels:
+                        self.uels.append(element)
+        self.reading = None
+
+    def gdxOpenRead(self, handle, filename):
+        return [1, 0]
+
+    def gdxUMUelInfo(self, handle):
+        return [1, len(self.uels), len(self.uels)]
+
+    def gdxUMUelGet(self, handle, n):
+        return [1, self.uels[n - 1], -1]
+
+    def gdxSymbolInfo(self, handle, n):
+        name, (domain, records) = self.symbols[n - 1]
+        return [1, name, len(domain), 2]
+
+    def gdxSymbolInfoX(self, handle, n):
+        name, (domain, records) = self.symbols[n - 1]
+        return [1, len(records), 0, 'the %s'%name]
+
+    def gdxSymbolGetDomainX(self, handle, n):
+        name, (domain, records) = self.symbols[n - 1]
+        return [1, domain]
+
+    def gdxDataReadRawStart(self, handle, n):
+        self.reading = iter(self.symbols[n - 1][1][1])
+        return [1, len(self.symbols[n - 1][1][1])]
+
+    def gdxDataReadRaw(self, handle):
+        index, level = next(self.reading)
+        #Keys and values are padded to their full length, as the API does
+        keys = [self.uels.index(element) + 1 for element in index] + [0] * (20 - len(index))
+        values = [level, 0.0, float('-inf'), float('inf'), 1.0]
+        return [1, keys, values, 0]
+
+    def gdxDataReadDone(self, handle):
+        self.reading = None
+        return 1
+
+
+@pytest.fixture
+def gdx_variables():
+    importer = GAMSImporter.__new__(GAMSImporter)
+    importer.gdx = MemoryGDX(SYMBOLS)
+    importer.gdx_handle = None
+    importer.gdx_file = 'results.gdx'
+    importer.symbol_count = len(SYMBOLS)
+    importer.gdx_variables = dict()
+
+    importer.read_gdx_data()
+    return importer.gdx_variables
+
+def test_records_are_read_as_the_string_api_gives_them(gdx_variables):
+    assert sorted(gdx_variables) == sorted(SYMBOLS)
+    for name, (domain, records) in SYMBOLS.items():
+        variable = gdx_variables[name]
+        assert variable.dim == len(domain)
+        assert variable.records == len(records)
+        assert variable.description == 'the %s'%name
+        assert variable.index == [index for index, _ in records]
+        assert variable.data == [level for _, level in records]
+
+def test_resource_records(gdx_variables):
+    storage = gdx_variables['storage']
+    assert storage.get_resource_records('NODE_A') == ([['node_a', '0'], ['node_a', '1']], [1.5, 2.5])
+    assert storage.get_resource_records('node_c') == ([], [])
+
+    flow = gdx_variables['flow']
+    assert [index for _, index in flow.get_link_records('node_a', 'node_b')] == \
+        [['node_a', 'node_b', '0'], ['node_a', 'node_b', '1']]
+
+def test_gdx_file_written_by_gams(tmp_path):
+    """
+        Write a GDX file with the GAMS API and read it back, if GAMS is
+        installed.
+    """
+    gdx = pytest.importorskip('gams.core.gdx')
+
+    filename = str(tmp_path / 'results.gdx')
+    handle = gdx.new_gdxHandle_tp()
+    gdx.gdxCreate(handle, gdx.GMS_SSSIZE)
+    gdx.gdxOpenWrite(handle, filename, 'hydra-gams tests')
+    for name, (domain, records) in SYMBOLS.items():
+        gdx.gdxDataWriteStrStart(handle, name, 'the %s'%name, len(domain), gdx.GMS_DT_PAR, 0)
+        values = gdx.doubleArray(gdx.GMS_VAL_MAX)
+        for index, level in records:
+            values[gdx.GMS_VAL_LEVEL] = level
+            gdx.gdxDataWriteStr(handle, index, values)
+        gdx.gdxDataWriteDone(handle)
+    gdx.gdxClose(handle)
+
+    importer = GAMSImporter.__new__(GAMSImporter)
+    importer.gdx = gdx
+    importer.gdx_handle = gdx.new_gdxHandle_tp()
+    gdx.gdxCreate(importer.gdx_handle, gdx.GMS_SSSIZE)
+    importer.gdx_file = filename
+    importer.gdx_variables = dict()
+    importer.gdx.gdxOpenRead(importer.gdx_handle, filename)
+    importer.symbol_count = gdx.gdxSystemInfo(importer.gdx_handle)[1]
+    gdx.gdxClose(importer.gdx_handle)
+
+    importer.read_gdx_data()
+
+    for name, (domain, records) in SYMBOLS.items():
+        assert importer.gdx_variables[name].index == [index for index, _ in records]
+        assert importer.gdx_variables[name].data == [level for _, level in records]
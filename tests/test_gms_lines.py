@@ -0,0 +1,96 @@
+# (c) Copyright 2013-2019 University of Manchester
+"""
+    iter_gms_lines expands the files a model includes, so that the importer
+    and the model summary see the model as GAMS compiles it.
+"""
+import pytest
+
+from hydra_gams.lib import iter_gms_lines
+
+
+def write(path, *lines):
+    with open(path, 'w') as f:
+        f.write(''.join(line + '\n' for line in lines))
+    return str(path)
+
+def read(filename, **kwargs):
+    return [line.rstrip('\n') for _, _, line in iter_gms_lines(filename, **kwargs)]
+
+def test_include_is_expanded(tmp_path):
+    write(tmp_path / 'data.txt', 'scalar a /1/;')
+    model = write(tmp_path / 'model.gms',
+                  '$include data.txt',
+                  'solve m using lp minimizing z;')
+
+    assert read(model) == ['scalar a /1/;', 'solve m using lp minimizing z;']
+
+def test_quoted_include_with_spaces(tmp_path):
+    write(tmp_path / 'the data.txt', 'scalar a /1/;')
+    model = write(tmp_path / 'model.gms', '$INCLUDE "the data.txt";')
+
+    assert read(model) == ['scalar a /1/;']
+
+def test_lines_know_their_file(tmp_path):
+    data = write(tmp_path / 'data.txt', 'scalar a /1/;', 'scalar b /2/;')
+    model = write(tmp_path / 'model.gms', '* model', '$include data.txt')
+
+    lines = [(filename, lineno) for filename, lineno, _ in iter_gms_lines(model)]
+    assert lines == [(model, 1), (data, 1), (data, 2)]
+
+def test_batinclude_arguments(tmp_path):
+    write(tmp_path / 'nested.txt', 'scalar %1_nested;')
+    write(tmp_path / 'report.txt',
+          'parameter %1_%2;',
+          'parameter %10;',
+          '$include nested.txt')
+    model = write(tmp_path / 'model.gms', '$batinclude report.txt flow storage')
+
+    #Only the lines of the file given the arguments are substituted, and
+    #%1 doesn't replace the start of %10
+    assert read(model) == ['parameter flow_storage;',
+                           'parameter %10;',
+                           'scalar %1_nested;']
+
+def test_text_blocks_are_not_expanded(tmp_path):
+    write(tmp_path / 'data.txt', 'scalar a /1/;')
+    model = write(tmp_path / 'model.gms',
+                  '$ontext',
+                  '$include data.txt',
+                  '$offtext',
+                  '$onecho > options.opt',
+                  '$include data.txt',
+                  '$offecho',
+                  '$include data.txt')
+
+    assert read(model) == ['$ontext',
+                           '$include data.txt',
+                           '$offtext',
+                           '$onecho > options.opt',
+                           '$include data.txt',
+                           '$offecho',
+                           'scalar a /1/;']
+
+def test_missing_include_is_kept(tmp_path):
+    model = write(tmp_path / 'model.gms', '$include missing.txt')
+
+    assert read(model) == ['$include missing.txt']
+
+def test_skipped_include_is_kept(tmp_path):
+    write(tmp_path / 'data.txt', 'scalar a /1/;')
+    model = write(tmp_path / 'model.gms', '$include data.txt')
+
+    assert read(model, skip_include=lambda path: True) == ['$include data.txt']
+
+def test_include_cycle(tmp_path):
+    write(tmp_path / 'a.txt', '$include b.txt')
+    write(tmp_path / 'b.txt', '$include a.txt')
+    model = write(tmp_path / 'model.gms', '$include a.txt')
+
+    with pytest.raises(Exception, match='includes itself'):
+        read(model)
+
+def test_file_included_twice_is_not_a_cycle(tmp_path):
+    write(tmp_path / 'data.txt', 'scalar a /1/;')
+    model = write(tmp_path / 'model.gms', '$include data.txt', '$include data.txt')
+
+    assert read(model) == ['scalar a /1/;', 'scalar a /1/;']
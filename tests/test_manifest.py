@@ -0,0 +1,37 @@
+# (c) Copyright 2013-2019 University of Manchester
+import json
+
+from hydra_gams.exporter.manifest import get_manifest_name
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_unchanged_export_reuses_sections(tmp_path, export_network):
+    export_network('data.txt', steps=slice(0, 12), incremental=True)
+    first = read(tmp_path / 'data.txt')
+    exporter = export_network('data.txt', steps=slice(0, 12), incremental=True)
+
+    assert len(exporter.manifest.previous_sections) > 0
+    assert read(tmp_path / 'data.txt') == first
+
+def test_shifted_time_axis_renders_every_section(tmp_path, export_network):
+    export_network('data.txt', steps=slice(0, 12), incremental=True)
+    exporter = export_network('data.txt', steps=slice(6, 18), incremental=True)
+    export_network('full.txt', steps=slice(6, 18))
+
+    assert exporter.manifest.previous_sections == {}
+    assert read(tmp_path / 'data.txt') == read(tmp_path / 'full.txt')
+
+def test_section_offsets_are_bytes(tmp_path, export_network):
+    export_network('data.txt', steps=slice(0, 12), incremental=True)
+
+    data = read(tmp_path / 'data.txt')
+    with open(get_manifest_name(str(tmp_path / 'data.txt'))) as f:
+        sections = json.load(f)['sections']
+
+    assert b'\r\n' not in data
+    for name, section in sections.items():
+        text = data[section['start']:section['end']].decode('utf-8')
+        assert name.split(':')[-1].replace(' ', '_') in text
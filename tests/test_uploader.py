@@ -0,0 +1,105 @@
+# (c) Copyright 2013-2019 University of Manchester
+import json
+import threading
+
+import pytest
+
+from hydra_client.exception import HydraClientError
+
+from hydra_gams.importer import uploader
+from hydra_gams.importer.uploader import ResultUploader
+
+
+class StubConnection(object):
+    """
+        Records the chunks it is sent, and fails with the errors it is
+        given, one per call, before succeeding. Successful calls take
+        'seconds' to return.
+    """
+    def __init__(self, errors=(), seconds=0):
+        self.errors = list(errors)
+        self.seconds = seconds
+        self.calls = []
+
+    def bulk_update_resourcedata(self, scenario_ids, resource_scenarios):
+        self.calls.append((scenario_ids, resource_scenarios))
+        if len(self.errors) > 0:
+            raise self.errors.pop(0)
+        threading.Event().wait(self.seconds)
+
+
+def make_resource_scenarios(count, value_size=10):
+    return [{'resource_attr_id': n, 'dataset': {'value': 'x' * value_size}}
+            for n in range(count)]
+
+@pytest.fixture
+def delays(monkeypatch):
+    """
+        The delays the uploader waits for before retrying, without waiting.
+    """
+    waited = []
+    monkeypatch.setattr(uploader.time, 'sleep', waited.append)
+    return waited
+
+def test_chunks_by_count():
+    chunks = ResultUploader(StubConnection(), chunk_size=3).make_chunks(make_resource_scenarios(7))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+
+def test_chunks_by_bytes():
+    resource_scenarios = make_resource_scenarios(5)
+    size = len(json.dumps(resource_scenarios[0]))
+
+    chunks = ResultUploader(StubConnection(), chunk_bytes=2 * size + 1).make_chunks(resource_scenarios)
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    #A resource scenario bigger than a chunk is sent on its own
+    chunks = ResultUploader(StubConnection(), chunk_bytes=1).make_chunks(resource_scenarios)
+    assert [len(chunk) for chunk in chunks] == [1] * 5
+
+def test_every_chunk_is_sent():
+    connection = StubConnection()
+    resource_scenarios = make_resource_scenarios(10)
+
+    ResultUploader(connection, chunk_size=4).upload(7, resource_scenarios)
+
+    assert all(scenario_ids == [7] for scenario_ids, _ in connection.calls)
+    sent = sorted((rs for _, chunk in connection.calls for rs in chunk),
+                  key=lambda rs: rs['resource_attr_id'])
+    assert sent == resource_scenarios
+
+def test_transient_errors_are_retried_with_backoff(delays):
+    connection = StubConnection(errors=[OSError('reset'), ConnectionError('refused')])
+
+    ResultUploader(connection, backoff=1.5).upload(1, make_resource_scenarios(2))
+
+    assert len(connection.calls) == 3
+    assert delays == [1.5, 3.0]
+
+def test_retries_give_up(delays):
+    connection = StubConnection(errors=[OSError('reset')] * 3)
+
+    with pytest.raises(OSError):
+        ResultUploader(connection, retries=2, backoff=1).upload(1, make_resource_scenarios(2))
+
+    assert len(connection.calls) == 3
+    assert delays == [1, 2]
+
+def test_server_errors_are_not_retried(delays):
+    connection = StubConnection(errors=[HydraClientError('bad dataset')])
+
+    with pytest.raises(HydraClientError):
+        ResultUploader(connection).upload(1, make_resource_scenarios(2))
+
+    assert len(connection.calls) == 1
+    assert delays == []
+
+def test_remaining_chunks_are_cancelled_after_a_failure():
+    connection = StubConnection(errors=[HydraClientError('bad dataset')], seconds=0.05)
+
+    with pytest.raises(HydraClientError):
+        ResultUploader(connection, chunk_size=1, workers=1).upload(1, make_resource_scenarios(5))
+
+    #The worker may have started the next chunk before the rest were
+    #cancelled, but no more
+    assert len(connection.calls) <= 2
@@ -0,0 +1,39 @@
+# (c) Copyright 2013-2019 University of Manchester
+import json
+from datetime import datetime
+
+import numpy as np
+
+from hydra_gams.util import TimeAxis, reindex_timeseries, reindex_timeseries_batch
+
+
+def make_timeseries(values, year=2000):
+    """
+        A daily timeseries from the 1st of January as Hydra stores it, with
+        None for missing values. Seasonal timeseries are in the year 9999.
+    """
+    days = [datetime(year, 1, 1 + d).strftime('%Y-%m-%dT%H:%M:%S.000Z') for d in range(len(values))]
+    return json.dumps({"0": dict(zip(days, values))})
+
+def test_batch_keeps_gaps_in_the_data():
+    timeseries = [make_timeseries([1.0, None, 3.0, None, 5.0]),
+                  #The 2nd, 4th and 6th of January are only in this one
+                  json.dumps({"0": {"2000-01-01T00:00:00.000Z": 10.0,
+                                    "2000-01-03T00:00:00.000Z": 30.0,
+                                    "2000-01-05T00:00:00.000Z": 50.0}}),
+                  make_timeseries([7.0, 8.0, 9.0, 10.0, 11.0, 12.0], year=9999)]
+    axis = TimeAxis([datetime(2000, 1, d) for d in range(1, 7)])
+
+    values = reindex_timeseries_batch(timeseries, axis)
+
+    np.testing.assert_array_equal(values[0], [1.0, np.nan, 3.0, np.nan, 5.0, 5.0])
+    np.testing.assert_array_equal(values[1], [10.0, 10.0, 30.0, 30.0, 50.0, 50.0])
+    for row, ts in zip(values, timeseries):
+        expected = reindex_timeseries(ts, axis).iloc[:, 0].astype(float).values
+        np.testing.assert_array_equal(row, expected)
+
+def test_batch_leaves_steps_before_the_data_empty():
+    values = reindex_timeseries_batch([make_timeseries([1.0, 2.0])],
+                                      [datetime(1999, 12, 31), datetime(2000, 1, 2)])
+
+    np.testing.assert_array_equal(values, [[np.nan, 2.0]])